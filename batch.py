@@ -0,0 +1,153 @@
+import sys
+import glob
+import json
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from search import plan, POLICIES
+
+# Planejamento em lote sem o servidor: cada combinação de mapa, algoritmo, heurística e par de
+# S/G vira uma tarefa, e cada resultado é escrito como uma linha JSON assim que termina (JSON
+# Lines), então quem lê a saída começa a processar antes do lote acabar. Com vários workers as
+# tarefas rodam em processos, e cada processo mantém os seus mapas no cache de load_level.
+
+ALGORITMOS = ["bfs", "dfs", "ucs", "greedy", "astar"]
+
+# Tarefas enviadas a cada worker antes de esperar resultados; limita a memória de lotes grandes
+TAREFAS_POR_WORKER = 4
+
+# Conteúdo dos mapas já lidos por este processo
+_textos = {}
+
+
+def expandir_mapas(padroes):
+    """ Returns the map files matched by the paths or globs, in order and without repetitions. """
+    arquivos = []
+    for padrao in padroes:
+        encontrados = sorted(glob.glob(padrao)) or [padrao]
+        arquivos.extend(a for a in encontrados if a not in arquivos)
+    return arquivos
+
+
+def ler_consultas(caminho):
+    """ Reads the start/goal pairs of a query file.
+
+    Each line holds four integers, sx sy gx gy, separated by spaces or commas. Empty lines and
+    lines starting with '#' are skipped.
+
+    Returns:
+        A list of ((sx, sy), (gx, gy)) pairs.
+    """
+    consultas = []
+    with open(caminho, "r") as f:
+        for numero, linha in enumerate(f, 1):
+            linha = linha.strip()
+            if not linha or linha.startswith("#"):
+                continue
+            valores = linha.replace(",", " ").split()
+            if len(valores) != 4:
+                raise ValueError(f"{caminho}:{numero}: esperado 'sx sy gx gy', encontrado {linha!r}")
+            sx, sy, gx, gy = map(int, valores)
+            consultas.append(((sx, sy), (gx, gy)))
+    return consultas
+
+
+def gerar_tarefas(mapas, algoritmos, heuristicas, consultas=None):
+    """ Yields one task for each map, algorithm, heuristic and query.
+
+    The uninformed algorithms run once per query, without heuristic. Without queries each map is
+    searched between its own S and G.
+    """
+    consultas = consultas or [(None, None)]
+    for mapa in mapas:
+        for algoritmo in algoritmos:
+            informada = POLICIES.get(algoritmo, (None, False))[1]
+            for heuristica in (heuristicas if informada else [None]):
+                for start, goal in consultas:
+                    yield {"map": mapa, "algorithm": algoritmo, "heuristic": heuristica, "start": start, "goal": goal}
+
+
+def executar_tarefa(tarefa, stats=False, **opcoes):
+    """ Runs one task and returns its JSON record; errors become records too, so one bad task
+    does not stop the batch. """
+    registro = dict(tarefa)
+    try:
+        texto = _textos.get(tarefa["map"])
+        if texto is None:
+            with open(tarefa["map"], "r") as f:
+                texto = _textos[tarefa["map"]] = f.read()
+
+        resultado = plan(texto, tarefa["algorithm"], tarefa["heuristic"], stats=stats,
+                         start=tarefa["start"], goal=tarefa["goal"], **opcoes)
+        path, custo, visited = resultado[:3]
+        registro.update(result="success", path=path, cost=custo, visited=len(visited))
+        if stats:
+            registro["stats"] = resultado[3]
+    except Exception as e:
+        registro.update(result="error", error_details=str(e))
+    return registro
+
+
+def executar_lote(tarefas, workers=1, stats=False, **opcoes):
+    """ Runs the tasks and yields their records as they finish.
+
+    Args:
+        tarefas: An iterable of tasks, as made by gerar_tarefas.
+        workers: Number of processes; with 1 the tasks run in this process, in order.
+        stats: If True, each record also has the statistics of plan.
+        **opcoes: Other arguments of plan, e.g. backend or frontier.
+    """
+    if workers == 1:
+        for tarefa in tarefas:
+            yield executar_tarefa(tarefa, stats, **opcoes)
+        return
+
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context("forkserver")
+    else:
+        contexto = multiprocessing.get_context("spawn")
+
+    tarefas = iter(tarefas)
+    with ProcessPoolExecutor(workers, contexto) as pool:
+        pendentes = set()
+        while True:
+            # mantém a fila dos workers cheia sem submeter o lote inteiro de uma vez
+            for tarefa in tarefas:
+                pendentes.add(pool.submit(executar_tarefa, tarefa, stats, **opcoes))
+                if len(pendentes) >= workers * TAREFAS_POR_WORKER:
+                    break
+            if not pendentes:
+                return
+            prontas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in prontas:
+                yield futuro.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa buscas em lote e escreve um resultado JSON por linha.")
+    parser.add_argument("mapas", nargs="+", help="arquivos de mapa ou globs, ex: 'maps/*.txt'")
+    parser.add_argument("--algoritmos", nargs="+", default=ALGORITMOS, choices=ALGORITMOS)
+    parser.add_argument("--heuristicas", nargs="+", default=["euclidian"], choices=["euclidian", "manhattan"],
+                        help="heurísticas dos algoritmos informados")
+    parser.add_argument("--consultas", default=None,
+                        help="arquivo com um par 'sx sy gx gy' por linha; sem ele usa o S e o G de cada mapa")
+    parser.add_argument("--workers", type=int, default=1, help="processos em paralelo")
+    parser.add_argument("--stats", action="store_true", help="inclui as estatísticas de cada busca")
+    parser.add_argument("--backend", default="python")
+    parser.add_argument("--frontier", default="heap")
+    args = parser.parse_args(argv)
+
+    consultas = ler_consultas(args.consultas) if args.consultas else None
+    tarefas = gerar_tarefas(expandir_mapas(args.mapas), args.algoritmos, args.heuristicas, consultas)
+
+    erros = 0
+    for registro in executar_lote(tarefas, args.workers, args.stats, backend=args.backend, frontier=args.frontier):
+        erros += registro["result"] == "error"
+        sys.stdout.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
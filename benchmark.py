@@ -0,0 +1,249 @@
+import os
+import csv
+import json
+import argparse
+import statistics
+from time import perf_counter
+from search import plan
+from gerador_mapas import gerar_mapa
+
+PASTA_MAPAS = "maps"
+
+algoritmos = [
+    ("BFS", "bfs", None),
+    ("DFS", "dfs", None),
+    ("UCS", "ucs", None),
+    ("Greedy Euclidiana", "greedy", "euclidian"),
+    ("Greedy Manhattan", "greedy", "manhattan"),
+    ("A* Euclidiana", "astar", "euclidian"),
+    ("A* Manhattan", "astar", "manhattan")
+]
+
+# Desempates comparados por comparar_desempates (o tie_break de plan)
+DESEMPATES = ["coord", "g_max", "h_min", "fifo", "lifo"]
+
+# Métricas de tempo e memória medidas além de Visitados/Tamanho/Custo
+METRICAS_TEMPO = ["Tempo (ms)", "P95 (ms)", "Memória (KiB)", "Expansões/s"]
+
+def carregar_mapas(pasta):
+    mapas = {}
+    for arquivo in sorted(os.listdir(pasta)):
+        if arquivo.endswith(".txt"):
+            caminho = os.path.join(pasta, arquivo)
+            with open(caminho, "r") as f:
+                mapas[arquivo] = f.read()
+    return mapas
+
+def percentil(valores, p):
+    """ Returns the p-th percentile (0 <= p <= 100) of the values, interpolating between the closest ranks. """
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    pos = (len(ordenados) - 1) * p / 100
+    i = int(pos)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (pos - i)
+
+def medir(mapa, algo, heur, repeticoes=5, aquecimento=1, **opcoes):
+    """ Runs one algorithm on one map and measures its results, time and memory.
+
+    The timed runs collect the counters and the time of the search phase (stats=True is cheap),
+    and the throughput comes from them. Only the memory peak needs one extra run with
+    memory=True, whose time is not used: tracemalloc makes it about 10x slower.
+
+    Args:
+        mapa: A string containing the level.
+        algo: The algorithm name used by plan.
+        heur: The heuristic name used by plan.
+        repeticoes: Number of timed runs.
+        aquecimento: Number of untimed runs done before the timed ones.
+        **opcoes: Other arguments of plan, e.g. tie_break.
+
+    Returns:
+        A dictionary with the metrics of the run.
+    """
+    for _ in range(aquecimento):
+        plan(mapa, algorithm=algo, heuristic=heur, **opcoes)
+
+    tempos = []
+    buscas = []
+    for _ in range(repeticoes):
+        t0 = perf_counter()
+        path, custo, visited, stats = plan(mapa, algorithm=algo, heuristic=heur, stats=True, **opcoes)
+        tempos.append(perf_counter() - t0)
+        buscas.append(stats["timings"]["search"])
+
+    memoria = plan(mapa, algorithm=algo, heuristic=heur, stats=True, memory=True, **opcoes)[3]["peak_memory"]
+    mediana = statistics.median(tempos)
+    busca = statistics.median(buscas)
+
+    return {
+        "Visitados": len(visited),
+        "Tamanho": len(path) if path else float("inf"),
+        "Custo": round(custo, 2) if path else float("inf"),
+        "Expansões": stats["expansions"],
+        "Tempo (ms)": round(mediana * 1000, 3),
+        "P95 (ms)": round(percentil(tempos, 95) * 1000, 3),
+        "Memória (KiB)": round(memoria / 1024, 1),
+        "Expansões/s": round(stats["expansions"] / busca) if busca > 0 else 0,
+    }
+
+def coletar_resultados(mapas, algoritmos, repeticoes=5, aquecimento=1):
+    """ Measures every algorithm on every map.
+
+    Returns:
+        A dictionary {map name: {algorithm name: metrics}}.
+    """
+    resultados_por_mapa = {}
+    for nome_mapa, mapa in mapas.items():
+        resultados_por_mapa[nome_mapa] = {
+            nome_algo: medir(mapa, algo, heur, repeticoes, aquecimento)
+            for nome_algo, algo, heur in algoritmos
+        }
+    return resultados_por_mapa
+
+def comparar_desempates(mapas, algoritmos, desempates=DESEMPATES):
+    """ Counts the expansions of each informed algorithm under each tie-breaking policy.
+
+    Only the algorithms with a heuristic are run, since the tie_break of plan only changes them.
+    The counts come from a single run with stats=True: they do not depend on timing.
+
+    Returns:
+        A dictionary {map name: {algorithm name: {policy: (expansions, cost)}}}.
+    """
+    resultados_por_mapa = {}
+    for nome_mapa, mapa in mapas.items():
+        resultados = resultados_por_mapa[nome_mapa] = {}
+        for nome_algo, algo, heur in algoritmos:
+            if heur is None:
+                continue
+            resultados[nome_algo] = {}
+            for desempate in desempates:
+                path, custo, _, stats = plan(mapa, algorithm=algo, heuristic=heur, stats=True, tie_break=desempate)
+                resultados[nome_algo][desempate] = (stats["expansions"], round(custo, 2) if path else float("inf"))
+    return resultados_por_mapa
+
+def varrer_tamanhos(tamanhos, algoritmos, tipo="aberto", seed=0, repeticoes=3, aquecimento=1, **opcoes):
+    """ Measures every algorithm on generated maps of increasing size.
+
+    Args:
+        tamanhos: The map sides to test; each map is tamanho x tamanho.
+        algoritmos: The (name, algorithm, heuristic) list.
+        tipo: The generator used, one of gerador_mapas.GERADORES.
+        seed: Seed of the generator, the same for every size.
+
+    Returns:
+        A dictionary {size: {algorithm name: metrics}}.
+    """
+    resultados_por_tamanho = {}
+    for tamanho in tamanhos:
+        mapa = gerar_mapa(tipo, tamanho, tamanho, seed=seed, **opcoes)
+        resultados_por_tamanho[tamanho] = {
+            nome_algo: medir(mapa, algo, heur, repeticoes, aquecimento)
+            for nome_algo, algo, heur in algoritmos
+        }
+    return resultados_por_tamanho
+
+def _valor_json(valor):
+    return None if valor == float("inf") else valor
+
+def exportar_json(resultados_por_mapa, caminho):
+    dados = {mapa: {algo: {k: _valor_json(v) for k, v in r.items()} for algo, r in res.items()}
+             for mapa, res in resultados_por_mapa.items()}
+    with open(caminho, "w") as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+
+def carregar_json(caminho):
+    with open(caminho, "r") as f:
+        dados = json.load(f)
+    return {mapa: {algo: {k: float("inf") if v is None else v for k, v in r.items()} for algo, r in res.items()}
+            for mapa, res in dados.items()}
+
+def exportar_csv(resultados_por_mapa, caminho):
+    linhas = [{"Mapa": mapa, "Algoritmo": algo, **r}
+              for mapa, res in resultados_por_mapa.items() for algo, r in res.items()]
+    if not linhas:
+        return
+    with open(caminho, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(linhas[0].keys()))
+        writer.writeheader()
+        writer.writerows(linhas)
+
+def comparar_baseline(resultados_por_mapa, baseline, tolerancia=0.2):
+    """ Compares the results against a stored baseline.
+
+    A regression is a median time or a memory peak more than `tolerancia` above the baseline, or
+    any growth in the number of expansions or in the path cost.
+
+    Returns:
+        A list of (map, algorithm, metric, baseline value, current value) tuples.
+    """
+    regressoes = []
+    for mapa, res in resultados_por_mapa.items():
+        for algo, r in res.items():
+            antigo = baseline.get(mapa, {}).get(algo)
+            if antigo is None:
+                continue
+
+            for metrica in ("Tempo (ms)", "Memória (KiB)"):
+                if metrica in antigo and r[metrica] > antigo[metrica] * (1 + tolerancia):
+                    regressoes.append((mapa, algo, metrica, antigo[metrica], r[metrica]))
+
+            for metrica in ("Expansões", "Custo"):
+                if metrica in antigo and r[metrica] > antigo[metrica] + 0.01:
+                    regressoes.append((mapa, algo, metrica, antigo[metrica], r[metrica]))
+    return regressoes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede tempo, memória e vazão dos algoritmos de busca.")
+    parser.add_argument("--mapas", default=PASTA_MAPAS, help="pasta com os mapas")
+    parser.add_argument("--mapa", default=None, help="prefixo de um mapa específico, ex: mapa10")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--aquecimento", type=int, default=1)
+    parser.add_argument("--json", default=None, help="exporta os resultados em JSON")
+    parser.add_argument("--csv", default=None, help="exporta os resultados em CSV")
+    parser.add_argument("--baseline", default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=None,
+                        help="mede em mapas gerados com esses lados em vez dos mapas da pasta")
+    parser.add_argument("--tipo", default="aberto", help="gerador usado com --tamanhos")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--desempates", action="store_true",
+                        help="só compara as expansões dos algoritmos informados em cada política de desempate")
+    args = parser.parse_args()
+
+    if args.desempates:
+        mapas = carregar_mapas(args.mapas)
+        if args.mapa:
+            mapas = {nome: m for nome, m in mapas.items() if nome.startswith(args.mapa)}
+        for nome_mapa, res in comparar_desempates(mapas, algoritmos).items():
+            for nome_algo, por_desempate in res.items():
+                print(f"{nome_mapa:40s} {nome_algo:18s} " + "  ".join(
+                    f"{d}={expansoes} (custo {custo})" for d, (expansoes, custo) in por_desempate.items()))
+        raise SystemExit(0)
+
+    if args.tamanhos:
+        resultados = varrer_tamanhos(args.tamanhos, algoritmos, args.tipo, args.seed, args.repeticoes, args.aquecimento)
+        resultados = {f"{args.tipo}_{t}x{t}": r for t, r in resultados.items()}
+    else:
+        mapas = carregar_mapas(args.mapas)
+        if args.mapa:
+            mapas = {nome: m for nome, m in mapas.items() if nome.startswith(args.mapa)}
+
+        resultados = coletar_resultados(mapas, algoritmos, args.repeticoes, args.aquecimento)
+
+    for nome_mapa, res in resultados.items():
+        for nome_algo, r in res.items():
+            print(f"{nome_mapa:40s} {nome_algo:18s} " + "  ".join(f"{k}={v}" for k, v in r.items()))
+
+    if args.json:
+        exportar_json(resultados, args.json)
+    if args.csv:
+        exportar_csv(resultados, args.csv)
+
+    if args.baseline:
+        regressoes = comparar_baseline(resultados, carregar_json(args.baseline), args.tolerancia)
+        for mapa, algo, metrica, antigo, atual in regressoes:
+            print(f"REGRESSÃO {mapa} {algo} {metrica}: {antigo} -> {atual}")
+        if regressoes:
+            raise SystemExit(1)
@@ -0,0 +1,94 @@
+from heapq import heappush, heappop
+
+# Fila de prioridade em baldes (algoritmo de Dial) para os custos limitados dos mapas: cada
+# aresta custa a distância (1 ou √2) vezes a média dos custos das células (entre 1 e 9), então
+# as prioridades caem em poucos baldes de largura fixa. Os baldes fechados são listas em que as
+# entradas só são anexadas, e cada um é ordenado uma única vez, quando vira o balde aberto. As
+# inserções que caem no balde aberto (comuns no A*, em que f cresce devagar) vão para um heap
+# auxiliar pequeno, em vez de forçar uma nova ordenação do balde.
+
+
+class BucketQueue:
+    """ Priority queue of heapq entries grouped in buckets of fixed width, for bounded edge costs.
+
+    The entries are the same tuples a heapq frontier would hold, (priority, ...), and they come
+    out in the same order, so searches using it expand the same nodes as with heapq. Like heapq,
+    an entry pushed again is not replaced: stale entries are popped and skipped by the caller.
+
+    Args:
+        largura: Width of each bucket. With the smallest edge cost as width, the pushes of a
+            uniform-cost search never fall in the open bucket.
+    """
+
+    __slots__ = ('largura', '_escala', '_baldes', '_indices', '_aberto', '_pos', '_extra', '_b_aberto', '_fechados')
+
+    def __init__(self, largura=1.0):
+        self.largura = largura
+        self._escala = 1.0 / largura
+        self._baldes = {}
+        self._indices = []
+        self._aberto = []
+        self._pos = 0
+        self._extra = []
+        self._b_aberto = -1
+        # entradas nos baldes fechados; as do balde aberto são contadas pelas listas dele
+        self._fechados = 0
+
+    def __len__(self):
+        return self._fechados + len(self._aberto) - self._pos + len(self._extra)
+
+    def push(self, entrada):
+        b = int(entrada[0] * self._escala)
+
+        if b == self._b_aberto:
+            heappush(self._extra, entrada)
+            return
+        if b < self._b_aberto:
+            # prioridade abaixo do balde aberto (heurística inconsistente): devolve o resto dele
+            # aos baldes fechados, para o menor ser aberto no próximo pop
+            self._guardar_aberto()
+
+        self._fechados += 1
+        balde = self._baldes.get(b)
+        if balde is None:
+            self._baldes[b] = [entrada]
+            heappush(self._indices, b)
+        else:
+            balde.append(entrada)
+
+    def pop(self):
+        """ Removes and returns the entry with the smallest priority. """
+        aberto = self._aberto
+        pos = self._pos
+        extra = self._extra
+
+        if pos < len(aberto):
+            entrada = aberto[pos]
+            if extra and extra[0] < entrada:
+                entrada = heappop(extra)
+            else:
+                self._pos = pos + 1
+        elif extra:
+            entrada = heappop(extra)
+        elif self._indices:
+            b = heappop(self._indices)
+            aberto = self._aberto = self._baldes.pop(b)
+            aberto.sort()
+            self._fechados -= len(aberto)
+            self._pos = 1
+            self._b_aberto = b
+            entrada = aberto[0]
+        else:
+            raise IndexError("pop from an empty BucketQueue")
+        return entrada
+
+    def _guardar_aberto(self):
+        resto = self._aberto[self._pos:] + self._extra
+        if resto:
+            self._fechados += len(resto)
+            self._baldes[self._b_aberto] = resto
+            heappush(self._indices, self._b_aberto)
+        self._aberto = []
+        self._pos = 0
+        self._extra = []
+        self._b_aberto = -1
@@ -0,0 +1,135 @@
+from array import array
+from collections import deque
+
+# Rotulagem das componentes conexas das células livres, com a mesma vizinhança de 8 direções
+# de transition_model. Cada célula guarda um rótulo em um array; rótulos que passam a ser a
+# mesma componente quando uma célula é aberta são unidos em uma union-find, e fechar uma célula
+# só rotula de novo a componente em que ela estava.
+
+SEM_ROTULO = -1
+
+_DIRECOES = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+class ComponentIndex:
+    """ Connected components of the free cells of a level, under 8-connectivity.
+
+    Args:
+        largura: Width of the grid.
+        altura: Height of the grid.
+        spaces: The free cells of the level (level['spaces']).
+    """
+
+    def __init__(self, largura, altura, spaces):
+        self.largura = largura
+        self.altura = altura
+        self.rotulos = array('l', [SEM_ROTULO]) * (largura * altura)
+        self._pais = []
+
+        rotulos = self.rotulos
+        for x, y in spaces:
+            rotulos[x * altura + y] = 0
+
+        # rotulagem inicial com uma pilha por componente, sem os testes de _inundar
+        deslocamentos = [(dx, dy, dx * altura + dy) for dx, dy in _DIRECOES]
+        for x, y in spaces:
+            if rotulos[x * altura + y] != 0:
+                continue
+            rotulo = self._novo_rotulo()
+            rotulos[x * altura + y] = rotulo
+            pilha = [(x, y)]
+            while pilha:
+                x, y = pilha.pop()
+                i = x * altura + y
+                for dx, dy, d in deslocamentos:
+                    vx, vy = x + dx, y + dy
+                    if 0 <= vx < largura and 0 <= vy < altura and rotulos[i + d] == 0:
+                        rotulos[i + d] = rotulo
+                        pilha.append((vx, vy))
+
+    def _novo_rotulo(self):
+        # os rótulos começam em 1; o 0 marca células livres ainda sem componente
+        self._pais.append(len(self._pais) + 1)
+        return len(self._pais)
+
+    def _raiz(self, r):
+        pais = self._pais
+        while pais[r - 1] != r:
+            pais[r - 1] = pais[pais[r - 1] - 1]
+            r = pais[r - 1]
+        return r
+
+    def _vizinhos(self, i):
+        altura = self.altura
+        x, y = divmod(i, altura)
+        for dx, dy in _DIRECOES:
+            vx, vy = x + dx, y + dy
+            if 0 <= vx < self.largura and 0 <= vy < altura:
+                j = vx * altura + vy
+                if self.rotulos[j] != SEM_ROTULO:
+                    yield j
+
+    def _inundar(self, inicio, rotulo, pertence):
+        """ Gives `rotulo` to every cell reachable from inicio whose label satisfies pertence. """
+        rotulos = self.rotulos
+        rotulos[inicio] = rotulo
+        fila = deque([inicio])
+        while fila:
+            i = fila.popleft()
+            for j in self._vizinhos(i):
+                if rotulos[j] != rotulo and pertence(rotulos[j]):
+                    rotulos[j] = rotulo
+                    fila.append(j)
+
+    def component(self, cell):
+        """ Returns the component of the cell, or None if it is not a free cell of the grid. """
+        x, y = cell
+        if x < 0 or y < 0 or x >= self.largura or y >= self.altura:
+            return None
+        r = self.rotulos[x * self.altura + y]
+        return None if r == SEM_ROTULO else self._raiz(r)
+
+    def connected(self, a, b):
+        """ Returns True if there is a path between the cells a and b. """
+        ca = self.component(a)
+        return ca is not None and ca == self.component(b)
+
+    def open(self, cell):
+        """ Marks the cell as free, joining the components around it. """
+        x, y = cell
+        i = x * self.altura + y
+        if self.rotulos[i] != SEM_ROTULO:
+            return
+
+        raizes = {self._raiz(self.rotulos[j]) for j in self._vizinhos(i)}
+        if not raizes:
+            self.rotulos[i] = self._novo_rotulo()
+            return
+
+        principal = min(raizes)
+        for r in raizes:
+            self._pais[r - 1] = principal
+        self.rotulos[i] = principal
+
+    def close(self, cell):
+        """ Marks the cell as a wall, splitting its component if it was the only link between parts. """
+        x, y = cell
+        i = x * self.altura + y
+        r = self.rotulos[i]
+        if r == SEM_ROTULO:
+            return
+
+        raiz = self._raiz(r)
+        self.rotulos[i] = SEM_ROTULO
+        vizinhos = list(self._vizinhos(i))
+        if len(vizinhos) < 2:
+            return
+
+        # cada parte que ainda se alcança a partir de um vizinho ganha um rótulo próprio
+        novos = set()
+        for j in vizinhos:
+            if self.rotulos[j] in novos:
+                continue
+            rotulo = self._novo_rotulo()
+            novos.add(rotulo)
+            self._inundar(j, rotulo, lambda s: s not in novos and self._raiz(s) == raiz)
@@ -0,0 +1,306 @@
+import os
+import sys
+import pickle
+import hashlib
+import argparse
+from heapq import heappush, heappop
+from math import inf
+from time import perf_counter
+
+from search import G_ORDER, F_ORDER, _transicoes, _registrar, load_level
+
+# Hierarquias de contração (CH) para muitas consultas no mesmo mapa. O pré-processamento
+# contrai os nós um a um, do menos para o mais importante, e adiciona atalhos entre os vizinhos
+# de cada nó contraído quando o caminho por ele é o único caminho mínimo entre os dois. Uma
+# consulta é uma busca bidirecional que só sobe na hierarquia (para nós contraídos depois),
+# então visita poucas centenas de nós em vez da região inteira que a UCS explora.
+
+# Pasta onde `python contraction.py` grava as hierarquias e de onde plan(..., backend='ch') as lê
+PASTA = "ch"
+
+# Limite de nós assentados em cada busca de testemunha; sem testemunha o atalho é adicionado,
+# o que nunca perde caminhos mínimos, só gera atalhos a mais
+LIMITE_TESTEMUNHA = 64
+
+
+class ContractionHierarchy:
+    """ Contraction hierarchy of the grid graph of a level, with the edge costs of cost_function.
+
+    Args:
+        level: A loaded level, containing walls, spaces, and waypoints.
+    """
+
+    def __init__(self, level):
+        self.celulas = list(level['spaces'])
+        self.ids = {cell: i for i, cell in enumerate(self.celulas)}
+        n = len(self.celulas)
+
+        # grafo ainda não contraído: arestas nos dois sentidos, com os custos de transition_model
+        adj = [{} for _ in range(n)]
+        for i, cell in enumerate(self.celulas):
+            for vizinho, custo in _transicoes(level, cell):
+                adj[i][self.ids[vizinho]] = custo
+
+        # up[v]: arestas de v para os nós contraídos depois dele; meio[(a, b)]: nó que o atalho a-b pula
+        self.up = [None] * n
+        self.meio = {}
+        self.rank = [0] * n
+        self._contrair(adj)
+
+    def _testemunha(self, adj, origem, ignorado, limite):
+        """ Distances from origem without passing through ignorado, up to the cost limite. """
+        dist = {origem: 0.0}
+        fila = [(0.0, origem)]
+        assentados = 0
+        while fila and assentados < LIMITE_TESTEMUNHA:
+            d, u = heappop(fila)
+            if d > dist[u]:
+                continue
+            if d > limite:
+                break
+            assentados += 1
+            for v, w in adj[u].items():
+                if v == ignorado:
+                    continue
+                nd = d + w
+                if nd < dist.get(v, inf):
+                    dist[v] = nd
+                    heappush(fila, (nd, v))
+        return dist
+
+    def _atalhos(self, adj, v):
+        """ Returns the shortcuts (u, w, cost) needed to contract v. """
+        vizinhos = list(adj[v].items())
+        atalhos = []
+        for i, (u, wu) in enumerate(vizinhos):
+            restantes = vizinhos[i + 1:]
+            if not restantes:
+                break
+            limite = wu + max(ww for _, ww in restantes)
+            dist = self._testemunha(adj, u, v, limite)
+            for w, ww in restantes:
+                via = wu + ww
+                if dist.get(w, inf) > via:
+                    atalhos.append((u, w, via))
+        return atalhos
+
+    def _contrair(self, adj):
+        n = len(adj)
+        removidos_vizinhos = [0] * n
+
+        def importancia(v, atalhos):
+            # diferença de arestas mais o número de vizinhos já contraídos
+            return len(atalhos) - len(adj[v]) + removidos_vizinhos[v]
+
+        fila = [(importancia(v, self._atalhos(adj, v)), v) for v in range(n)]
+        fila.sort()
+        contraido = [False] * n
+        ordem = 0
+
+        while fila:
+            _, v = heappop(fila)
+            if contraido[v]:
+                continue
+
+            # atualização preguiçosa: se a importância subiu, v volta para a fila
+            atalhos = self._atalhos(adj, v)
+            atual = importancia(v, atalhos)
+            if fila and atual > fila[0][0]:
+                heappush(fila, (atual, v))
+                continue
+
+            for u, w, custo in atalhos:
+                if custo < adj[u].get(w, inf):
+                    adj[u][w] = adj[w][u] = custo
+                    self.meio[(min(u, w), max(u, w))] = v
+
+            self.up[v] = adj[v]
+            self.rank[v] = ordem
+            ordem += 1
+            contraido[v] = True
+            for u in adj[v]:
+                del adj[u][v]
+                removidos_vizinhos[u] += 1
+            adj[v] = None
+
+    def _desempacotar(self, a, b, saida):
+        """ Appends to saida the cells of the edge a-b after a, expanding the shortcuts. """
+        pilha = [(a, b)]
+        while pilha:
+            a, b = pilha.pop()
+            m = self.meio.get((min(a, b), max(a, b)))
+            if m is None:
+                saida.append(self.celulas[b])
+            else:
+                pilha.append((m, b))
+                pilha.append((a, m))
+
+    def query(self, s, g, stats=None):
+        """ Shortest path from s to g with a bidirectional search over the upward edges.
+
+        Returns:
+            The path from s to g (empty if g is unreachable), its cost, and a dictionary with the
+            cells settled by both searches and their parent in the search (a cell of the
+            hierarchy, not necessarily adjacent in the grid).
+        """
+        if s not in self.ids or g not in self.ids:
+            return [], 0, {}
+        origem, destino = self.ids[s], self.ids[g]
+
+        dist = ({origem: 0.0}, {destino: 0.0})
+        pais = ({origem: None}, {destino: None})
+        filas = ([(0.0, origem)], [(0.0, destino)])
+        assentados = (set(), set())
+        melhor, encontro = inf, None
+        expansoes = pops = 0
+        pushes = 2
+
+        while filas[0] or filas[1]:
+            # alterna para o lado com o menor topo; para quando nenhum lado pode melhorar
+            lado = 0 if filas[0] and (not filas[1] or filas[0][0][0] <= filas[1][0][0]) else 1
+            d, u = heappop(filas[lado])
+            pops += 1
+            if d > dist[lado][u] or u in assentados[lado]:
+                continue
+            if d >= melhor:
+                filas[lado].clear()
+                continue
+
+            assentados[lado].add(u)
+            expansoes += 1
+            outro = dist[1 - lado].get(u)
+            if outro is not None and d + outro < melhor:
+                melhor, encontro = d + outro, u
+
+            for v, w in self.up[u].items():
+                nd = d + w
+                if nd < dist[lado].get(v, inf):
+                    dist[lado][v] = nd
+                    pais[lado][v] = u
+                    heappush(filas[lado], (nd, v))
+                    pushes += 1
+
+        t0 = perf_counter()
+        path = []
+        if encontro is not None:
+            # caminho na hierarquia: origem -> encontro pela busca direta, encontro -> destino pela reversa
+            nos = []
+            u = encontro
+            while u is not None:
+                nos.append(u)
+                u = pais[0][u]
+            nos.reverse()
+            u = pais[1][encontro]
+            while u is not None:
+                nos.append(u)
+                u = pais[1][u]
+
+            path = [self.celulas[origem]]
+            for a, b in zip(nos, nos[1:]):
+                self._desempacotar(a, b, path)
+
+        visited = {}
+        for lado in (0, 1):
+            for u in assentados[lado]:
+                p = pais[lado][u]
+                visited[self.celulas[u]] = None if p is None else self.celulas[p]
+
+        if stats is not None:
+            _registrar(stats, expansoes, pushes, pops, len(filas[0]) + len(filas[1]), perf_counter() - t0)
+
+        return path, (melhor if encontro is not None else 0), visited
+
+    def save(self, caminho):
+        with open(caminho, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(caminho):
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+
+
+def _arquivo(pasta, chave):
+    return os.path.join(pasta, hashlib.sha1(chave.encode()).hexdigest() + '.ch')
+
+
+def hierarchy(level, pasta=None, chave=None):
+    """ Returns the contraction hierarchy of the level, building it on the first call.
+
+    The hierarchy is kept in the level itself, so the levels cached by search.load_level build it
+    only once. With pasta and chave (e.g. the map text) it is also stored on disk and reused by
+    other processes.
+    """
+    ch = level.get('hierarchy')
+    if ch is not None:
+        return ch
+
+    caminho = None
+    if pasta is not None and chave is not None:
+        caminho = _arquivo(pasta, chave)
+        if os.path.exists(caminho):
+            ch = ContractionHierarchy.load(caminho)
+
+    if ch is None:
+        ch = ContractionHierarchy(level)
+        if caminho is not None:
+            os.makedirs(pasta, exist_ok=True)
+            ch.save(caminho)
+
+    level['hierarchy'] = ch
+    return ch
+
+
+def load_hierarchy(level, chave, pasta=None):
+    """ Returns the hierarchy of the level stored under chave (the map text), without building it.
+
+    The file read is kept in the level, like the one built by hierarchy.
+
+    Returns:
+        The ContractionHierarchy, or None if it was not built for this map.
+    """
+    ch = level.get('hierarchy')
+    if ch is None:
+        caminho = _arquivo(PASTA if pasta is None else pasta, chave)
+        if not os.path.exists(caminho):
+            return None
+        ch = level['hierarchy'] = ContractionHierarchy.load(caminho)
+    return ch
+
+
+# Políticas que este backend responde: as duas devolvem caminhos de custo mínimo
+POLITICAS = (G_ORDER, F_ORDER)
+
+
+def best_first_search(level, policy, heuristic=None, stats=None, s=None, g=None):
+    """ Entry point used by plan(..., backend='ch'): answers ucs and astar with the hierarchy
+    loaded in the level (see load_hierarchy); it is never built here. """
+    if policy not in POLITICAS:
+        raise ValueError(f"O backend ch não implementa a política {policy!r}")
+    ch = level.get('hierarchy')
+    if ch is None:
+        raise ValueError("O nível não tem hierarquia; construa com `python contraction.py mapa.txt`")
+    s = level['start'] if s is None else s
+    g = level['goal'] if g is None else g
+    path, _, visited = ch.query(s, g, stats)
+    # None faz plan somar o custo ao longo do caminho, na mesma ordem da ucs
+    return path, visited, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constrói offline as hierarquias de contração usadas por plan(..., backend='ch').")
+    parser.add_argument("mapas", nargs="+", help="arquivos de mapa")
+    parser.add_argument("--pasta", default=PASTA, help="pasta onde as hierarquias são gravadas")
+    args = parser.parse_args(argv)
+
+    for arquivo in args.mapas:
+        with open(arquivo, "r") as f:
+            texto = f.read()
+        t0 = perf_counter()
+        ch = hierarchy(load_level(texto), args.pasta, texto)
+        print(f"{arquivo}: {len(ch.celulas)} células, {perf_counter() - t0:.1f} s -> {_arquivo(args.pasta, texto)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import os
+import pickle
+import hashlib
+import argparse
+import multiprocessing
+from array import array
+from bisect import bisect_right
+from heapq import heappush, heappop
+from concurrent.futures import ProcessPoolExecutor
+
+from search import MOVIMENTOS, _transicoes, load_level
+
+# Base de dados de caminhos comprimida (CPD): para cada célula de origem, o primeiro movimento
+# de um caminho mínimo até cada célula de destino. Os destinos seguem uma ordem fixa e a tabela
+# de cada origem é guardada em runs (índice onde o run começa, movimento), então destinos
+# vizinhos que começam pelo mesmo movimento ocupam uma entrada só. Consultar o próximo passo é
+# uma busca binária nos runs da célula atual.
+
+SEM_MOVIMENTO = len(MOVIMENTOS)
+
+_INDICE_MOVIMENTO = {movimento: k for k, movimento in enumerate(MOVIMENTOS)}
+
+# Nível usado pelos processos da construção, preenchido por _iniciar
+_level = None
+_ids = None
+
+
+def _iniciar(level, ids):
+    global _level, _ids
+    _level, _ids = level, ids
+
+
+def _varrer(origem):
+    """ One ucs sweep from origem to every cell, keeping the first move of each shortest path.
+
+    Returns:
+        The run-length compressed table: (array of run starts, bytes of moves).
+    """
+    level, ids = _level, _ids
+    primeiro = bytearray([SEM_MOVIMENTO]) * len(ids)
+    g_scores = {origem: 0}
+    fila = [(0, 0, origem)]
+    contador = 0
+
+    while fila:
+        g_atual, _, atual = heappop(fila)
+        if g_atual > g_scores[atual]:
+            continue
+
+        x, y = atual
+        herdado = primeiro[ids[atual]]
+        for vizinho, custo in _transicoes(level, atual):
+            novo_g = g_atual + custo
+            if vizinho not in g_scores or novo_g < g_scores[vizinho]:
+                g_scores[vizinho] = novo_g
+                # os vizinhos da origem começam pelo próprio movimento; os demais herdam o do pai
+                if atual == origem:
+                    primeiro[ids[vizinho]] = _INDICE_MOVIMENTO[(vizinho[0] - x, vizinho[1] - y)]
+                else:
+                    primeiro[ids[vizinho]] = herdado
+                contador += 1
+                heappush(fila, (novo_g, contador, vizinho))
+
+    inicios = array('l')
+    movimentos = bytearray()
+    for i, k in enumerate(primeiro):
+        if not movimentos or movimentos[-1] != k:
+            inicios.append(i)
+            movimentos.append(k)
+    return inicios, bytes(movimentos)
+
+
+def _morton(cell):
+    """ Z-order index of the cell: close cells get close indices, which makes longer runs. """
+    x, y = cell
+    indice = 0
+    for b in range(max(x, y).bit_length()):
+        indice |= ((x >> b) & 1) << (2 * b) | ((y >> b) & 1) << (2 * b + 1)
+    return indice
+
+
+class CompressedPathDatabase:
+    """ First-move tables of every cell of a level, compressed in runs over the targets.
+
+    Args:
+        level: A loaded level, containing walls, spaces, and waypoints.
+        workers: Number of processes used by the sweeps (os.cpu_count() by default; 1 runs them
+            in this process).
+    """
+
+    def __init__(self, level, workers=None):
+        # os destinos seguem a curva Z, que comprime melhor que a ordem das linhas
+        self.celulas = sorted(level['spaces'], key=_morton)
+        self.ids = {cell: i for i, cell in enumerate(self.celulas)}
+        workers = workers or os.cpu_count() or 1
+
+        if workers == 1:
+            _iniciar(level, self.ids)
+            self.tabelas = [_varrer(cell) for cell in self.celulas]
+            return
+
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            contexto = multiprocessing.get_context('forkserver')
+        else:
+            contexto = multiprocessing.get_context('spawn')
+        # o nível só com as células livres, que é o que as varreduras leem
+        nivel = {'spaces': level['spaces']}
+        with ProcessPoolExecutor(workers, contexto, initializer=_iniciar, initargs=(nivel, self.ids)) as pool:
+            lote = max(1, len(self.celulas) // (workers * 8))
+            self.tabelas = list(pool.map(_varrer, self.celulas, chunksize=lote))
+
+    def runs(self):
+        """ Returns the total number of runs stored, against len(celulas) ** 2 uncompressed entries. """
+        return sum(len(movimentos) for _, movimentos in self.tabelas)
+
+    def next_move(self, cell, goal):
+        """ Returns the cell after `cell` on a shortest path to goal, or None if there is none. """
+        origem = self.ids.get(cell)
+        destino = self.ids.get(goal)
+        if origem is None or destino is None or origem == destino:
+            return None
+
+        inicios, movimentos = self.tabelas[origem]
+        k = movimentos[bisect_right(inicios, destino) - 1]
+        if k == SEM_MOVIMENTO:
+            return None
+        dx, dy = MOVIMENTOS[k]
+        return (cell[0] + dx, cell[1] + dy)
+
+    def path(self, s, g):
+        """ Extracts the whole path from s to g by repeated next_move lookups, in the format of plan. """
+        if s not in self.ids or g not in self.ids:
+            return []
+        path = [s]
+        while path[-1] != g:
+            proximo = self.next_move(path[-1], g)
+            if proximo is None:
+                return []
+            path.append(proximo)
+        return path
+
+    def save(self, caminho):
+        with open(caminho, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(caminho):
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+
+
+def database(level, pasta=None, chave=None, workers=None):
+    """ Returns the path database of the level, building it on the first call.
+
+    The database is kept in the level itself, so the levels cached by search.load_level build it
+    only once. With pasta and chave (e.g. the map text) it is also stored on disk, which is how
+    a database built offline is reused.
+    """
+    cpd = level.get('cpd')
+    if cpd is not None:
+        return cpd
+
+    caminho = None
+    if pasta is not None and chave is not None:
+        caminho = os.path.join(pasta, hashlib.sha1(chave.encode()).hexdigest() + '.cpd')
+        if os.path.exists(caminho):
+            cpd = CompressedPathDatabase.load(caminho)
+
+    if cpd is None:
+        cpd = CompressedPathDatabase(level, workers)
+        if caminho is not None:
+            os.makedirs(pasta, exist_ok=True)
+            cpd.save(caminho)
+
+    level['cpd'] = cpd
+    return cpd
+
+
+def next_move(level, cell, goal):
+    """ Returns the next cell from cell toward goal, using (and building if needed) the level's database. """
+    return database(level).next_move(cell, goal)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Constrói offline a base de caminhos comprimida de um mapa.")
+    parser.add_argument("mapa", help="arquivo do mapa")
+    parser.add_argument("--pasta", default="cpd", help="pasta onde a base é gravada")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.mapa, "r") as f:
+        texto = f.read()
+
+    cpd = database(load_level(texto), args.pasta, texto, args.workers)
+    print(f"{len(cpd.celulas)} células, {cpd.runs()} runs (sem compressão: {len(cpd.celulas) ** 2})")
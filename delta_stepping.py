@@ -0,0 +1,306 @@
+import os
+import atexit
+import multiprocessing
+from array import array
+from bisect import bisect_left
+from itertools import chain
+from multiprocessing import shared_memory
+from time import perf_counter
+
+from search import G_ORDER, NAO_VISITADO, SEM_PAI, ParentMap, _MOVIMENTOS_DIST, dimensions, _reconstruir, _registrar
+
+# Delta-stepping: Dijkstra em baldes de largura delta, em que todos os nós de um balde são
+# relaxados de uma vez. A grade de custos, as distâncias e os códigos de direção dos pais ficam
+# num bloco de memória compartilhada reaproveitado entre as buscas, e os processos de um pool
+# que vive o processo inteiro. Em cada fase as colunas da grade são divididas entre os
+# workers: cada um relaxa as arestas que chegam nas suas colunas e escreve as distâncias e os
+# pais delas direto na memória compartilhada, então nenhum nó tem dois escritores e o processo
+# principal só recebe os índices dos nós melhorados, para colocá-los nos baldes. As arestas
+# leves (custo <= delta) são relaxadas até o balde esvaziar e as pesadas uma vez, quando o
+# balde fica pronto.
+
+PAREDE = -1.0
+INFINITO = float('inf')
+
+# Fases com menos nós do que isso são relaxadas no próprio processo principal
+LIMIAR_PARALELO = 1024
+
+# Bytes por célula no bloco compartilhado: custo, distância, fronteira, distância na
+# fronteira (8 bytes cada) e o código de direção do pai (1 byte)
+_BYTES_CELULA = 8 * 4 + 1
+
+# Estado do processo principal: o pool, o bloco compartilhado e o nível cujos custos estão nele
+_pool = None
+_workers_pool = 0
+_bloco = None
+_spaces_carregados = None
+
+# Estado de cada processo (workers e principal): as visões do bloco em uso
+_visoes = None
+_nome_visoes = None
+
+
+def _anexar(nome, celulas):
+    """ Returns the views (costs, distances, frontier, frontier distances, parent codes) of the
+    shared block, attaching to it only when it changed since the last call. """
+    global _visoes, _nome_visoes
+    if _nome_visoes != (nome, celulas):
+        if _visoes is not None:
+            for visao in _visoes[:-1]:
+                visao.release()
+            if _visoes[-1] is not _bloco:
+                _visoes[-1].close()
+        bloco = shared_memory.SharedMemory(name=nome) if _bloco is None or _bloco.name != nome else _bloco
+        buf = bloco.buf
+        passo = 8 * celulas
+        _visoes = (buf[:passo].cast('d'), buf[passo:2 * passo].cast('d'), buf[2 * passo:3 * passo].cast('q'),
+                   buf[3 * passo:4 * passo].cast('d'), buf[4 * passo:4 * passo + celulas], bloco)
+        _nome_visoes = (nome, celulas)
+    return _visoes
+
+
+def _relaxar(tarefa):
+    """ Relaxes the light or heavy edges from the frontier into the owned columns [lo, hi).
+
+    The frontier nodes and their distances at the start of the phase are read from the shared
+    block, in increasing node order, and only the cells of the owned columns are written. A
+    distance is replaced only when it gets smaller, so among relaxations with the same distance
+    the parent with the smallest index wins, as in a sequential pass.
+
+    Returns:
+        An array with the indices of the cells whose distance improved.
+    """
+    nome, celulas, largura, altura, tamanho, lo, hi, leves, delta = tarefa
+    custos, dist, fronteira, dist_fronteira, codigos, _ = _anexar(nome, celulas)
+    inicio = lo * altura
+    fim = hi * altura
+    melhorados = array('q')
+
+    # só as colunas vizinhas das próprias têm arestas que chegam nelas
+    primeiro = bisect_left(fronteira, inicio - altura, 0, tamanho)
+    ultimo = bisect_left(fronteira, fim + altura, primeiro, tamanho)
+    for j in range(primeiro, ultimo):
+        u = fronteira[j]
+        du = dist_fronteira[j]
+        x, y = divmod(u, altura)
+        cost1 = custos[u]
+        for dx, dy, d in _MOVIMENTOS_DIST:
+            vx, vy = x + dx, y + dy
+            if vx < lo or vy < 0 or vx >= hi or vy >= altura:
+                continue
+            v = vx * altura + vy
+            cost2 = custos[v]
+            if cost2 == PAREDE:
+                continue
+            # mesma expressão de cost_function, para as distâncias saírem idênticas às da ucs
+            w = d * ((cost1 + cost2) / 2.0)
+            if (w <= delta) != leves:
+                continue
+            nd = du + w
+            if nd < dist[v]:
+                dist[v] = nd
+                codigos[v] = (dy + 1) * 3 + (dx + 1)
+                melhorados.append(v)
+    return melhorados
+
+
+def _preparar(n, workers):
+    """ Returns the shared block with room for n cells and the pool of the given size, reusing
+    the ones of the previous searches when they are big enough. """
+    global _pool, _workers_pool, _bloco, _spaces_carregados
+    if _bloco is None or _bloco.size < n * _BYTES_CELULA:
+        # cresce em dobro, para uma sequência de mapas maiores não realocar a cada busca
+        celulas = max(n, 2 * _bloco_celulas(), 1)
+        if _bloco is not None:
+            _liberar_bloco()
+        _bloco = shared_memory.SharedMemory(create=True, size=celulas * _BYTES_CELULA)
+        _spaces_carregados = None
+
+    if workers > 1 and _workers_pool != workers:
+        _encerrar_pool()
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            contexto = multiprocessing.get_context('forkserver')
+        else:
+            contexto = multiprocessing.get_context('spawn')
+        _pool = contexto.Pool(workers)
+        _workers_pool = workers
+    return _bloco
+
+
+def _bloco_celulas():
+    return _bloco.size // _BYTES_CELULA if _bloco is not None else 0
+
+
+def _liberar_bloco():
+    global _bloco, _visoes, _nome_visoes, _spaces_carregados
+    if _visoes is not None:
+        for visao in _visoes[:-1]:
+            visao.release()
+        _visoes = _nome_visoes = None
+    _bloco.close()
+    _bloco.unlink()
+    _bloco = _spaces_carregados = None
+
+
+def _encerrar_pool():
+    global _pool, _workers_pool
+    if _pool is not None:
+        _pool.terminate()
+        _pool.join()
+    _pool = None
+    _workers_pool = 0
+
+
+@atexit.register
+def encerrar():
+    """ Stops the worker processes and frees the shared block; they are created again by the
+    next search. Called at exit. """
+    _encerrar_pool()
+    if _bloco is not None:
+        _liberar_bloco()
+
+
+def delta_stepping(level, s=None, g=None, delta=3.0, workers=None, stats=None):
+    """ Shortest paths with parallel delta-stepping over shared memory.
+
+    The distances are the same as those of ucs: the edge costs use the expression of
+    cost_function and every node keeps the smallest tentative distance found. Among relaxations
+    with the same distance, the parent is the one with the smallest node index, so the result
+    does not depend on the number of workers.
+
+    The worker processes and the shared block are kept between calls, and the costs are only
+    copied again when the level changes.
+
+    Args:
+        level: A loaded level, containing walls, spaces, and waypoints.
+        s: The source location (the level start by default).
+        g: The goal location (the level goal by default). The search stops once its bucket is
+            settled; with g=False it runs until every reachable cell is settled (one-to-all).
+        delta: Width of the buckets.
+        workers: Number of processes (os.cpu_count() by default). With 1 no process is started.
+        stats: An optional dictionary that receives the search counters.
+
+    Returns:
+        The path from the source to the goal, a search.ParentMap with the visited cells and their
+        parents, and the cost of the path.
+    """
+    global _spaces_carregados
+    s = level['start'] if s is None else s
+    g = level['goal'] if g is None else (g or None)
+    workers = workers or os.cpu_count() or 1
+
+    largura, altura = dimensions(level)
+    n = largura * altura
+    bloco = _preparar(n, workers)
+    celulas = _bloco_celulas()
+    custos, dist, _, _, codigos, _ = _anexar(bloco.name, celulas)
+
+    if _spaces_carregados is not level['spaces']:
+        grade = array('d', [PAREDE]) * n
+        for (x, y), custo in level['spaces'].items():
+            grade[x * altura + y] = custo
+        custos[:n] = grade
+        del grade
+        _spaces_carregados = level['spaces']
+    dist[:n] = array('d', [INFINITO]) * n
+    codigos[:n] = bytes([NAO_VISITADO]) * n
+
+    ordem = _buscar(bloco.name, celulas, largura, altura, s, g, delta, workers, stats)
+
+    t0 = perf_counter()
+    visited = ParentMap(largura, altura)
+    if visited.denso:
+        visited.codigos = bytearray(codigos[:n])
+    else:
+        visited.codigos.update((v, codigos[v]) for v in ordem)
+    visited.ordem = ordem
+    path = _reconstruir(visited, g) if g is not None else []
+    custo = dist[g[0] * altura + g[1]] if g is not None and g in visited else 0
+    if stats is not None:
+        stats['reconstruction'] = perf_counter() - t0
+
+    return path, visited, custo
+
+
+def _buscar(nome, celulas, largura, altura, s, g, delta, workers, stats):
+    """ Main loop of delta-stepping; returns the indices of the reached cells in reaching order. """
+    _, dist, fronteira, dist_fronteira, codigos, _ = _anexar(nome, celulas)
+    inicio = s[0] * altura + s[1]
+    objetivo = g[0] * altura + g[1] if g is not None else -1
+
+    dist[inicio] = 0.0
+    codigos[inicio] = SEM_PAI
+    ordem = array('l', [inicio])
+    baldes = {0: {inicio}}
+
+    expansoes = pops = fases = 0
+    pushes = pico = 1
+
+    def relaxar(nos, leves):
+        nonlocal fases, pushes
+        fases += 1
+        nos = sorted(nos)
+        tamanho = len(nos)
+        fronteira[:tamanho] = array('q', nos)
+        dist_fronteira[:tamanho] = array('d', [dist[u] for u in nos])
+
+        if _pool is None or workers == 1 or tamanho < LIMIAR_PARALELO:
+            partes = [_relaxar((nome, celulas, largura, altura, tamanho, 0, largura, leves, delta))]
+        else:
+            # colunas de corte nos quantis da fronteira, para cada worker relaxar uma parte igual
+            cortes = [0] + [nos[tamanho * k // workers] // altura for k in range(1, workers)] + [largura]
+            tarefas = [(nome, celulas, largura, altura, tamanho, lo, hi, leves, delta)
+                       for lo, hi in zip(cortes, cortes[1:]) if lo < hi]
+            partes = _pool.map(_relaxar, tarefas)
+
+        # em ordem de índice, para a ordem dos visitados não depender da divisão das colunas
+        melhorados = sorted(chain.from_iterable(partes))
+        for v in melhorados:
+            if v not in alcancados:
+                alcancados.add(v)
+                ordem.append(v)
+            baldes.setdefault(int(dist[v] / delta), set()).add(v)
+        pushes += len(melhorados)
+
+    alcancados = {inicio}
+    while baldes:
+        i = min(baldes)
+        # os nós que melhoraram continuam nos baldes antigos; só contam no balde da distância atual
+        atuais = {v for v in baldes[i] if int(dist[v] / delta) == i}
+        if not atuais:
+            del baldes[i]
+            continue
+
+        # o objetivo já tem distância final se é menor que qualquer balde pendente
+        if objetivo >= 0 and dist[objetivo] < i * delta:
+            break
+
+        prontos = set()
+        while atuais:
+            del baldes[i]
+            pops += len(atuais)
+            prontos |= atuais
+            relaxar(atuais, True)
+            pico = max(pico, sum(len(b) for b in baldes.values()))
+            atuais = {v for v in baldes.get(i, ()) if int(dist[v] / delta) == i}
+
+        expansoes += len(prontos)
+        relaxar(prontos, False)
+        baldes.pop(i, None)
+
+    if stats is not None:
+        _registrar(stats, expansoes, pushes, pops, pico, 0.0)
+        stats['phases'] = fases
+
+    return ordem
+
+
+# Políticas que este backend implementa
+POLITICAS = (G_ORDER,)
+
+
+def best_first_search(level, policy, heuristic=None, stats=None, s=None, g=None):
+    """ Entry point used by plan(..., backend='delta'); only the G_ORDER policy (ucs) is parallelized. """
+    if policy not in POLITICAS:
+        raise ValueError(f"O backend delta não implementa a política {policy!r}")
+    return delta_stepping(level, s, g, stats=stats)
@@ -0,0 +1,193 @@
+import random
+import argparse
+
+# Os mapas gerados usam o mesmo formato dos mapas em maps/: X para paredes, S e G para os
+# estados inicial e final e dígitos de 1 a 9 para o custo das células livres. As linhas são
+# produzidas uma a uma, então mapas grandes (até 10k x 10k) podem ser escritos direto no disco.
+
+CUSTOS = "123456789"
+
+def _posicionar(linha, j, inicio, objetivo):
+    """ Places S and G in the row j, if they belong to it. """
+    if inicio[1] == j:
+        linha = linha[:inicio[0]] + "S" + linha[inicio[0] + 1:]
+    if objetivo[1] == j:
+        linha = linha[:objetivo[0]] + "G" + linha[objetivo[0] + 1:]
+    return linha
+
+def _cantos(largura, altura):
+    """ Returns the default start and goal positions: near the top-left and bottom-right corners. """
+    return (min(1, largura - 1), min(1, altura - 1)), (max(largura - 2, 0), max(altura - 2, 0))
+
+def gerar_aberto(largura, altura, seed=0, custo_max=1):
+    """ Generates an open field without walls.
+
+    Args:
+        largura: Map width.
+        altura: Map height.
+        seed: Seed of the random generator.
+        custo_max: Largest cell cost; with 1 every cell costs 1, otherwise costs are uniform in [1, custo_max].
+
+    Returns:
+        A generator with the rows of the map.
+    """
+    rng = random.Random(seed)
+    inicio, objetivo = _cantos(largura, altura)
+
+    for j in range(altura):
+        if custo_max <= 1:
+            linha = "1" * largura
+        else:
+            linha = "".join(rng.choices(CUSTOS[:custo_max], k=largura))
+        yield _posicionar(linha, j, inicio, objetivo)
+
+def gerar_obstaculos(largura, altura, densidade=0.3, seed=0, custo_max=1):
+    """ Generates a field with random walls.
+
+    Args:
+        largura: Map width.
+        altura: Map height.
+        densidade: Probability of each cell being a wall.
+        seed: Seed of the random generator.
+        custo_max: Largest cost of the free cells.
+
+    Returns:
+        A generator with the rows of the map. S and G are always free, but they may be disconnected.
+    """
+    rng = random.Random(seed)
+    inicio, objetivo = _cantos(largura, altura)
+    simbolos = ["X"] + list(CUSTOS[:max(custo_max, 1)])
+    pesos = [densidade] + [(1 - densidade) / max(custo_max, 1)] * max(custo_max, 1)
+
+    for j in range(altura):
+        linha = "".join(rng.choices(simbolos, weights=pesos, k=largura))
+        yield _posicionar(linha, j, inicio, objetivo)
+
+def gerar_labirinto(largura, altura, seed=0, atalhos=0.0, custo_max=1):
+    """ Generates a labyrinth with the recursive backtracker, like mapa26_labirinto_complexo.
+
+    The passages are the cells with odd coordinates and the links carved between them. The
+    backtracking uses an explicit stack, so it works for sizes where recursion would overflow.
+
+    Args:
+        largura: Map width.
+        altura: Map height.
+        seed: Seed of the random generator.
+        atalhos: Fraction of the remaining inner walls removed afterwards, creating cycles.
+        custo_max: Largest cost of the passages.
+
+    Returns:
+        A generator with the rows of the map. S and G are in opposite corners of the labyrinth.
+    """
+    rng = random.Random(seed)
+
+    # 0 = parede, 1 = passagem
+    grade = bytearray(largura * altura)
+    colunas = (largura - 1) // 2
+    linhas = (altura - 1) // 2
+
+    if colunas > 0 and linhas > 0:
+        grade[largura + 1] = 1
+        pilha = [(0, 0)]
+        while pilha:
+            ci, cj = pilha[-1]
+            vizinhos = []
+            for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                ni, nj = ci + di, cj + dj
+                if 0 <= ni < colunas and 0 <= nj < linhas and not grade[(2 * nj + 1) * largura + 2 * ni + 1]:
+                    vizinhos.append((ni, nj))
+
+            if not vizinhos:
+                pilha.pop()
+                continue
+
+            ni, nj = rng.choice(vizinhos)
+            # abre a parede entre as duas células e a própria célula vizinha
+            grade[(cj + nj + 1) * largura + ci + ni + 1] = 1
+            grade[(2 * nj + 1) * largura + 2 * ni + 1] = 1
+            pilha.append((ni, nj))
+
+    if atalhos > 0:
+        for j in range(1, altura - 1):
+            for i in range(1, largura - 1):
+                if not grade[j * largura + i] and (i + j) % 2 == 1 and rng.random() < atalhos:
+                    grade[j * largura + i] = 1
+
+    inicio = (1, 1) if colunas > 0 and linhas > 0 else (0, 0)
+    objetivo = (2 * colunas - 1, 2 * linhas - 1) if colunas > 0 and linhas > 0 else (0, 0)
+
+    for j in range(altura):
+        linha = grade[j * largura:(j + 1) * largura]
+        if custo_max <= 1:
+            texto = linha.replace(b"\x00", b"X").replace(b"\x01", b"1").decode()
+        else:
+            texto = "".join(rng.choice(CUSTOS[:custo_max]) if c else "X" for c in linha)
+        yield _posicionar(texto, j, inicio, objetivo)
+
+def gerar_custo_enganoso(largura, altura, seed=0, ruido=0.0):
+    """ Generates a deceptive cost gradient, like mapa23_custo_engana.
+
+    S and G are on the middle row, at opposite sides. The cost grows from 1 at the top and bottom
+    borders to 9 on the middle row, so the straight line between S and G is the most expensive
+    route and the cheap one goes around, near the borders.
+
+    Args:
+        largura: Map width.
+        altura: Map height.
+        seed: Seed of the random generator.
+        ruido: Probability of a cell getting a random cost instead of the gradient.
+
+    Returns:
+        A generator with the rows of the map.
+    """
+    rng = random.Random(seed)
+    meio = altura // 2
+    inicio, objetivo = (0, meio), (largura - 1, meio)
+
+    for j in range(altura):
+        custo = 1 + round(8 * (1 - abs(j - meio) / max(meio, 1)))
+        custo = min(max(custo, 1), 9)
+        linha = str(custo) * largura
+        if ruido > 0:
+            linha = "".join(rng.choice(CUSTOS) if rng.random() < ruido else c for c in linha)
+        yield _posicionar(linha, j, inicio, objetivo)
+
+GERADORES = {
+    "aberto": gerar_aberto,
+    "obstaculos": gerar_obstaculos,
+    "labirinto": gerar_labirinto,
+    "custo_enganoso": gerar_custo_enganoso,
+}
+
+def gerar_mapa(tipo, largura, altura, seed=0, **opcoes):
+    """ Returns the whole map as a string, in the format read by parse_level. """
+    return "".join(linha + "\n" for linha in GERADORES[tipo](largura, altura, seed=seed, **opcoes))
+
+def salvar_mapa(caminho, linhas):
+    """ Writes the rows to a file one at a time, without building the whole map in memory. """
+    with open(caminho, "w") as f:
+        for linha in linhas:
+            f.write(linha)
+            f.write("\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera mapas sintéticos no formato da pasta maps/.")
+    parser.add_argument("tipo", choices=sorted(GERADORES))
+    parser.add_argument("largura", type=int)
+    parser.add_argument("altura", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--densidade", type=float, default=None, help="densidade de paredes (obstaculos)")
+    parser.add_argument("--atalhos", type=float, default=None, help="fração de paredes removidas (labirinto)")
+    parser.add_argument("--custo-max", type=int, default=None, help="maior custo das células livres")
+    parser.add_argument("--saida", required=True, help="arquivo de saída")
+    args = parser.parse_args()
+
+    opcoes = {}
+    if args.densidade is not None:
+        opcoes["densidade"] = args.densidade
+    if args.atalhos is not None:
+        opcoes["atalhos"] = args.atalhos
+    if args.custo_max is not None:
+        opcoes["custo_max"] = args.custo_max
+
+    salvar_mapa(args.saida, GERADORES[args.tipo](args.largura, args.altura, seed=args.seed, **opcoes))
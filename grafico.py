@@ -1,76 +1,11 @@
 import os
-from tabulate import tabulate
-from search import plan  
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
+from benchmark import PASTA_MAPAS, algoritmos, carregar_mapas, varrer_tamanhos, METRICAS_TEMPO
+from results_store import ResultsStore, ARQUIVO_PADRAO
 
-PASTA_MAPAS = "maps"
-
-algoritmos = [
-    ("BFS", "bfs", None),
-    ("DFS", "dfs", None),
-    ("UCS", "ucs", None),
-    ("Greedy Euclidiana", "greedy", "euclidian"),
-    ("Greedy Manhattan", "greedy", "manhattan"),
-    ("A* Euclidiana", "astar", "euclidian"),
-    ("A* Manhattan", "astar", "manhattan")
-]
-
-def carregar_mapas(pasta):
-    mapas = {}
-    for arquivo in os.listdir(pasta):
-        if arquivo.endswith(".txt"):
-            caminho = os.path.join(pasta, arquivo)
-            with open(caminho, "r") as f:
-                mapas[arquivo] = f.read()
-    return mapas
-
-def comparar_desempenho(mapas, algoritmos):
-    resultados_por_mapa = {}
-    
-    for nome_mapa, mapa in mapas.items():
-        resultados = {}
-
-        # roda todos os algoritmos no mapa
-        for nome_algo, algo, heur in algoritmos:
-            path, custo, visited = plan(mapa, algorithm=algo, heuristic=heur)
-            tamanho = len(path) if path else float("inf")
-            nos_visitados = len(visited)
-
-            resultados[nome_algo] = {
-                "Visitados": nos_visitados,
-                "Tamanho": tamanho,
-                "Custo": round(custo, 2) if path else float("inf")
-            }
-
-        resultados_por_mapa[nome_mapa] = resultados
-
-        # tabela colorida
-        min_visitados = min(r["Visitados"] for r in resultados.values())
-        min_tamanho   = min(r["Tamanho"] for r in resultados.values())
-        min_custo     = min(r["Custo"] for r in resultados.values())
-
-        def colorir(valor, minimo):
-            return f"\033[92m{valor}\033[0m" if valor == minimo else str(valor)
-
-        headers = [""] + [nome_algo for nome_algo, _, _ in algoritmos]
-        tabela = [
-            ["Visitados"] + [colorir(resultados[nome_algo]["Visitados"], min_visitados) for nome_algo, _, _ in algoritmos],
-            ["Tamanho"]   + [colorir(resultados[nome_algo]["Tamanho"],   min_tamanho)   for nome_algo, _, _ in algoritmos],
-            ["Custo"]     + [colorir(resultados[nome_algo]["Custo"],     min_custo)     for nome_algo, _, _ in algoritmos],
-        ]
-
-        print("\n" + "="*60)
-        print(f" {nome_mapa} ".center(60, "="))
-        print("="*60)
-        print(tabulate(tabela, headers=headers, tablefmt="grid"))
-
-    # plota heatmaps para todas as métricas
-    plotar_heatmaps(resultados_por_mapa, algoritmos)
-
-def plotar_heatmaps(resultados_por_mapa, algoritmos):
-    metricas = ["Visitados", "Custo", "Tamanho"]
+def plotar_heatmaps(resultados_por_mapa, algoritmos, metricas=("Visitados", "Custo", "Tamanho")):
     mapas = list(resultados_por_mapa.keys())
     algoritmos_nomes = [nome for nome, _, _ in algoritmos]
 
@@ -94,15 +29,46 @@ def plotar_heatmaps(resultados_por_mapa, algoritmos):
         plt.tight_layout()
 
         # salva o gráfico
-        plt.savefig(f"imagens/heatmap_{metrica}.png")
+        nome_arquivo = metrica.split(" (")[0].replace("/", "_por_")
+        plt.savefig(f"imagens/heatmap_{nome_arquivo}.png")
+        plt.close()
+
+def plotar_escalonamento(resultados_por_tamanho, algoritmos, metricas=("Tempo (ms)", "Memória (KiB)", "Visitados"), tipo="aberto"):
+    tamanhos = sorted(resultados_por_tamanho.keys())
+    celulas = [t * t for t in tamanhos]
+
+    if not os.path.exists("imagens"):
+        os.makedirs("imagens")
+
+    for metrica in metricas:
+        # uma curva por algoritmo, em escala log-log
+        plt.figure(figsize=(10, 6))
+        for nome_algo, _, _ in algoritmos:
+            valores = [resultados_por_tamanho[t][nome_algo][metrica] for t in tamanhos]
+            plt.plot(celulas, valores, marker="o", label=nome_algo)
+        plt.xscale("log")
+        plt.yscale("log")
+        plt.title(f"Escalonamento - {metrica} ({tipo})")
+        plt.xlabel("Células do mapa")
+        plt.ylabel(metrica)
+        plt.legend()
+        plt.tight_layout()
+
+        nome_arquivo = metrica.split(" (")[0].replace("/", "_por_")
+        plt.savefig(f"imagens/escalonamento_{tipo}_{nome_arquivo}.png")
         plt.close()
 
 if __name__ == "__main__":
     mapas = carregar_mapas(PASTA_MAPAS)
 
     mapa_especifico = None  # mapanumero ou None, exemplo: "mapa10"
+    tamanhos = None  # lados dos mapas gerados para a curva de escalonamento, exemplo: [50, 100, 200, 400]
+    atualizar = True  # False só desenha o que já está no banco, sem rodar nenhuma busca
 
-    if mapa_especifico:
+    if tamanhos:
+        plotar_escalonamento(varrer_tamanhos(tamanhos, algoritmos, "aberto"), algoritmos, tipo="aberto")
+        plotar_escalonamento(varrer_tamanhos(tamanhos, algoritmos, "labirinto"), algoritmos, tipo="labirinto")
+    elif mapa_especifico:
         mapa_encontrado = None
         for arquivo in mapas:
             if arquivo.startswith(mapa_especifico):
@@ -110,8 +76,16 @@ if __name__ == "__main__":
                 break
 
         if mapa_encontrado:
-            comparar_desempenho({mapa_encontrado: mapas[mapa_encontrado]}, algoritmos)
+            mapas = {mapa_encontrado: mapas[mapa_encontrado]}
         else:
             print(f"Nenhum mapa começando com '{mapa_especifico}' foi encontrado na pasta {PASTA_MAPAS}.")
-    else:
-        comparar_desempenho(mapas, algoritmos)
+            mapas = {}
+
+    if mapas and not tamanhos:
+        # só as combinações que faltam no banco (ou medidas com outro código) rodam de novo
+        with ResultsStore(ARQUIVO_PADRAO) as banco:
+            if atualizar:
+                print(f"{banco.atualizar(mapas, algoritmos)} combinações medidas")
+            resultados = banco.resultados(mapas, algoritmos)
+        if resultados:
+            plotar_heatmaps(resultados, algoritmos, ["Visitados", "Custo", "Tamanho"] + METRICAS_TEMPO)
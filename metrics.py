@@ -0,0 +1,118 @@
+import threading
+
+from search import POLICIES, HEURISTICS
+
+# Limites (em segundos) dos buckets do histograma de latência
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTADORES = ('expansions', 'pushes', 'pops')
+
+# Rótulo dos algoritmos e heurísticas desconhecidos: os nomes vêm da query string, e cada valor
+# distinto de um rótulo cria uma série nova no Prometheus
+OUTRO = 'other'
+
+
+def _nome_conhecido(nome, conhecidos):
+    if not nome:
+        return ''
+    return nome if nome in conhecidos else OUTRO
+
+
+def _escapar(valor):
+    """ Escapes a label value for the Prometheus text format. """
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(alg, heur, **extras):
+    pares = dict(algorithm=alg, heuristic=heur, **extras)
+    return ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares.items())
+
+
+class Histogram:
+    """ Cumulative histogram in the Prometheus format. """
+
+    def __init__(self, buckets=BUCKETS_LATENCIA):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observe(self, valor):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[i] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class SearchMetrics:
+    """ Aggregates the statistics returned by plan(..., stats=True), per algorithm and heuristic. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencias = {}
+        self._fases = {}
+        self._contadores = {}
+        self._pico_fronteira = {}
+        self._pico_memoria = {}
+
+    def observe(self, algorithm, heuristic, stats):
+        """ Records the statistics of one search.
+
+        Names missing from search.POLICIES and search.HEURISTICS are recorded as "other", so
+        the number of label values stays bounded whatever the clients send.
+        """
+        chave = (_nome_conhecido(algorithm, POLICIES), _nome_conhecido(heuristic, HEURISTICS))
+
+        with self._lock:
+            self._latencias.setdefault(chave, Histogram()).observe(stats['timings']['total'])
+
+            for fase, segundos in stats['timings'].items():
+                if fase != 'total':
+                    self._fases[chave + (fase,)] = self._fases.get(chave + (fase,), 0.0) + segundos
+
+            for contador in CONTADORES:
+                self._contadores[chave + (contador,)] = self._contadores.get(chave + (contador,), 0) + stats[contador]
+
+            self._pico_fronteira[chave] = max(self._pico_fronteira.get(chave, 0), stats['peak_frontier'])
+            if 'peak_memory' in stats:
+                self._pico_memoria[chave] = max(self._pico_memoria.get(chave, 0), stats['peak_memory'])
+
+    def export(self):
+        """ Returns the metrics in the Prometheus text exposition format. """
+        linhas = []
+
+        with self._lock:
+            linhas.append('# HELP search_latency_seconds Total time spent by plan.')
+            linhas.append('# TYPE search_latency_seconds histogram')
+            for (alg, heur), hist in sorted(self._latencias.items()):
+                rotulos = _rotulos(alg, heur)
+                for limite, contagem in zip(hist.buckets, hist.contagens):
+                    linhas.append(f'search_latency_seconds_bucket{{{rotulos},le="{limite}"}} {contagem}')
+                linhas.append(f'search_latency_seconds_bucket{{{rotulos},le="+Inf"}} {hist.total}')
+                linhas.append(f'search_latency_seconds_sum{{{rotulos}}} {hist.soma}')
+                linhas.append(f'search_latency_seconds_count{{{rotulos}}} {hist.total}')
+
+            linhas.append('# HELP search_phase_seconds_total Time spent in each phase of plan.')
+            linhas.append('# TYPE search_phase_seconds_total counter')
+            for (alg, heur, fase), segundos in sorted(self._fases.items()):
+                linhas.append(f'search_phase_seconds_total{{{_rotulos(alg, heur, phase=fase)}}} {segundos}')
+
+            for contador in CONTADORES:
+                linhas.append(f'# HELP search_{contador}_total Number of {contador} done by the searches.')
+                linhas.append(f'# TYPE search_{contador}_total counter')
+                for (alg, heur, nome), valor in sorted(self._contadores.items()):
+                    if nome == contador:
+                        linhas.append(f'search_{contador}_total{{{_rotulos(alg, heur)}}} {valor}')
+
+            linhas.append('# HELP search_peak_frontier Largest frontier seen in a single search.')
+            linhas.append('# TYPE search_peak_frontier gauge')
+            for (alg, heur), valor in sorted(self._pico_fronteira.items()):
+                linhas.append(f'search_peak_frontier{{{_rotulos(alg, heur)}}} {valor}')
+
+            linhas.append('# HELP search_peak_memory_bytes Largest memory peak seen in a single search.')
+            linhas.append('# TYPE search_peak_memory_bytes gauge')
+            for (alg, heur), valor in sorted(self._pico_memoria.items()):
+                linhas.append(f'search_peak_memory_bytes{{{_rotulos(alg, heur)}}} {valor}')
+
+        return '\n'.join(linhas) + '\n'
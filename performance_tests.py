@@ -1,48 +1,17 @@
-import os
 from tabulate import tabulate
-from search import plan  
+from benchmark import PASTA_MAPAS, DESEMPATES, algoritmos, carregar_mapas, coletar_resultados, comparar_desempates
 
-PASTA_MAPAS = "maps"
-
-algoritmos = [
-    ("BFS", "bfs", None),
-    ("DFS", "dfs", None),
-    ("UCS", "ucs", None),
-    ("Greedy Euclidiana", "greedy", "euclidian"),
-    ("Greedy Manhattan", "greedy", "manhattan"),
-    ("A* Euclidiana", "astar", "euclidian"),
-    ("A* Manhattan", "astar", "manhattan")
-]
-
-def carregar_mapas(pasta):
-    mapas = {}
-    for arquivo in os.listdir(pasta):
-        if arquivo.endswith(".txt"):
-            caminho = os.path.join(pasta, arquivo)
-            with open(caminho, "r") as f:
-                mapas[arquivo] = f.read()
-    return mapas
-
-def comparar_desempenho(mapas, algoritmos):
-    for nome_mapa, mapa in mapas.items():
-        resultados = {}
-
-        # roda todos os algoritmos no mapa
-        for nome_algo, algo, heur in algoritmos:
-            path, custo, visited = plan(mapa, algorithm=algo, heuristic=heur)
-            tamanho = len(path) if path else float("inf")
-            nos_visitados = len(visited)
-
-            resultados[nome_algo] = {
-                "Visitados": nos_visitados,
-                "Tamanho": tamanho,
-                "Custo": round(custo, 2) if path else float("inf")
-            }
+def comparar_desempenho(mapas, algoritmos, repeticoes=5, aquecimento=1):
+    # roda todos os algoritmos em todos os mapas
+    resultados_por_mapa = coletar_resultados(mapas, algoritmos, repeticoes, aquecimento)
 
+    for nome_mapa, resultados in resultados_por_mapa.items():
         # encontra mínimos por linha
         min_visitados = min(r["Visitados"] for r in resultados.values())
         min_tamanho   = min(r["Tamanho"] for r in resultados.values())
         min_custo     = min(r["Custo"] for r in resultados.values())
+        min_tempo     = min(r["Tempo (ms)"] for r in resultados.values())
+        min_memoria   = min(r["Memória (KiB)"] for r in resultados.values())
 
         def colorir(valor, minimo):
             return f"\033[92m{valor}\033[0m" if valor == minimo else str(valor)
@@ -53,6 +22,10 @@ def comparar_desempenho(mapas, algoritmos):
             ["Visitados"] + [colorir(resultados[nome_algo]["Visitados"], min_visitados) for nome_algo, _, _ in algoritmos],
             ["Tamanho"]   + [colorir(resultados[nome_algo]["Tamanho"],   min_tamanho)   for nome_algo, _, _ in algoritmos],
             ["Custo"]     + [colorir(resultados[nome_algo]["Custo"],     min_custo)     for nome_algo, _, _ in algoritmos],
+            ["Tempo (ms)"] + [colorir(resultados[nome_algo]["Tempo (ms)"], min_tempo)  for nome_algo, _, _ in algoritmos],
+            ["P95 (ms)"]  + [str(resultados[nome_algo]["P95 (ms)"]) for nome_algo, _, _ in algoritmos],
+            ["Memória (KiB)"] + [colorir(resultados[nome_algo]["Memória (KiB)"], min_memoria) for nome_algo, _, _ in algoritmos],
+            ["Expansões/s"] + [str(resultados[nome_algo]["Expansões/s"]) for nome_algo, _, _ in algoritmos],
         ]
 
         print("\n" + "="*60)
@@ -80,10 +53,27 @@ def comparar_desempenho(mapas, algoritmos):
         print(f" - Menor custo: {', '.join(melhores_custo)}")
         print(f" - Melhor geral: {', '.join(melhores_geral)}\n")
 
+    return resultados_por_mapa
+
+def tabela_desempates(mapas, algoritmos):
+    # expansões dos algoritmos informados em cada política de desempate; o custo não muda no A*
+    for nome_mapa, resultados in comparar_desempates(mapas, algoritmos).items():
+        tabela = []
+        for nome_algo, por_desempate in resultados.items():
+            minimo = min(expansoes for expansoes, _ in por_desempate.values())
+            tabela.append([nome_algo] + [
+                f"\033[92m{expansoes}\033[0m" if expansoes == minimo else str(expansoes)
+                for expansoes, _ in por_desempate.values()
+            ])
+
+        print(f" {nome_mapa} - expansões por desempate ".center(60, "="))
+        print(tabulate(tabela, headers=[""] + DESEMPATES, tablefmt="grid") + "\n")
+
 if __name__ == "__main__":
     mapas = carregar_mapas(PASTA_MAPAS)
 
     mapa_especifico = None  # mapanumero ou None, exemplo: "mapa10"
+    desempates = False      # True também mostra as expansões por política de desempate
 
     if mapa_especifico:
         # Procura o arquivo que comece com o nome informado
@@ -95,7 +85,11 @@ if __name__ == "__main__":
 
         if mapa_encontrado:
             comparar_desempenho({mapa_encontrado: mapas[mapa_encontrado]}, algoritmos)
+            if desempates:
+                tabela_desempates({mapa_encontrado: mapas[mapa_encontrado]}, algoritmos)
         else:
             print(f"Nenhum mapa começando com '{mapa_especifico}' foi encontrado na pasta {PASTA_MAPAS}.")
     else:
-        comparar_desempenho(mapas, algoritmos)
\ No newline at end of file
+        comparar_desempenho(mapas, algoritmos)
+        if desempates:
+            tabela_desempates(mapas, algoritmos)
\ No newline at end of file
@@ -0,0 +1,161 @@
+import os
+import io
+import cProfile
+import pstats
+import threading
+
+from search import plan
+
+
+class ProfileRegistry:
+    """ Aggregates the cProfile data of the profiled searches, per algorithm and heuristic. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def add(self, algorithm, heuristic, profiler):
+        chave = (algorithm or '', heuristic or '')
+        with self._lock:
+            if chave in self._stats:
+                self._stats[chave].add(profiler)
+            else:
+                self._stats[chave] = pstats.Stats(profiler)
+
+    def keys(self):
+        with self._lock:
+            return sorted(self._stats)
+
+    def get(self, algorithm, heuristic=None):
+        with self._lock:
+            return self._stats.get((algorithm or '', heuristic or ''))
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+# Registro usado por plan(..., profile=True)
+REGISTRY = ProfileRegistry()
+
+
+class CollectedProfile:
+    """ The cProfile data of one search, which can be pickled to another process.
+
+    pstats.Stats and ProfileRegistry.add accept it like a cProfile.Profile.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def profiled_plan(map, algorithm='bfs', heuristic=None, **kwargs):
+    """ Runs plan under cProfile and returns its result and a CollectedProfile.
+
+    Used by the worker processes of worker_pool.PlanPool, which send the profile back to the
+    registry of the server process.
+    """
+    profiler = cProfile.Profile()
+    resultado = profiler.runcall(plan, map, algorithm, heuristic, **kwargs)
+    profiler.create_stats()
+    return resultado, CollectedProfile(profiler.stats)
+
+
+def profile_plan(map, algorithm='bfs', heuristic=None, registry=REGISTRY, **kwargs):
+    """ Runs plan under cProfile and adds the profile to the registry.
+
+    Args:
+        map: A string containing the level.
+        algorithm: The search algorithm.
+        heuristic: The heuristic used by the informed algorithms.
+        registry: The ProfileRegistry that aggregates the profiles.
+        **kwargs: Other arguments passed to plan.
+
+    Returns:
+        The result of plan.
+    """
+    resultado, perfil = profiled_plan(map, algorithm, heuristic, **kwargs)
+    registry.add(algorithm, heuristic, perfil)
+    return resultado
+
+
+def _nome(funcao):
+    arquivo, linha, nome = funcao
+    if arquivo == '~':
+        return nome
+    return f"{nome} ({os.path.basename(arquivo)}:{linha})"
+
+
+def collapsed_stacks(stats):
+    """ Converts a pstats.Stats into collapsed stacks ("a;b;c <microseconds>"), the input of flamegraph.pl and speedscope.
+
+    cProfile only keeps caller -> callee edges, not whole stacks, so the stacks are rebuilt from
+    the roots of the call graph and the self time of each function is split among its callers in
+    proportion to the time each edge accounts for.
+
+    Returns:
+        A list of lines.
+    """
+    dados = stats.stats
+    filhos = {}
+    for funcao, (_, _, _, _, chamadores) in dados.items():
+        for chamador, (_, _, _, tempo_aresta) in chamadores.items():
+            filhos.setdefault(chamador, []).append((funcao, tempo_aresta))
+
+    raizes = [funcao for funcao, (_, _, _, _, chamadores) in dados.items() if not chamadores]
+    acumulado = {}
+
+    def visitar(funcao, pilha, fracao):
+        _, _, tempo_proprio, tempo_total, _ = dados[funcao]
+        pilha = pilha + (_nome(funcao),)
+
+        micros = tempo_proprio * fracao * 1e6
+        if micros >= 1:
+            chave = ';'.join(pilha)
+            acumulado[chave] = acumulado.get(chave, 0) + micros
+
+        for filho, tempo_aresta in filhos.get(funcao, []):
+            tempo_filho = dados[filho][3]
+            # recursão: a função já está na pilha, o tempo fica com a primeira ocorrência
+            if _nome(filho) in pilha or tempo_filho <= 0:
+                continue
+            visitar(filho, pilha, fracao * min(tempo_aresta / tempo_filho, 1.0))
+
+    for raiz in raizes:
+        visitar(raiz, (), 1.0)
+
+    return [f"{pilha} {int(micros)}" for pilha, micros in sorted(acumulado.items())]
+
+
+def export(registry=REGISTRY, pasta='perfis'):
+    """ Writes a .pstats file and a collapsed-stack .folded file for each algorithm in the registry.
+
+    Returns:
+        The list of written files.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    arquivos = []
+
+    for algorithm, heuristic in registry.keys():
+        stats = registry.get(algorithm, heuristic)
+        base = os.path.join(pasta, '_'.join(p for p in (algorithm, heuristic) if p) or 'plan')
+
+        stats.dump_stats(base + '.pstats')
+        with open(base + '.folded', 'w') as f:
+            f.write('\n'.join(collapsed_stacks(stats)) + '\n')
+
+        arquivos += [base + '.pstats', base + '.folded']
+
+    return arquivos
+
+
+def summary(stats, limite=20):
+    """ Returns the pstats report of the functions with the largest cumulative time. """
+    saida = io.StringIO()
+    relatorio = pstats.Stats(stream=saida)
+    relatorio.add(stats)
+    relatorio.sort_stats('cumulative').print_stats(limite)
+    return saida.getvalue()
@@ -0,0 +1,122 @@
+from collections import deque
+from math import sqrt
+
+from search import MOVIMENTOS
+
+# Poda de becos sem saída e "pântanos" antes da busca. Uma célula pode ser removida quando, para
+# cada par de vizinhos seus, existe outra ligação entre os dois com custo menor ou igual ao do
+# caminho pela célula: a aresta direta ou um desvio por um terceiro vizinho comum. Assim nenhuma
+# distância entre as células que ficam muda, nem em custo nem em número de passos (o desvio
+# nunca tem mais de dois passos). Um beco sem saída tem um vizinho só e sai primeiro; ao remover
+# uma célula seus vizinhos são testados de novo, então os corredores sem saída somem inteiros.
+
+
+def _custo(spaces, a, b):
+    # mesma expressão de cost_function
+    dist = sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2)
+    return dist * ((spaces[a] + spaces[b]) / 2.0)
+
+
+def _vizinhos(vivas, cell):
+    x, y = cell
+    return [v for v in ((x + dx, y + dy) for dx, dy in MOVIMENTOS) if v in vivas]
+
+
+def _adjacentes(a, b):
+    return a != b and abs(a[0] - b[0]) <= 1 and abs(a[1] - b[1]) <= 1
+
+
+def _removivel(spaces, vivas, cell):
+    """ True if every pair of neighbors of cell has a link as cheap as the path through it. """
+    vizinhos = _vizinhos(vivas, cell)
+    for i, u in enumerate(vizinhos):
+        for w in vizinhos[i + 1:]:
+            via = _custo(spaces, u, cell) + _custo(spaces, cell, w)
+            if _adjacentes(u, w) and _custo(spaces, u, w) <= via:
+                continue
+            # desvio de dois passos por uma célula vizinha dos dois
+            if not any(x != cell and x in vivas and _adjacentes(x, w)
+                       and _custo(spaces, u, x) + _custo(spaces, x, w) <= via
+                       for x in _vizinhos(vivas, u)):
+                return False
+    return True
+
+
+class Pruning:
+    """ The cells of a level that no shortest path between the other cells needs.
+
+    The pruned cells are grouped in regions (8-connected, like transition_model). A search that
+    starts or ends inside a region gets that region back, which keeps the pruning exact: every
+    cell pruned next to a restored one belongs to the same region.
+
+    Args:
+        level: A loaded level, containing walls, spaces, and waypoints.
+    """
+
+    def __init__(self, level):
+        spaces = level['spaces']
+        vivas = set(spaces)
+        pendentes = deque(spaces)
+        na_fila = set(spaces)
+
+        while pendentes:
+            cell = pendentes.popleft()
+            na_fila.discard(cell)
+            if cell not in vivas or not _removivel(spaces, vivas, cell):
+                continue
+            vivas.discard(cell)
+            for vizinho in _vizinhos(vivas, cell):
+                if vizinho not in na_fila:
+                    na_fila.add(vizinho)
+                    pendentes.append(vizinho)
+
+        self.podadas = set(spaces) - vivas
+        self.spaces = {cell: custo for cell, custo in spaces.items() if cell in vivas}
+
+        # regiões das células podadas
+        self.regioes = {}
+        self.celulas_regiao = []
+        for cell in self.podadas:
+            if cell in self.regioes:
+                continue
+            regiao = len(self.celulas_regiao)
+            celulas = [cell]
+            self.regioes[cell] = regiao
+            fila = deque([cell])
+            while fila:
+                atual = fila.popleft()
+                for vizinho in _vizinhos(self.podadas, atual):
+                    if vizinho not in self.regioes:
+                        self.regioes[vizinho] = regiao
+                        celulas.append(vizinho)
+                        fila.append(vizinho)
+            self.celulas_regiao.append(celulas)
+
+    def level_for(self, level, s, g):
+        """ Returns a copy of the level without the pruned cells, except the regions of s and g,
+        and the number of cells left out. """
+        restauradas = {self.regioes[c] for c in (s, g) if c in self.regioes}
+        spaces = self.spaces
+        if restauradas:
+            spaces = dict(spaces)
+            for regiao in restauradas:
+                for cell in self.celulas_regiao[regiao]:
+                    spaces[cell] = level['spaces'][cell]
+
+        podado = dict(level)
+        podado['spaces'] = spaces
+        return podado, len(level['spaces']) - len(spaces)
+
+
+def pruned_level(level, s=None, g=None):
+    """ Returns the level without the pruned cells, and how many were pruned.
+
+    The Pruning is computed on the first call and kept in the level, so the levels cached by
+    search.load_level are only preprocessed once.
+    """
+    poda = level.get('pruning')
+    if poda is None:
+        poda = level['pruning'] = Pruning(level)
+    s = level['start'] if s is None else s
+    g = level['goal'] if g is None else g
+    return poda.level_for(level, s, g)
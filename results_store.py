@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+from benchmark import medir
+
+# Resultados do benchmark guardados em SQLite, para gerar os gráficos sem rodar as buscas de
+# novo. Cada resultado é identificado pelo hash do conteúdo do mapa, pelo algoritmo, pela
+# heurística e pela versão do código (o hash dos arquivos que mudam os resultados), então só
+# as combinações que faltam ou que foram medidas com outro código são recalculadas.
+
+ARQUIVO_PADRAO = "resultados.sqlite"
+
+# Arquivos cujo conteúdo define a versão do código
+ARQUIVOS_VERSAO = ("search.py", "bucket_queue.py", "components.py", "benchmark.py")
+
+_PASTA = os.path.dirname(os.path.abspath(__file__))
+
+
+def versao_codigo(arquivos=ARQUIVOS_VERSAO):
+    """ Returns a short hash of the source files that determine the benchmark results. """
+    h = hashlib.sha1()
+    for arquivo in arquivos:
+        with open(os.path.join(_PASTA, arquivo), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+def hash_mapa(mapa):
+    return hashlib.sha1(mapa.encode()).hexdigest()
+
+
+class ResultsStore:
+    """ SQLite store of benchmark metrics.
+
+    Args:
+        caminho: The database file; it is created on first use.
+        versao: The code version of the results read and written (versao_codigo() by default).
+    """
+
+    def __init__(self, caminho=ARQUIVO_PADRAO, versao=None):
+        self.versao = versao or versao_codigo()
+        self._conexao = sqlite3.connect(caminho)
+        # a heurística dos algoritmos não informados é '' (NULL não é único em chave primária)
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                mapa_hash TEXT NOT NULL,
+                algoritmo TEXT NOT NULL,
+                heuristica TEXT NOT NULL,
+                versao TEXT NOT NULL,
+                mapa TEXT NOT NULL,
+                metricas TEXT NOT NULL,
+                medido_em REAL NOT NULL,
+                PRIMARY KEY (mapa_hash, algoritmo, heuristica, versao)
+            )""")
+        self._conexao.commit()
+
+    def close(self):
+        self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def obter(self, mapa, algo, heur):
+        """ Returns the stored metrics of the map (its content) for the current version, or None. """
+        linha = self._conexao.execute(
+            "SELECT metricas FROM resultados WHERE mapa_hash = ? AND algoritmo = ? AND heuristica = ? AND versao = ?",
+            (hash_mapa(mapa), algo, heur or "", self.versao)).fetchone()
+        return None if linha is None else json.loads(linha[0])
+
+    def gravar(self, nome_mapa, mapa, algo, heur, metricas):
+        self._conexao.execute(
+            "INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (hash_mapa(mapa), algo, heur or "", self.versao, nome_mapa, json.dumps(metricas, ensure_ascii=False),
+             time.time()))
+        self._conexao.commit()
+
+    def atualizar(self, mapas, algoritmos, repeticoes=5, aquecimento=1):
+        """ Measures the combinations missing for the current version and stores them.
+
+        Args:
+            mapas: A dictionary {map name: map string}.
+            algoritmos: The (name, algorithm, heuristic) list of benchmark.
+
+        Returns:
+            The number of combinations measured.
+        """
+        medidas = 0
+        for nome_mapa, mapa in mapas.items():
+            for _, algo, heur in algoritmos:
+                if self.obter(mapa, algo, heur) is None:
+                    self.gravar(nome_mapa, mapa, algo, heur, medir(mapa, algo, heur, repeticoes, aquecimento))
+                    medidas += 1
+        return medidas
+
+    def resultados(self, mapas, algoritmos):
+        """ Reads the stored results in the format of benchmark.coletar_resultados, without running
+        any search. Maps with a missing combination are left out.
+
+        Returns:
+            A dictionary {map name: {algorithm name: metrics}}.
+        """
+        resultados_por_mapa = {}
+        for nome_mapa, mapa in mapas.items():
+            resultados = {nome_algo: self.obter(mapa, algo, heur) for nome_algo, algo, heur in algoritmos}
+            if all(r is not None for r in resultados.values()):
+                resultados_por_mapa[nome_mapa] = resultados
+        return resultados_por_mapa
+
+    def remover_antigos(self):
+        """ Deletes the results of the other code versions and returns how many were deleted. """
+        cursor = self._conexao.execute("DELETE FROM resultados WHERE versao != ?", (self.versao,))
+        self._conexao.commit()
+        return cursor.rowcount
@@ -1,53 +1,186 @@
-import heapq
-from math import sqrt
-from collections import deque
+from heapq import heappush, heappop
+import tracemalloc
+import warnings
+from time import perf_counter
+from math import sqrt, inf
+from array import array
+import threading
+from itertools import count
+from functools import partial
+from collections import deque, OrderedDict
+from collections.abc import Mapping
+from bucket_queue import BucketQueue
+from components import ComponentIndex
 
 WALL = 'X'
 START_STATE = 'S'
 GOAL_STATE  = 'G'
 
-def plan(map, algorithm='bfs', heuristic=None):
+# Movimentos possíveis: horizontal, vertical e diagonal
+MOVIMENTOS = [
+    (-1, -1), (0, -1), (1, -1),
+    (-1,  0),         (1,  0),
+    (-1,  1), (0,  1), (1,  1)
+]
+_MOVIMENTOS_DIST = [(dx, dy, sqrt(dx * dx + dy * dy)) for dx, dy in MOVIMENTOS]
+
+def plan(map, algorithm='bfs', heuristic=None, stats=False, memory=False, profile=False, backend='python', frontier='heap', prune=False, tie_break='g_max',
+         start=None, goal=None):
     """ Loads a level, searches for a path between the given waypoints, and displays the result.
 
     Args:
-        filename: The name of the text file containing the level.
-        src_waypoint: The character associated with the initial waypoint.
-        dst_waypoint: The character associated with the destination waypoint.
+        map: A string containing the level.
+        algorithm: The search algorithm ('bfs', 'dfs', 'ucs', 'greedy' or 'astar').
+        heuristic: The heuristic used by the informed algorithms ('euclidian' or 'manhattan').
+        stats: If True, also returns a dictionary with the time spent in each phase (in seconds)
+            and the search counters. Both are cheap enough for every request of the server.
+        memory: If True (with stats), the statistics also have 'peak_memory', the peak traced by
+            tracemalloc during the search. Tracing slows the search down about 10x and acts on
+            the whole process, so concurrent searches in other threads disturb the measure; it
+            is meant for benchmarks, not for the server.
+        profile: If True, runs the search under cProfile and adds the profile to profiling.REGISTRY.
+        backend: 'python', 'numba', 'numpy', 'delta' or 'ch'. The Numba backend runs the same
+            algorithms JIT-compiled over a NumPy cost grid. The NumPy backend only has bfs,
+            expanding whole layers at once. The delta backend only has ucs, running parallel
+            delta-stepping over shared memory. The ch backend answers ucs and astar with a
+            contraction hierarchy built offline by `python contraction.py` and loaded once per
+            cached level. Without the library (or the hierarchy), or for other algorithms, it
+            falls back to 'python' with a warning.
+        frontier: 'heap' or 'buckets', the frontier of ucs and astar in the Python backend. The
+            bucket queue returns the same path, cost and visited cells as the heap.
+
+        prune: If True, the search skips the dead ends and swamps found by pruning.Pruning, unless
+            the start or the goal is inside one. Path lengths of bfs and costs of ucs (and of astar
+            with an admissible heuristic) are unchanged. The statistics report the number of
+            pruned cells.
+        tie_break: How greedy and astar order the cells with the same priority in the Python and
+            Numba backends: 'g_max' (deeper cells first, the default), 'coord' (by coordinates),
+            'h_min' (cells closer to the goal first), 'fifo' or 'lifo' (insertion order).
+        start: The (x, y) cell where the search starts, instead of the 'S' of the map.
+        goal: The (x, y) cell the search looks for, instead of the 'G' of the map.
+
+    When the start and the goal are in different connected components no search is run: the path
+    is empty and no cell is visited.
 
+    Returns:
+        The path, its cost and the visited cells, followed by the statistics when stats is True.
     """
     #print(map)
     #print("Algorithm:", algorithm)
     #print("Heuristic:", heuristic)
 
+    if profile:
+        from profiling import profile_plan
+        return profile_plan(map, algorithm, heuristic, stats=stats, memory=memory, backend=backend, frontier=frontier, prune=prune,
+                            tie_break=tie_break, start=start, goal=goal)
+
+    kernel = None
+    if backend == 'numba':
+        import search_numba
+        if search_numba.DISPONIVEL:
+            kernel = partial(search_numba.best_first_search, tie_break=tie_break)
+        else:
+            warnings.warn("Numba não está instalado; usando o backend em Python", RuntimeWarning)
+    elif backend == 'numpy':
+        import search_numpy
+        if not search_numpy.DISPONIVEL:
+            warnings.warn("NumPy não está instalado; usando o backend em Python", RuntimeWarning)
+        elif POLICIES.get(algorithm, (None,))[0] not in search_numpy.POLITICAS:
+            warnings.warn(f"O backend numpy não tem {algorithm}; usando o backend em Python", RuntimeWarning)
+        else:
+            kernel = search_numpy.best_first_search
+    elif backend == 'ch':
+        import contraction
+        if POLICIES.get(algorithm, (None,))[0] not in contraction.POLITICAS:
+            warnings.warn(f"O backend ch não tem {algorithm}; usando o backend em Python", RuntimeWarning)
+        else:
+            kernel = contraction.best_first_search
+    elif backend == 'delta':
+        import delta_stepping
+        if POLICIES.get(algorithm, (None,))[0] not in delta_stepping.POLITICAS:
+            warnings.warn(f"O backend delta não tem {algorithm}; usando o backend em Python", RuntimeWarning)
+        else:
+            kernel = delta_stepping.best_first_search
+
+    estatisticas = {} if stats else None
+    t0 = perf_counter()
+
     # Load the level from the file
-    level = parse_level(map)
+    level = load_level(map)
+
+    # A hierarquia é construída offline (python contraction.py); aqui ela só é lida
+    if backend == 'ch' and kernel is not None and contraction.load_hierarchy(level, map) is None:
+        warnings.warn("Hierarquia de contração não construída para este mapa (python contraction.py mapa.txt); "
+                      "usando o backend em Python", RuntimeWarning)
+        kernel = None
 
     # Retrieve the source and destination coordinates from the level.
-    start = level['start']
-    goal = level['goal']
+    start = level['start'] if start is None else tuple(start)
+    goal = level['goal'] if goal is None else tuple(goal)
+    t1 = perf_counter()
+
+    h = HEURISTICS.get(heuristic)
+
+    # Sem as regiões podadas; a poda é calculada uma vez por nível em cache
+    podadas = 0
+    if prune:
+        from pruning import pruned_level
+        level, podadas = pruned_level(level, start, goal)
+    t2 = perf_counter()
+
+    # A memória só é rastreada quando pedida: o tracemalloc deixa a busca muito mais lenta
+    memoria = stats and memory
+    rastrear = memoria and not tracemalloc.is_tracing()
+    if rastrear:
+        tracemalloc.start()
+    elif memoria:
+        tracemalloc.reset_peak()
 
     # Search for and display the path from src to dst.
     path = []
     visited = {}
-
-    if algorithm == 'bfs':
-        path, visited = bfs(start, goal, level, transition_model)
-    elif algorithm == 'dfs':
-        path, visited = dfs(start, goal, level, transition_model)
-    elif algorithm == 'ucs':
-        path, visited = ucs(start, goal, level, transition_model)
-    elif algorithm == 'greedy':
-        if heuristic == 'euclidian':
-            path, visited = greedy_best_first(start, goal, level, transition_model, h_euclidian)
-        elif heuristic == 'manhattan':
-            path, visited = greedy_best_first(start, goal, level, transition_model, h_manhattan)
-    elif algorithm == 'astar':
-        if heuristic == 'euclidian':
-            path, visited = a_star(start, goal, level, transition_model, h_euclidian)
-        elif heuristic == 'manhattan':
-            path, visited = a_star(start, goal, level, transition_model, h_manhattan)
-
-    return path, path_cost(path, level), visited
+    cost = None
+
+    # S e G em componentes diferentes: o caminho não existe e a busca nem começa
+    alcancavel = start is None or goal is None or level['components'].connected(start, goal)
+
+    policy, informada = POLICIES.get(algorithm, (None, False))
+    if alcancavel and policy is not None and (h is not None or not informada):
+        if kernel is None:
+            path, visited, cost = best_first_search(start, goal, level, transition_model, policy, h, estatisticas, frontier,
+                                                    tie_break)
+        else:
+            # S e G vão como argumentos: os backends guardam a grade e a hierarquia no nível em cache
+            path, visited, cost = kernel(level, policy, heuristic, estatisticas, start, goal)
+    t3 = perf_counter()
+
+    if memoria:
+        estatisticas['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        if rastrear:
+            tracemalloc.stop()
+
+    # Os algoritmos que ignoram custos não acompanham g(n)
+    if cost is None:
+        cost = path_cost(path, level)
+
+    if not stats:
+        return path, cost, visited
+
+    t4 = perf_counter()
+    reconstrucao = estatisticas.pop('reconstruction', 0.0)
+    estatisticas['timings'] = {
+        'parse': t1 - t0,
+        'precompute': t2 - t1,
+        'search': t3 - t2 - reconstrucao,
+        'reconstruction': reconstrucao,
+        'path_cost': t4 - t3,
+        'total': t4 - t0,
+    }
+    for contador in ('expansions', 'pushes', 'pops', 'peak_frontier'):
+        estatisticas.setdefault(contador, 0)
+    estatisticas['pruned'] = podadas
+
+    return path, cost, visited, estatisticas
 
 def parse_level(map):
     """ Parses a level from a string.
@@ -57,14 +190,19 @@ def parse_level(map):
 
     Returns:
         The parsed level (dict) containing the locations of walls (set), the locations of spaces 
-        (dict), and a mapping of locations to waypoints (dict).
+        (dict), and a mapping of locations to waypoints (dict), plus the width and height of the grid.
     """
     start = None
     goal = None
     walls = set()
     spaces = {}
+    width = 0
+    height = 0
 
     for j, line in enumerate(map.split('\n')):
+        if line:
+            width = max(width, len(line))
+            height = j + 1
         for i, char in enumerate(line):
             if char == '\n':
                 continue
@@ -79,10 +217,64 @@ def parse_level(map):
             elif char.isnumeric():
                 spaces[(i, j)] = float(char)
 
-    level = {'walls': walls, 'spaces': spaces, 'start': start, 'goal': goal}
+    level = {'walls': walls, 'spaces': spaces, 'start': start, 'goal': goal, 'width': width, 'height': height}
+
+    return level
+
+# Cache LRU dos níveis já lidos, pelo texto do mapa, com as componentes conexas de cada um
+TAMANHO_CACHE_NIVEIS = 8
+_niveis = OrderedDict()
+_niveis_lock = threading.Lock()
+
+def load_level(map):
+    """ Returns the parsed level of the map, with its connected components in level['components'].
+
+    The levels are cached by the map text, so searching the same map again skips the parsing and
+    the labeling. The returned level is shared and must not be modified.
+    """
+    with _niveis_lock:
+        level = _niveis.get(map)
+        if level is not None:
+            _niveis.move_to_end(map)
+            return level
 
+    level = parse_level(map)
+    level['components'] = ComponentIndex(level['width'], level['height'], level['spaces'])
+    _guardar_nivel(map, level)
     return level
 
+def update_level(old_map, new_map):
+    """ Moves the cached level of old_map to new_map, updating its components cell by cell.
+
+    Used when a map is edited: the opened cells join the components around them and the closed
+    ones only relabel the component they were in. If old_map is not cached, or the size of the
+    grid changed, new_map is labeled from scratch on its next load.
+    """
+    with _niveis_lock:
+        antigo = _niveis.pop(old_map, None)
+    if antigo is None:
+        return
+
+    level = parse_level(new_map)
+    if (level['width'], level['height']) != (antigo['width'], antigo['height']):
+        return
+
+    componentes = antigo['components']
+    for cell in antigo['spaces'].keys() - level['spaces'].keys():
+        componentes.close(cell)
+    for cell in level['spaces'].keys() - antigo['spaces'].keys():
+        componentes.open(cell)
+
+    level['components'] = componentes
+    _guardar_nivel(new_map, level)
+
+def _guardar_nivel(map, level):
+    with _niveis_lock:
+        _niveis[map] = level
+        _niveis.move_to_end(map)
+        while len(_niveis) > TAMANHO_CACHE_NIVEIS:
+            _niveis.popitem(last=False)
+
 def path_cost(path, level):
     """ Returns the cost of the given path.
 
@@ -143,14 +335,7 @@ def transition_model(level, state1):
     """
     adj_states = {}
 
-    # Movimentos possíveis: horizontal, vertical e diagonal
-    movimentos = [
-        (-1, -1), (0, -1), (1, -1),
-        (-1,  0),         (1,  0),
-        (-1,  1), (0,  1), (1,  1)
-    ]
-
-    for dx, dy in movimentos:
+    for dx, dy in MOVIMENTOS:
         vizinho = (state1[0] + dx, state1[1] + dy)
 
         # Verifica se o vizinho é um espaço válido (não é parede)
@@ -168,41 +353,427 @@ def transition_model(level, state1):
     return adj_states.items()
     #return sorted(adj_states.items(), key=lambda x: (x[0][0], x[0][1]))
 
+def neighbors(level, state):
+    """ Provides the adjacent states of the given state, without computing the edge costs.
+
+    Used by the algorithms that ignore costs. The order is the same as in transition_model.
+
+    Args:
+        level: A loaded level, containing walls, spaces, and waypoints.
+        state: A target location.
+
+    Returns:
+        A list with the coordinates of the adjacent states.
+    """
+    spaces = level['spaces']
+    x, y = state
+    return [v for v in ((x - 1, y - 1), (x, y - 1), (x + 1, y - 1),
+                        (x - 1, y),                 (x + 1, y),
+                        (x - 1, y + 1), (x, y + 1), (x + 1, y + 1)) if v in spaces]
+
+def _transicoes(level, state):
+    """ Same result as transition_model, with cost_function inlined for the search loops.
+
+    The distance of each move is precomputed (1 or sqrt(2)), which gives bit-identical costs.
+    """
+    spaces = level['spaces']
+    x, y = state
+    cost1 = spaces[state]
+    resultado = []
+    for dx, dy, dist in _MOVIMENTOS_DIST:
+        vizinho = (x + dx, y + dy)
+        cost2 = spaces.get(vizinho)
+        if cost2 is not None:
+            resultado.append((vizinho, dist * ((cost1 + cost2) / 2.0)))
+    return resultado
+
 # =============================
-# Uninformed Search Algorithms
+# Search Kernel
 # =============================
 
-def bfs(s, g, level, adj):
-    """ Searches for a path from the source to the goal using the Breadth-First Search algorithm.
+# Códigos de ParentMap: a direção do movimento do pai até a célula é (dy + 1) * 3 + (dx + 1),
+# então o centro (4) fica livre para marcar a origem, que não tem pai
+SEM_PAI = 4
+NAO_VISITADO = 0xFF
+
+# Grades com até este número de células usam arrays densos por busca (9 bytes por célula); as
+# maiores, como os mapas em tiles, guardam só as células alcançadas, em dicionários
+LIMITE_DENSO = 1 << 20
+
+class _Esparso(dict):
+    """ Dictionary that reads `padrao` for the missing keys, without inserting them. """
+
+    __slots__ = ('padrao',)
+
+    def __init__(self, padrao):
+        super().__init__()
+        self.padrao = padrao
+
+    def __missing__(self, chave):
+        return self.padrao
+
+def dimensions(level):
+    """ Returns the (width, height) of the level grid, recorded by parse_level or taken from the spaces. """
+    if 'width' in level and 'height' in level:
+        return level['width'], level['height']
+    largura = max((x for x, _ in level['spaces']), default=-1) + 1
+    altura = max((y for _, y in level['spaces']), default=-1) + 1
+    return largura, altura
+
+class ParentMap(Mapping):
+    """ Visited cells and their parents, stored as one direction code per grid cell.
+
+    Each cell takes one byte in a bytearray (the move from the parent, SEM_PAI for the source or
+    NAO_VISITADO), plus the index of the visited cells in visiting order, instead of a dict of
+    tuples. Reading it gives the same dict interface and order the searches used to return.
+    Grids larger than LIMITE_DENSO keep the codes of the reached cells only, in a dictionary
+    indexed the same way, so a search never allocates memory for the whole grid.
+
+    Args:
+        largura: Width of the grid.
+        altura: Height of the grid.
+    """
+
+    def __init__(self, largura, altura):
+        self.largura = largura
+        self.altura = altura
+        self.denso = largura * altura <= LIMITE_DENSO
+        if self.denso:
+            self.codigos = bytearray([NAO_VISITADO]) * (largura * altura)
+        else:
+            self.codigos = _Esparso(NAO_VISITADO)
+        self.ordem = array('l')
+
+    def indice(self, cell):
+        x, y = cell
+        return x * self.altura + y
+
+    def _codigo(self, cell):
+        try:
+            x, y = cell
+        except (TypeError, ValueError):
+            return NAO_VISITADO
+        if x < 0 or y < 0 or x >= self.largura or y >= self.altura:
+            return NAO_VISITADO
+        return self.codigos[x * self.altura + y]
+
+    def __setitem__(self, cell, pai):
+        i = self.indice(cell)
+        if self.codigos[i] == NAO_VISITADO:
+            self.ordem.append(i)
+        if pai is None:
+            self.codigos[i] = SEM_PAI
+        else:
+            self.codigos[i] = (cell[1] - pai[1] + 1) * 3 + (cell[0] - pai[0] + 1)
+
+    def __getitem__(self, cell):
+        codigo = self._codigo(cell)
+        if codigo == NAO_VISITADO:
+            raise KeyError(cell)
+        if codigo == SEM_PAI:
+            return None
+        dy, dx = divmod(codigo, 3)
+        return (cell[0] - dx + 1, cell[1] - dy + 1)
+
+    def __contains__(self, cell):
+        return self._codigo(cell) != NAO_VISITADO
+
+    def __iter__(self):
+        altura = self.altura
+        for i in self.ordem:
+            yield divmod(i, altura)
+
+    def __len__(self):
+        return len(self.ordem)
+
+
+# Políticas de fronteira do kernel de busca
+FIFO = 'fifo'       # fila: busca em largura
+LIFO = 'lifo'       # pilha: busca em profundidade
+G_ORDER = 'g'       # fila de prioridade por g(n): custo uniforme
+H_ORDER = 'h'       # fila de prioridade por h(n): gulosa
+F_ORDER = 'f'       # fila de prioridade por f(n) = g(n) + h(n): A*
+
+# Estruturas da fronteira de G_ORDER e F_ORDER
+HEAP = 'heap'       # heapq com tuplas (prioridade, desempate, nó, g)
+BUCKETS = 'buckets' # BucketQueue: baldes de largura fixa, cada um ordenado ao ser aberto
+
+# Desempates entre nós de mesma prioridade em H_ORDER e F_ORDER
+COORD = 'coord'     # pelas coordenadas do nó (o comportamento original)
+G_MAX = 'g_max'     # maior g(n) primeiro: avança no platô em vez de abri-lo todo (o padrão)
+H_MIN = 'h_min'     # menor h(n) primeiro
+TIE_BREAKS = (COORD, G_MAX, H_MIN, FIFO, LIFO)
+
+def best_first_search(s, g, level, adj, policy, h=None, stats=None, frontier=HEAP, tie_break=G_MAX):
+    """ Searches for a path from the source to the goal, ordering the frontier by the given policy.
+
+    FIFO, LIFO and H_ORDER ignore the edge costs: each cell is marked when it is generated and
+    enters the frontier only once, and the neighbors come from a cost-free iterator when adj is
+    transition_model. G_ORDER and F_ORDER relax the edges with the accumulated cost g(n), skip
+    stale frontier entries and return the tracked g of the goal as the path cost. Their frontier
+    is a heap by default; with frontier=BUCKETS it is a BucketQueue, which pops the nodes in the
+    same order.
 
     Args:
         s: The source location.
         g: The goal location.
         level: The level containing the locations of walls, spaces, and waypoints.
         adj: A function that returns the adjacent cells and their respective costs from the given cell.
+        policy: One of FIFO, LIFO, G_ORDER, H_ORDER or F_ORDER.
+        h: The heuristic function, required by H_ORDER and F_ORDER.
+        stats: An optional dictionary that receives the search counters.
+        frontier: HEAP or BUCKETS, the frontier used by G_ORDER and F_ORDER.
+        tie_break: How H_ORDER and F_ORDER order the entries with the same priority: G_MAX (larger
+            g first, then by the node coordinates), COORD (by the node coordinates), H_MIN (smaller
+            h first), FIFO or LIFO (by insertion order). H_ORDER does not track g, so G_MAX and
+            H_MIN fall back to COORD there.
 
     Returns:
-        A list of tuples containing cells from the source to the goal, and a dictionary 
-        containing the visited cells and their respective parent cells.
+        The path from the source to the goal, a dictionary containing the visited cells and their
+        respective parent cells, and the cost of the path (None for the policies that ignore costs).
     """
-    visited = {s: None}
-    
-    fila = deque([s])
-
-    while fila:
-        atual = fila.popleft()
+    if tie_break not in TIE_BREAKS:
+        raise ValueError(f"Desempate desconhecido: {tie_break!r}")
+
+    if policy in (G_ORDER, F_ORDER) and frontier == BUCKETS:
+        visited, custo, contadores = _busca_com_baldes(s, g, level, adj, policy, h, tie_break)
+    elif policy in (G_ORDER, F_ORDER):
+        visited, custo, contadores = _busca_com_custo(s, g, level, adj, policy, h, tie_break)
+    else:
+        visited, contadores = _busca_sem_custo(s, g, level, adj, policy, h, tie_break)
+        custo = None
+
+    t0 = perf_counter()
+    path = _reconstruir(visited, g)
+
+    if stats is not None:
+        _registrar(stats, *contadores, perf_counter() - t0)
+
+    return path, visited, custo
+
+def _busca_sem_custo(s, g, level, adj, policy, h, tie_break=G_MAX):
+    """ Graph search that marks each cell when it is generated; used by FIFO, LIFO and H_ORDER. """
+    vizinhos = _sem_custo(adj)
+    visited = ParentMap(*dimensions(level))
+    codigos, anotar, altura = visited.codigos, visited.ordem.append, visited.altura
+    visited[s] = None
+
+    if policy == FIFO:
+        fronteira = deque([s])
+        retirar = fronteira.popleft
+        inserir = fronteira.append
+    elif policy == LIFO:
+        fronteira = [s]
+        retirar = fronteira.pop
+        inserir = fronteira.append
+    elif tie_break in (FIFO, LIFO):
+        # entradas (h, ordem de inserção, nó); LIFO usa a ordem negativa
+        sinal = 1 if tie_break == FIFO else -1
+        contador = count(1)
+        fronteira = [(h(s, g), 0, s)]
+        retirar = lambda: heappop(fronteira)[2]
+        inserir = lambda n: heappush(fronteira, (h(n, g), sinal * next(contador), n))
+    else:
+        fronteira = [(h(s, g), s)]
+        retirar = lambda: heappop(fronteira)[1]
+        inserir = lambda n: heappush(fronteira, (h(n, g), n))
+
+    pops = expansoes = 0
+    pushes = pico = 1
+
+    while fronteira:
+        atual = retirar()
+        pops += 1
 
         # se chegamos no objetivo, para
         if atual == g:
             break
 
-        # percorre os vizinhos do estado atual
-        for vizinho, _ in adj(level, atual):
-            if vizinho not in visited:  # só visita uma vez
-                visited[vizinho] = atual  # guarda quem é o pai
-                fila.append(vizinho)
+        # cada vizinho entra na fronteira uma única vez; o pai é guardado como a direção do movimento
+        expansoes += 1
+        ax, ay = atual
+        for vizinho in vizinhos(level, atual):
+            vx, vy = vizinho
+            i = vx * altura + vy
+            if codigos[i] == NAO_VISITADO:
+                codigos[i] = (vy - ay + 1) * 3 + (vx - ax + 1)
+                anotar(i)
+                inserir(vizinho)
+                pushes += 1
+        if len(fronteira) > pico:
+            pico = len(fronteira)
+
+    return visited, (expansoes, pushes, pops, pico)
+
+def _busca_com_custo(s, g, level, adj, policy, h, tie_break=G_MAX):
+    """ Best-first search relaxing the edge costs; used by G_ORDER and F_ORDER. """
+    vizinhos = _VIZINHOS_COM_CUSTO.get(adj, adj)
+    visited = ParentMap(*dimensions(level))
+    codigos, ordem, altura = visited.codigos, visited.ordem, visited.altura
+    visited[s] = None
+    # g(n) de cada célula, infinito onde ainda não foi alcançada
+    g_scores = _custos_iniciais(visited)
+    g_scores[visited.indice(s)] = 0
+
+    # Entradas (prioridade, desempate, nó, g). G_ORDER desempata pela ordem de inserção
+    # (FIFO); F_ORDER com COORD, pelas coordenadas do nó, como as versões originais de ucs e
+    # a_star, e com os outros desempates (G_MAX por padrão) troca só o segundo campo.
+    if policy == G_ORDER:
+        fronteira = [(0, 0, s, 0)]
+    elif tie_break == COORD:
+        fronteira = [(h(s, g), s, s, 0)]
+    else:
+        fronteira = [(h(s, g), 0 if tie_break != H_MIN else h(s, g), s, 0)]
+
+    contador = pops = expansoes = 0
+    pico = 1
+
+    while fronteira:
+        _, _, atual, g_atual = heappop(fronteira)
+        pops += 1
+        ax, ay = atual
+
+        # entrada velha: o nó já foi alcançado por um caminho mais barato
+        if g_atual > g_scores[ax * altura + ay]:
+            continue
+
+        if atual == g:
+            break
 
-    # reconstrução do caminho se chegamos no objetivo
+        expansoes += 1
+        for vizinho, custo in vizinhos(level, atual):
+            novo_g = g_atual + custo
+            vx, vy = vizinho
+            i = vx * altura + vy
+
+            if novo_g < g_scores[i]:
+                g_scores[i] = novo_g
+                if codigos[i] == NAO_VISITADO:
+                    ordem.append(i)
+                codigos[i] = (vy - ay + 1) * 3 + (vx - ax + 1)
+                contador += 1
+                if policy == G_ORDER:
+                    heappush(fronteira, (novo_g, contador, vizinho, novo_g))
+                elif tie_break == COORD:
+                    heappush(fronteira, (novo_g + h(vizinho, g), vizinho, vizinho, novo_g))
+                else:
+                    hv = h(vizinho, g)
+                    if tie_break == G_MAX:
+                        desempate = -novo_g
+                    elif tie_break == H_MIN:
+                        desempate = hv
+                    elif tie_break == FIFO:
+                        desempate = contador
+                    else:
+                        desempate = -contador
+                    heappush(fronteira, (novo_g + hv, desempate, vizinho, novo_g))
+        if len(fronteira) > pico:
+            pico = len(fronteira)
+
+    return visited, _custo_objetivo(visited, g_scores, g), (expansoes, contador + 1, pops, pico)
+
+def _busca_com_baldes(s, g, level, adj, policy, h, tie_break=G_MAX):
+    """ Same search as _busca_com_custo with a BucketQueue as frontier. """
+    vizinhos = _VIZINHOS_COM_CUSTO.get(adj, adj)
+    visited = ParentMap(*dimensions(level))
+    codigos, ordem, altura = visited.codigos, visited.ordem, visited.altura
+    visited[s] = None
+    g_scores = _custos_iniciais(visited)
+    g_scores[visited.indice(s)] = 0
+
+    # As entradas são as mesmas do heap, então saem na mesma ordem; os baldes têm a largura da
+    # aresta mais barata do nível
+    fronteira = BucketQueue(_menor_aresta(level))
+    inserir, retirar = fronteira.push, fronteira.pop
+    if policy == G_ORDER:
+        inserir((0, 0, s, 0))
+    elif tie_break == COORD:
+        inserir((h(s, g), s, s, 0))
+    else:
+        inserir((h(s, g), 0 if tie_break != H_MIN else h(s, g), s, 0))
+
+    contador = pops = expansoes = 0
+    pico = tamanho = 1
+
+    while tamanho:
+        _, _, atual, g_atual = retirar()
+        pops += 1
+        ax, ay = atual
+
+        # entrada velha: o nó já foi alcançado por um caminho mais barato
+        if g_atual > g_scores[ax * altura + ay]:
+            tamanho = len(fronteira)
+            continue
+
+        if atual == g:
+            break
+
+        expansoes += 1
+        for vizinho, custo in vizinhos(level, atual):
+            novo_g = g_atual + custo
+            vx, vy = vizinho
+            i = vx * altura + vy
+
+            if novo_g < g_scores[i]:
+                g_scores[i] = novo_g
+                if codigos[i] == NAO_VISITADO:
+                    ordem.append(i)
+                codigos[i] = (vy - ay + 1) * 3 + (vx - ax + 1)
+                contador += 1
+                if policy == G_ORDER:
+                    inserir((novo_g, contador, vizinho, novo_g))
+                elif tie_break == COORD:
+                    inserir((novo_g + h(vizinho, g), vizinho, vizinho, novo_g))
+                else:
+                    hv = h(vizinho, g)
+                    if tie_break == G_MAX:
+                        desempate = -novo_g
+                    elif tie_break == H_MIN:
+                        desempate = hv
+                    elif tie_break == FIFO:
+                        desempate = contador
+                    else:
+                        desempate = -contador
+                    inserir((novo_g + hv, desempate, vizinho, novo_g))
+        tamanho = len(fronteira)
+        if tamanho > pico:
+            pico = tamanho
+
+    return visited, _custo_objetivo(visited, g_scores, g), (expansoes, contador + 1, pops, pico)
+
+def _menor_aresta(level):
+    """ Returns the cost of the cheapest move between two adjacent spaces of the level (1.0 when
+    there is none), cached in level['min_edge_cost']. """
+    menor = level.get('min_edge_cost')
+    if menor is None:
+        spaces = level['spaces']
+        # nenhuma aresta custa menos que a célula mais barata, então a busca para ao achá-la
+        piso = min(spaces.values(), default=1.0)
+        menor = inf
+        for (x, y), custo in spaces.items():
+            for dx, dy, d in _MOVIMENTOS_DIST:
+                outro = spaces.get((x + dx, y + dy))
+                if outro is not None and d * ((custo + outro) / 2.0) < menor:
+                    menor = d * ((custo + outro) / 2.0)
+            if menor == piso:
+                break
+        menor = level['min_edge_cost'] = menor if menor < inf else 1.0
+    return menor
+
+def _custos_iniciais(visited):
+    """ Returns the g(n) store of a search, dense or sparse like the ParentMap. """
+    if visited.denso:
+        return array('d', [inf]) * len(visited.codigos)
+    return _Esparso(inf)
+
+def _custo_objetivo(visited, g_scores, g):
+    """ Returns the tracked g of the goal, or 0 when it was not reached. """
+    if g in visited:
+        return g_scores[visited.indice(g)]
+    return 0
+
+def _reconstruir(visited, g):
+    """ Rebuilds the path to g following the parent cells. """
     path = []
     if g in visited:
         atual = g
@@ -210,47 +781,68 @@ def bfs(s, g, level, adj):
             path.append(atual)
             atual = visited[atual]
         path.reverse()
+    return path
+
+def _sem_custo(adj):
+    """ Returns a neighbor iterator that does not compute edge costs. """
+    if adj is transition_model:
+        return neighbors
+    return lambda level, state: [vizinho for vizinho, _ in adj(level, state)]
+
+def _registrar(stats, expansoes, pushes, pops, pico, reconstrucao):
+    """ Stores the counters of a search in the stats dictionary. """
+    stats['expansions'] = expansoes
+    stats['pushes'] = pushes
+    stats['pops'] = pops
+    stats['peak_frontier'] = pico
+    stats['reconstruction'] = reconstrucao
+
+# Política de fronteira de cada algoritmo e se ele precisa de heurística
+POLICIES = {
+    'bfs': (FIFO, False),
+    'dfs': (LIFO, False),
+    'ucs': (G_ORDER, False),
+    'greedy': (H_ORDER, True),
+    'astar': (F_ORDER, True),
+}
+
+# =============================
+# Uninformed Search Algorithms
+# =============================
 
+def bfs(s, g, level, adj, stats=None):
+    """ Searches for a path from the source to the goal using the Breadth-First Search algorithm.
+
+    Args:
+        s: The source location.
+        g: The goal location.
+        level: The level containing the locations of walls, spaces, and waypoints.
+        adj: A function that returns the adjacent cells and their respective costs from the given cell.
+        stats: An optional dictionary that receives the search counters.
+
+    Returns:
+        A list of tuples containing cells from the source to the goal, and a dictionary 
+        containing the visited cells and their respective parent cells.
+    """
+    path, visited, _ = best_first_search(s, g, level, adj, FIFO, stats=stats)
     return path, visited
 
-def dfs(s, g, level, adj):
+def dfs(s, g, level, adj, stats=None):
     """ Searches for a path from the source to the goal using the Depth-First Search algorithm.
     Args:
         s: The source location.
         g: The goal location.
         level: The level containing the locations of walls, spaces, and waypoints.
         adj: A function that returns the adjacent cells and their respective costs from the given cell.
+        stats: An optional dictionary that receives the search counters.
     
     Returns:
         A list of tuples containing cells from the source to the goal, and a dictionary containing the visited cells and their respective parent cells.
     """
-    visited = {s: None}
-    pilha = [s]  # pilha LIFO
-
-    while pilha:
-        atual = pilha.pop()  # pega o último inserido (profundidade)
-
-        if atual == g:
-            break  # encontramos o objetivo
-
-        # percorre vizinhos
-        for vizinho, _ in adj(level, atual):
-            if vizinho not in visited:  # só visita uma vez
-                visited[vizinho] = atual  # guarda quem é o pai
-                pilha.append(vizinho)
-
-    # reconstrução do caminho
-    path = []
-    if g in visited:
-        atual = g
-        while atual is not None:
-            path.append(atual)
-            atual = visited[atual]
-        path.reverse()
-
+    path, visited, _ = best_first_search(s, g, level, adj, LIFO, stats=stats)
     return path, visited
 
-def ucs(start, goal, level, adj):
+def ucs(start, goal, level, adj, stats=None, frontier=HEAP):
     """ Searches for a path from the source to the goal using the Uniform-Cost Search algorithm.
 
     Args:
@@ -258,55 +850,20 @@ def ucs(start, goal, level, adj):
         g: The goal location.
         level: The level containing the locations of walls, spaces, and waypoints.
         adj: A function that returns the adjacent cells and their respective costs from the given cell.
+        stats: An optional dictionary that receives the search counters.
+        frontier: HEAP or BUCKETS, the structure of the frontier.
 
     Returns:
         A list of tuples containing cells from the source to the goal, and a dictionary containing the visited cells and their respective parent cells.
     """
-    # Contador para o critério de desempate (FIFO)
-    counter = 0
-    
-    # A fronteira agora armazena (custo, contador, nó)
-    frontier = [(0, counter, start)]
-    visited = {start: (0, None)}
-    
-    while frontier:
-        # Desempacota os três valores
-        current_cost, _, current_node = heapq.heappop(frontier)
-        
-        if current_cost > visited[current_node][0]:
-            continue
-        
-        if current_node == goal:
-            break
-        
-        for neighbor, cost in adj(level, current_node):
-            new_cost = current_cost + cost
-            
-            if neighbor not in visited or new_cost < visited[neighbor][0]:
-                visited[neighbor] = (new_cost, current_node)
-                # Incrementa o contador a cada inserção
-                counter += 1
-                heapq.heappush(frontier, (new_cost, counter, neighbor))
-    
-    path = []
-    if goal in visited:
-        current = goal
-        while current is not None:
-            path.append(current)
-            current = visited[current][1]
-        path.reverse()
-    
-    simple_visited = {node: parent for node, (cost, parent) in visited.items()}
-
-    #print(f"\nCaminho: {path}")
-    
-    return path, simple_visited
+    path, visited, _ = best_first_search(start, goal, level, adj, G_ORDER, stats=stats, frontier=frontier)
+    return path, visited
 
 
 # ======================================
 # Informed (Heuristic) Search Algorithms
 # ======================================
-def greedy_best_first(s, g, level, adj, h):
+def greedy_best_first(s, g, level, adj, h, stats=None, tie_break=G_MAX):
     """ Searches for a path from the source to the goal using the Greedy Best-First Search algorithm.
     
     Args:
@@ -315,47 +872,15 @@ def greedy_best_first(s, g, level, adj, h):
         level: The level containing the locations of walls, spaces, and waypoints.
         adj: A function that returns the adjacent cells and their respective costs from the given cell.
         h: A heuristic function that estimates the cost from the current cell to the goal.
+        stats: An optional dictionary that receives the search counters.
 
     Returns:
         A list of tuples containing cells from the source to the goal, and a dictionary containing the visited cells and their respective parent cells.
     """
-    visited = {s: None}
-
-    # Fronteira como fila de prioridade, ordenada por h(n)
-    frontier = [(h(s, g), s)]
-
-    # Conjunto de nós já expandidos
-    expanded = set()
-
-    while frontier:
-        _, current = heapq.heappop(frontier)
-
-        if current in expanded:
-            continue
-        expanded.add(current)
-
-        # Chegamos no objetivo
-        if current == g:
-            break
-
-        # Explora vizinhos
-        for neighbor, _ in adj(level, current):
-            if neighbor not in visited:
-                visited[neighbor] = current
-                heapq.heappush(frontier, (h(neighbor, g), neighbor))
-
-    # Reconstrução do caminho
-    path = []
-    if g in visited:
-        node = g
-        while node is not None:
-            path.append(node)
-            node = visited[node]
-        path.reverse()
-
+    path, visited, _ = best_first_search(s, g, level, adj, H_ORDER, h, stats, tie_break=tie_break)
     return path, visited
 
-def a_star(s, g, level, adj, h):
+def a_star(s, g, level, adj, h, stats=None, frontier=HEAP, tie_break=G_MAX):
     """ Searches for a path from the source to the goal using the A* algorithm.
 
     Args:
@@ -364,37 +889,13 @@ def a_star(s, g, level, adj, h):
         level: The level containing the locations of walls, spaces, and waypoints.
         adj: A function that returns the adjacent cells and their respective costs from the given cell.
         h: A heuristic function that estimates the cost from the current cell to the goal.
+        stats: An optional dictionary that receives the search counters.
+        frontier: HEAP or BUCKETS, the structure of the frontier.
     
     Returns:
         A list of tuples containing cells from the source to the goal, and a dictionary containing the visited cells and their respective parent cells.
     """
-    frontier = [(h(s, g), s)]
-    visited = {s: None}
-    g_scores = {s: 0}
-
-    while frontier:
-        _, current = heapq.heappop(frontier)
-
-        if current == g:
-            break
-
-        for neighbor, cost in adj(level, current):
-            new_g_score = g_scores[current] + cost
-
-            if neighbor not in g_scores or new_g_score < g_scores[neighbor]:
-                g_scores[neighbor] = new_g_score
-                visited[neighbor] = current
-                f_score = new_g_score + h(neighbor, g)
-                heapq.heappush(frontier, (f_score, neighbor))
-
-    path = []
-    if g in visited:
-        node = g
-        while node is not None:
-            path.append(node)
-            node = visited[node]
-        path.reverse()
-    
+    path, visited, _ = best_first_search(s, g, level, adj, F_ORDER, h, stats, frontier, tie_break)
     return path, visited
 
 # ======================================
@@ -432,4 +933,12 @@ def h_manhattan(s, g):
     # 3.1 INSIRA SEU CÓDIGO AQUI
     ################################
 
-    return abs(s[0] - g[0]) + abs(s[1] - g[1])
\ No newline at end of file
+    return abs(s[0] - g[0]) + abs(s[1] - g[1])
+
+HEURISTICS = {
+    'euclidian': h_euclidian,
+    'manhattan': h_manhattan,
+}
+
+# Versões rápidas das funções de transição usadas pelo kernel
+_VIZINHOS_COM_CUSTO = {transition_model: _transicoes}
@@ -0,0 +1,333 @@
+from math import sqrt
+from array import array
+from time import perf_counter
+
+from search import (dimensions, ParentMap, FIFO, LIFO, G_ORDER, H_ORDER, F_ORDER, COORD, G_MAX, H_MIN, SEM_PAI,
+                    NAO_VISITADO, _reconstruir, _registrar)
+
+# Backend opcional: as mesmas buscas do kernel de search.py compiladas com Numba sobre uma
+# grade NumPy de custos. Sem Numba (ou NumPy) instalado, DISPONIVEL fica False e plan volta
+# para o backend em Python puro.
+try:
+    import numpy as np
+    from numba import njit
+    DISPONIVEL = True
+except ImportError:
+    DISPONIVEL = False
+
+_POLITICAS = {FIFO: 0, LIFO: 1, G_ORDER: 2, H_ORDER: 3, F_ORDER: 4}
+_HEURISTICAS = {'euclidian': 0, 'manhattan': 1}
+_DESEMPATES = {COORD: 0, G_MAX: 1, H_MIN: 2, FIFO: 3, LIFO: 4}
+
+PAREDE = -1.0
+
+# Tamanho inicial das filas e do array da ordem de visita, que dobram quando enchem
+CAPACIDADE_INICIAL = 1024
+
+
+def cost_grid(level):
+    """ Returns the spaces of a level as a NumPy grid indexed by [x, y], with PAREDE in the walls.
+
+    The grid is kept in the level, so the levels cached by search.load_level build it once. The
+    cache is tied to the level's spaces, so a copy with other spaces (like a pruned level) gets
+    its own grid.
+    """
+    guardada = level.get('cost_grid')
+    if guardada is not None and guardada[0] is level['spaces']:
+        return guardada[1]
+
+    largura, altura = dimensions(level)
+    custos = np.full((largura, altura), PAREDE)
+    spaces = level['spaces']
+    if spaces:
+        celulas = np.array(list(spaces), np.int64)
+        custos[celulas[:, 0], celulas[:, 1]] = np.fromiter(spaces.values(), float, len(spaces))
+    level['cost_grid'] = (spaces, custos)
+    return custos
+
+
+if DISPONIVEL:
+
+    @njit(cache=True)
+    def _antes(prio, desempate, nos, gs, i, j):
+        # Mesma ordem das tuplas (prioridade, desempate, nó, g) usadas com heapq; o desempate
+        # das tuplas que repetem o nó (desempate por coordenadas) fica 0
+        if prio[i] != prio[j]:
+            return prio[i] < prio[j]
+        if desempate[i] != desempate[j]:
+            return desempate[i] < desempate[j]
+        if nos[i] != nos[j]:
+            return nos[i] < nos[j]
+        return gs[i] < gs[j]
+
+    @njit(cache=True)
+    def _trocar(prio, desempate, nos, gs, i, j):
+        prio[i], prio[j] = prio[j], prio[i]
+        desempate[i], desempate[j] = desempate[j], desempate[i]
+        nos[i], nos[j] = nos[j], nos[i]
+        gs[i], gs[j] = gs[j], gs[i]
+
+    @njit(cache=True)
+    def _inserir(prio, desempate, nos, gs, tamanho, p, d, n, g):
+        i = tamanho
+        prio[i] = p
+        desempate[i] = d
+        nos[i] = n
+        gs[i] = g
+        while i > 0:
+            pai = (i - 1) // 2
+            if not _antes(prio, desempate, nos, gs, i, pai):
+                break
+            _trocar(prio, desempate, nos, gs, i, pai)
+            i = pai
+        return tamanho + 1
+
+    @njit(cache=True)
+    def _remover(prio, desempate, nos, gs, tamanho):
+        tamanho -= 1
+        _trocar(prio, desempate, nos, gs, 0, tamanho)
+        i = 0
+        while True:
+            menor = i
+            esq = 2 * i + 1
+            direita = esq + 1
+            if esq < tamanho and _antes(prio, desempate, nos, gs, esq, menor):
+                menor = esq
+            if direita < tamanho and _antes(prio, desempate, nos, gs, direita, menor):
+                menor = direita
+            if menor == i:
+                break
+            _trocar(prio, desempate, nos, gs, i, menor)
+            i = menor
+        return tamanho
+
+    @njit(cache=True)
+    def _dobrar(a):
+        # os arrays começam pequenos e dobram quando enchem, como uma lista do Python
+        b = np.empty(2 * a.shape[0], a.dtype)
+        b[:a.shape[0]] = a
+        return b
+
+    @njit(cache=True)
+    def _h(x, y, gx, gy, heuristica):
+        if heuristica == 0:
+            return sqrt((x - gx) ** 2 + (y - gy) ** 2)
+        return float(abs(x - gx) + abs(y - gy))
+
+    @njit(cache=True)
+    def _buscar(custos, sx, sy, gx, gy, politica, heuristica, desempate_f):
+        largura, altura = custos.shape
+        n = largura * altura
+        # Mesma ordem de MOVIMENTOS em search.py
+        dx = np.array([-1, 0, 1, -1, 1, -1, 0, 1])
+        dy = np.array([-1, -1, -1, 0, 0, 1, 1, 1])
+        dist = np.empty(8)
+        codigo_k = np.empty(8, np.uint8)
+        for k in range(8):
+            dist[k] = sqrt(float(dx[k] * dx[k] + dy[k] * dy[k]))
+            codigo_k[k] = (dy[k] + 1) * 3 + (dx[k] + 1)
+
+        # Os mesmos códigos de direção de search.ParentMap, e a ordem em que as células são alcançadas
+        codigos = np.full(n, NAO_VISITADO, np.uint8)
+        ordem = np.empty(CAPACIDADE_INICIAL, np.int64)
+        inicio = sx * altura + sy
+        objetivo = gx * altura + gy if gx >= 0 else -1
+        codigos[inicio] = SEM_PAI
+        ordem[0] = inicio
+        visitados = 1
+
+        expansoes = 0
+        pops = 0
+        pushes = 1
+        pico = 1
+        custo_objetivo = 0.0
+
+        if politica == 0 or politica == 1:
+            # Cada célula entra uma vez só: a FIFO é um array com o índice da cabeça, a LIFO uma pilha
+            fila = np.empty(CAPACIDADE_INICIAL, np.int64)
+            fila[0] = inicio
+            cabeca = 0
+            fim = 1
+            while fim > cabeca:
+                if politica == 0:
+                    atual = fila[cabeca]
+                    cabeca += 1
+                else:
+                    fim -= 1
+                    atual = fila[fim]
+                pops += 1
+                if atual == objetivo:
+                    break
+                expansoes += 1
+                x = atual // altura
+                y = atual % altura
+                for k in range(8):
+                    vx = x + dx[k]
+                    vy = y + dy[k]
+                    if vx < 0 or vy < 0 or vx >= largura or vy >= altura or custos[vx, vy] == PAREDE:
+                        continue
+                    v = vx * altura + vy
+                    if codigos[v] == NAO_VISITADO:
+                        codigos[v] = codigo_k[k]
+                        if visitados == ordem.shape[0]:
+                            ordem = _dobrar(ordem)
+                        ordem[visitados] = v
+                        visitados += 1
+                        if fim == fila.shape[0]:
+                            fila = _dobrar(fila)
+                        fila[fim] = v
+                        fim += 1
+                        pushes += 1
+                if fim - cabeca > pico:
+                    pico = fim - cabeca
+            return codigos, ordem[:visitados], custo_objetivo, expansoes, pushes, pops, pico
+
+        # Filas de prioridade em arrays que crescem sob demanda
+        prio = np.empty(CAPACIDADE_INICIAL)
+        desempate = np.empty(CAPACIDADE_INICIAL)
+        nos = np.empty(CAPACIDADE_INICIAL, np.int64)
+        gs = np.empty(CAPACIDADE_INICIAL)
+
+        if politica == 3:
+            # sem g(n), G_MAX e H_MIN desempatam pelas coordenadas; FIFO e LIFO pela ordem de inserção
+            sinal = 1.0 if desempate_f == 3 else (-1.0 if desempate_f == 4 else 0.0)
+            tamanho = _inserir(prio, desempate, nos, gs, 0, _h(sx, sy, gx, gy, heuristica), 0.0, inicio, 0.0)
+            while tamanho > 0:
+                atual = nos[0]
+                tamanho = _remover(prio, desempate, nos, gs, tamanho)
+                pops += 1
+                if atual == objetivo:
+                    break
+                expansoes += 1
+                x = atual // altura
+                y = atual % altura
+                for k in range(8):
+                    vx = x + dx[k]
+                    vy = y + dy[k]
+                    if vx < 0 or vy < 0 or vx >= largura or vy >= altura or custos[vx, vy] == PAREDE:
+                        continue
+                    v = vx * altura + vy
+                    if codigos[v] == NAO_VISITADO:
+                        codigos[v] = codigo_k[k]
+                        if visitados == ordem.shape[0]:
+                            ordem = _dobrar(ordem)
+                        ordem[visitados] = v
+                        visitados += 1
+                        if tamanho == nos.shape[0]:
+                            prio, desempate, nos, gs = _dobrar(prio), _dobrar(desempate), _dobrar(nos), _dobrar(gs)
+                        tamanho = _inserir(prio, desempate, nos, gs, tamanho, _h(vx, vy, gx, gy, heuristica),
+                                           sinal * pushes, v, 0.0)
+                        pushes += 1
+                if tamanho > pico:
+                    pico = tamanho
+            return codigos, ordem[:visitados], custo_objetivo, expansoes, pushes, pops, pico
+
+        g_scores = np.full(n, np.inf)
+        g_scores[inicio] = 0.0
+        contador = 0
+        if politica == 2:
+            tamanho = _inserir(prio, desempate, nos, gs, 0, 0.0, 0.0, inicio, 0.0)
+        else:
+            h_inicio = _h(sx, sy, gx, gy, heuristica)
+            tamanho = _inserir(prio, desempate, nos, gs, 0, h_inicio, h_inicio if desempate_f == 2 else 0.0,
+                               inicio, 0.0)
+
+        while tamanho > 0:
+            atual = nos[0]
+            g_atual = gs[0]
+            tamanho = _remover(prio, desempate, nos, gs, tamanho)
+            pops += 1
+            if g_atual > g_scores[atual]:
+                continue
+            if atual == objetivo:
+                break
+            expansoes += 1
+            x = atual // altura
+            y = atual % altura
+            custo1 = custos[x, y]
+            for k in range(8):
+                vx = x + dx[k]
+                vy = y + dy[k]
+                if vx < 0 or vy < 0 or vx >= largura or vy >= altura or custos[vx, vy] == PAREDE:
+                    continue
+                v = vx * altura + vy
+                novo_g = g_atual + dist[k] * ((custo1 + custos[vx, vy]) / 2.0)
+                if novo_g < g_scores[v]:
+                    g_scores[v] = novo_g
+                    if codigos[v] == NAO_VISITADO:
+                        if visitados == ordem.shape[0]:
+                            ordem = _dobrar(ordem)
+                        ordem[visitados] = v
+                        visitados += 1
+                    codigos[v] = codigo_k[k]
+                    contador += 1
+                    if tamanho == nos.shape[0]:
+                        prio, desempate, nos, gs = _dobrar(prio), _dobrar(desempate), _dobrar(nos), _dobrar(gs)
+                    if politica == 2:
+                        tamanho = _inserir(prio, desempate, nos, gs, tamanho, novo_g, float(contador), v, novo_g)
+                    else:
+                        hv = _h(vx, vy, gx, gy, heuristica)
+                        if desempate_f == 1:
+                            d = -novo_g
+                        elif desempate_f == 2:
+                            d = hv
+                        elif desempate_f == 3:
+                            d = float(contador)
+                        elif desempate_f == 4:
+                            d = -float(contador)
+                        else:
+                            d = 0.0
+                        tamanho = _inserir(prio, desempate, nos, gs, tamanho, novo_g + hv, d, v, novo_g)
+            if tamanho > pico:
+                pico = tamanho
+
+        if objetivo >= 0 and g_scores[objetivo] < np.inf:
+            custo_objetivo = g_scores[objetivo]
+        return codigos, ordem[:visitados], custo_objetivo, expansoes, contador + 1, pops, pico
+
+
+def best_first_search(level, policy, heuristic=None, stats=None, s=None, g=None, tie_break=G_MAX):
+    """ Numba version of search.best_first_search.
+
+    Runs the same algorithm over a NumPy cost grid, with array queues and heaps whose entries
+    are ordered exactly like the heapq tuples of the Python kernel, so paths, costs and visited
+    cells (and their order) are the same. The visited cells come back as a search.ParentMap
+    filled straight from the direction codes of the compiled search, without a dict.
+
+    Args:
+        level: A loaded level, containing walls, spaces, and waypoints.
+        policy: One of FIFO, LIFO, G_ORDER, H_ORDER or F_ORDER.
+        heuristic: The heuristic name ('euclidian' or 'manhattan'), required by H_ORDER and F_ORDER.
+        stats: An optional dictionary that receives the search counters.
+        s: The source cell (level['start'] by default).
+        g: The goal cell (level['goal'] by default).
+        tie_break: The tie-break of H_ORDER and F_ORDER, as in search.best_first_search.
+
+    Returns:
+        The path, the visited cells with their parents and the path cost (None for the policies that ignore costs).
+    """
+    s = level['start'] if s is None else s
+    g = level['goal'] if g is None else g
+    custos = cost_grid(level)
+    largura, altura = custos.shape
+    gx, gy = g if g is not None and g in level['spaces'] else (-1, -1)
+
+    codigos, ordem, custo, *contadores = _buscar(custos, s[0], s[1], gx, gy,
+                                                _POLITICAS[policy], _HEURISTICAS.get(heuristic, 0),
+                                                _DESEMPATES[tie_break])
+
+    t0 = perf_counter()
+    visited = ParentMap(largura, altura)
+    if visited.denso:
+        visited.codigos = bytearray(codigos)
+    else:
+        visited.codigos.update(zip(ordem.tolist(), codigos[ordem].tolist()))
+    visited.ordem = array('l', ordem.astype(np.dtype('l')).tobytes())
+    path = _reconstruir(visited, g)
+
+    if stats is not None:
+        _registrar(stats, *contadores, perf_counter() - t0)
+
+    if policy in (G_ORDER, F_ORDER):
+        return path, visited, float(custo)
+    return path, visited, None
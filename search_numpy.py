@@ -0,0 +1,164 @@
+from collections.abc import Mapping
+from time import perf_counter
+
+from search import MOVIMENTOS, FIFO, _registrar
+from search_numba import cost_grid, PAREDE
+
+# Backend opcional da BFS em camadas (wavefront) com NumPy. Em vez de tirar um nó por vez de
+# uma deque, cada iteração gera a camada seguinte inteira: os vizinhos de todos os nós da
+# fronteira, menos paredes e células já visitadas. Cada célula guarda a camada e a direção
+# do movimento que a alcançou, e o caminho é reconstruído no fim seguindo essas direções.
+try:
+    import numpy as np
+    DISPONIVEL = True
+except ImportError:
+    DISPONIVEL = False
+
+
+class VisitadosGrade(Mapping):
+    """ Read-only view of the visited cells of a wavefront search, with the dict interface of the other algorithms.
+
+    Maps each visited cell to its parent cell (None for the start) without building a dict.
+    """
+
+    def __init__(self, camada, direcao, offsets, altura_pad):
+        self._camada = camada
+        self._direcao = direcao
+        self._offsets = offsets
+        self._altura_pad = altura_pad
+        self._indices = None
+
+    def _id(self, cell):
+        x, y = cell
+        return (x + 1) * self._altura_pad + (y + 1)
+
+    def _cell(self, i):
+        return (i // self._altura_pad - 1, i % self._altura_pad - 1)
+
+    def _visitados(self):
+        if self._indices is None:
+            self._indices = np.flatnonzero(self._camada >= 0)
+        return self._indices
+
+    def __len__(self):
+        return len(self._visitados())
+
+    def __iter__(self):
+        for i in self._visitados().tolist():
+            yield self._cell(i)
+
+    def __contains__(self, cell):
+        try:
+            x, y = cell
+        except (TypeError, ValueError):
+            return False
+        if x < 0 or y < 0 or y + 1 >= self._altura_pad:
+            return False
+        i = self._id(cell)
+        return i < len(self._camada) and self._camada[i] >= 0
+
+    def __getitem__(self, cell):
+        if cell not in self:
+            raise KeyError(cell)
+        i = self._id(cell)
+        k = self._direcao[i]
+        if k < 0:
+            return None
+        return self._cell(i - int(self._offsets[k]))
+
+
+def bfs_wavefront(level, stats=None, s=None, g=None):
+    """ Breadth-First Search that expands whole layers at once with NumPy.
+
+    Every layer is built from the neighbors of all the cells of the current one, using
+    vectorized indexing over a grid padded with walls. The path has the same length (number of
+    steps) as the one found by search.bfs, but ties may be broken differently.
+
+    Args:
+        level: A loaded level, containing walls, spaces, and waypoints.
+        stats: An optional dictionary that receives the search counters.
+        s: The source cell (level['start'] by default).
+        g: The goal cell (level['goal'] by default).
+
+    Returns:
+        The path from the start to the goal, a VisitadosGrade with the visited cells and their
+        parents, and None as cost (BFS ignores the edge costs).
+    """
+    s = level['start'] if s is None else s
+    g = level['goal'] if g is None else g
+    custos = cost_grid(level)
+    largura, altura = custos.shape
+
+    # Grade com uma borda de paredes, para os vizinhos nunca saírem do array
+    altura_pad = altura + 2
+    livre = np.zeros((largura + 2, altura_pad), bool)
+    livre[1:-1, 1:-1] = custos != PAREDE
+    livre = livre.ravel()
+
+    camada = np.full(livre.size, -1, np.int32)
+    direcao = np.full(livre.size, -1, np.int8)
+    offsets = np.array([dx * altura_pad + dy for dx, dy in MOVIMENTOS], np.int64)
+    movimentos = np.arange(len(MOVIMENTOS), dtype=np.int8)
+
+    inicio = (s[0] + 1) * altura_pad + (s[1] + 1)
+    objetivo = (g[0] + 1) * altura_pad + (g[1] + 1) if g in level['spaces'] else -1
+    camada[inicio] = 0
+
+    fronteira = np.array([inicio], np.int64)
+    expansoes = pops = 0
+    pushes = pico = 1
+    indice = 0
+
+    while fronteira.size and objetivo != inicio and (objetivo < 0 or camada[objetivo] < 0):
+        expansoes += fronteira.size
+        pops += fronteira.size
+
+        # vizinhos de toda a camada, na ordem (nó da fronteira, movimento)
+        candidatos = (fronteira[:, None] + offsets[None, :]).ravel()
+        ks = np.tile(movimentos, fronteira.size)
+        validos = livre[candidatos] & (camada[candidatos] < 0)
+        candidatos = candidatos[validos]
+        ks = ks[validos]
+
+        # uma célula alcançada por vários nós fica com a primeira ocorrência
+        novos, primeira = np.unique(candidatos, return_index=True)
+        indice += 1
+        camada[novos] = indice
+        direcao[novos] = ks[primeira]
+
+        fronteira = novos
+        pushes += novos.size
+        pico = max(pico, novos.size)
+
+    if objetivo >= 0 and camada[objetivo] >= 0:
+        pops += 1
+
+    t0 = perf_counter()
+    path = []
+    if objetivo >= 0 and camada[objetivo] >= 0:
+        atual = objetivo
+        while True:
+            path.append((atual // altura_pad - 1, atual % altura_pad - 1))
+            k = direcao[atual]
+            if k < 0:
+                break
+            atual -= int(offsets[k])
+        path.reverse()
+
+    visited = VisitadosGrade(camada, direcao, offsets, altura_pad)
+
+    if stats is not None:
+        _registrar(stats, expansoes, pushes, pops, pico, perf_counter() - t0)
+
+    return path, visited, None
+
+
+# Políticas que este backend implementa
+POLITICAS = (FIFO,)
+
+
+def best_first_search(level, policy, heuristic=None, stats=None, s=None, g=None):
+    """ Entry point used by plan(..., backend='numpy'); only the FIFO policy (bfs) is vectorized. """
+    if policy not in POLITICAS:
+        raise ValueError(f"O backend numpy não implementa a política {policy!r}")
+    return bfs_wavefront(level, stats, s, g)
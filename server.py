@@ -1,12 +1,22 @@
 import os
-from flask import Flask, render_template, request, jsonify
-from search import plan
+import argparse
+from flask import Flask, Response, render_template, request, jsonify
+from search import plan, update_level
+from metrics import SearchMetrics
+import profiling
+from worker_pool import PlanPool, PoolCheio, TempoEsgotado
 
 app = Flask(__name__)
 
 # Directory containing the text files
 maps_directory = 'maps'
 
+# Process pool used in production mode; None runs plan on the request thread
+plan_pool = None
+
+# Statistics of every search answered by this server, exposed in /metrics
+search_metrics = SearchMetrics()
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -51,9 +61,17 @@ def start_search():
         map = request.args.get('map')
         alg = request.args.get('alg')
         heuristic = request.args.get('heuristic')
+        profile = request.args.get('profile') == '1'
 
         # Plan the path
-        path, path_cost, visited = plan(map, alg, heuristic)
+        if plan_pool is None:
+            path, path_cost, visited, stats = plan(map, alg, heuristic, stats=True, profile=profile)
+        elif profile:
+            # Profiled searches also respect the pool limits; the profile comes back to this process
+            path, path_cost, visited, stats = plan_pool.profile(map, alg, heuristic, stats=True)
+        else:
+            path, path_cost, visited, stats = plan_pool.plan(map, alg, heuristic, stats=True)
+        search_metrics.observe(alg, heuristic, stats)
         print("Number of visited nodes:", len(visited))
         print("Path length:", len(path))
         print("Path cost:", path_cost)
@@ -68,6 +86,34 @@ def start_search():
 
         return response
 
+    except PoolCheio as e:
+        return jsonify({'result': 'error', 'error_details': str(e)}), 429
+    except TempoEsgotado as e:
+        return jsonify({'result': 'error', 'error_details': str(e)}), 504
+    except Exception as e:
+        return jsonify({'result': 'error', 'error_details': str(e)}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(search_metrics.export(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/profile', methods=['GET'])
+def profile():
+    try:
+        alg = request.args.get('alg')
+        heuristic = request.args.get('heuristic')
+        output = request.args.get('format', 'text')
+
+        stats = profiling.REGISTRY.get(alg, heuristic)
+        if stats is None:
+            return jsonify({'result': 'error', 'error_details': 'No profile for this algorithm'}), 404
+
+        if output == 'collapsed':
+            return Response('\n'.join(profiling.collapsed_stacks(stats)) + '\n', mimetype='text/plain')
+        if output == 'export':
+            return jsonify({'result': 'success', 'files': profiling.export(profiling.REGISTRY)})
+        return Response(profiling.summary(stats), mimetype='text/plain')
+
     except Exception as e:
         return jsonify({'result': 'error', 'error_details': str(e)}), 500
 
@@ -78,10 +124,24 @@ def save_map():
         map_name = request.args.get('map_name')
         map_data = request.args.get('map')
 
+        caminho = f'{maps_directory}/{map_name}.txt'
+        old_data = None
+        if os.path.exists(caminho):
+            with open(caminho, 'r') as file:
+                old_data = file.read()
+
         # Write the content to a file
-        with open(f'{maps_directory}/{map_name}.txt', 'w') as file:
+        with open(caminho, 'w') as file:
             file.write(map_data)
 
+        # The connected components of the edited map are updated from the old ones, in the
+        # process whose cache serves the searches
+        if old_data is not None:
+            if plan_pool is None:
+                update_level(old_data, map_data)
+            else:
+                plan_pool.update_level(old_data, map_data)
+
         response = jsonify({'result': 'success'})
         response.headers.add("Access-Control-Allow-Origin", "*")
 
@@ -92,5 +152,30 @@ def save_map():
 
 
 if __name__ == '__main__':
-    # Use the SSL context for HTTPS
-    app.run(host="0.0.0.0", port="5001", debug=True)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--production', action='store_true',
+                        help='serves with waitress and runs searches in a bounded process pool')
+    parser.add_argument('--workers', type=int, default=None, help='parallel searches (default: CPU count)')
+    parser.add_argument('--queue', type=int, default=16, help='searches waiting for a worker before 429')
+    parser.add_argument('--timeout', type=float, default=30.0, help='time limit per search, in seconds')
+    args = parser.parse_args()
+
+    if args.production:
+        try:
+            from waitress import serve
+        except ImportError:
+            raise SystemExit("O modo --production precisa do waitress: pip install waitress")
+
+        # The CPU-bound work runs in other processes, so the request threads only wait on
+        # pipes (releasing the GIL) and endpoints like /get_maps keep answering under load.
+        # Waitress serves from a single process, so the pool limits hold for the whole server;
+        # it gets one thread per search the pool admits plus a few for the other endpoints.
+        plan_pool = PlanPool(args.workers, args.queue, args.timeout)
+        try:
+            serve(app, host="0.0.0.0", port=args.port, threads=plan_pool.max_workers + plan_pool.max_queue + 4)
+        finally:
+            plan_pool.close()
+    else:
+        # Use the SSL context for HTTPS
+        app.run(host="0.0.0.0", port=args.port, debug=True)
@@ -0,0 +1,34 @@
+// Fetches and decodes search results off the main thread.
+//
+// The response of /start_search can hold millions of visited cells; parsing that JSON and
+// walking the nested arrays would freeze the page. Here the cells are flattened into
+// Int32Arrays ([x0, y0, x1, y1, ...]) that are transferred back to the page without copying.
+
+function flatten(cells) {
+    let coords = new Int32Array(cells.length * 2);
+    for (let i = 0; i < cells.length; i++) {
+        coords[2*i] = cells[i][0];
+        coords[2*i + 1] = cells[i][1];
+    }
+    return coords;
+}
+
+onmessage = function(event) {
+    let id = event.data.id;
+
+    fetch(event.data.url)
+    .then(response => response.json())
+    .then(data => {
+        if (data.result != 'success') {
+            postMessage({id: id, result: 'error', error_details: data.error_details});
+            return;
+        }
+
+        let path = flatten(data.path);
+        let visited = flatten(data.visited);
+        postMessage({id: id, result: 'success', path: path, visited: visited}, [path.buffer, visited.buffer]);
+    })
+    .catch(error => {
+        postMessage({id: id, result: 'error', error_details: String(error)});
+    });
+};
@@ -10,11 +10,25 @@ let isCPressed = false;
 let init = null;
 let end = null;
 
-let path = [];
-let visited = [];
+// Path and visited cells as flat [x0, y0, x1, y1, ...] arrays, decoded by decoder_worker.js
+let path = new Int32Array(0);
+let visited = new Int32Array(0);
 let maps = [];
 let world = [];
 
+// Offscreen buffers: the map is drawn once (and again only when it changes), the search
+// result is drawn on top of it a slice at a time, so big maps never redraw every cell per frame
+const CELLS_PER_FRAME = 50000;
+let mapLayer = null;
+let resultLayer = null;
+let mapColumnsDrawn = 0;
+let visitedDrawn = 0;
+let pathDrawn = false;
+
+// Results are decoded off the main thread; searchId discards answers that arrive after the map changed
+let decoder = null;
+let searchId = 0;
+
 function getMaps()  {
     // Construct the URL with the message as a query parameter
     var url = 'http://localhost:5001/get_maps';
@@ -37,32 +51,53 @@ function startSearch() {
     }
     
     let map = worldToMap();
-    console.log(map);
     let alg = document.getElementById('search').value;
     let heuristic = document.getElementById('heuristic').value;
 
     // Construct the URL with parameters
     var url = `http://localhost:5001/start_search?map=${encodeURIComponent(map)}&alg=${encodeURIComponent(alg)}&heuristic=${encodeURIComponent(heuristic)}`;
 
-    // Make a GET request to the server
-    fetch(url)
-    .then(response => response.json())
-    .then(data => {
-        console.log(data);
-        // Process the response from the server
-        path = data.path;
-        visited = data.visited;
-    })
-    .catch(error => {
-        console.error('Error:', error);
-    });
+    // The worker makes the GET request and decodes the response
+    clearResult();
+    decoder.postMessage({id: searchId, url: url});
+}
+
+function onSearchResult(event) {
+    let data = event.data;
+    if (data.id != searchId) {
+        return;
+    }
+
+    if (data.result != 'success') {
+        console.error('Error:', data.error_details);
+        return;
+    }
+
+    console.log(`Visited: ${data.visited.length / 2}, path length: ${data.path.length / 2}`);
+    path = data.path;
+    visited = data.visited;
+}
+
+function clearResult() {
+    searchId++;
+    path = new Int32Array(0);
+    visited = new Int32Array(0);
+    visitedDrawn = 0;
+    pathDrawn = false;
+    if (resultLayer != null) {
+        resultLayer.clear();
+    }
+}
+
+function invalidateMap() {
+    mapColumnsDrawn = 0;
 }
 
 function startMap() {
     init = null;
     end = null;
-    path = [];
-    visited = []
+    clearResult();
+    invalidateMap();
 
     let mapW = Math.floor(w/s);
     let mapH = Math.floor(h/s);
@@ -101,17 +136,18 @@ function loadMaps(data)  {
 }
 
 function loadMap(selectedMap) {
-    let mapH = selectedMap.split('\n').length - 1; 
-    let mapW = selectedMap.split('\n')[0].length;
+    let lines = selectedMap.split('\n');
+    let mapH = lines.length - 1;
+    let mapW = lines[0].length;
+
+    clearResult();
+    invalidateMap();
 
-    path = [];
-    visited = []
-    
     world = new Array(mapW);
     for (let i = 0; i < mapW; i++) {
         world[i] = new Array(mapH);
         for (let j = 0; j < mapH; j++) {
-            world[i][j] = selectedMap.split('\n')[j][i];
+            world[i][j] = lines[j][i];
 
             if (world[i][j] == 'S') {
                 init = createVector(i, j);
@@ -122,7 +158,8 @@ function loadMap(selectedMap) {
         }
     }
 
-    s = Math.floor(w/mapW) > Math.floor(h/mapH) ? Math.floor(h/mapH) : Math.floor(w/mapW);
+    // maps larger than the canvas get cells smaller than a pixel instead of a zero scale
+    s = Math.max(Math.min(Math.floor(w/mapW), Math.floor(h/mapH)), Math.min(w/mapW, h/mapH));
     document.getElementById('scaleMap').value = s;
 }
 
@@ -138,6 +175,11 @@ function setup() {
     // Create canvas
     let mapCanvas = createCanvas(w, h);
     mapCanvas.parent("mapCanvas");
+    mapLayer = createGraphics(w, h);
+    resultLayer = createGraphics(w, h);
+
+    decoder = new Worker('/static/decoder_worker.js');
+    decoder.onmessage = onSearchResult;
 
     // Config inputs
     document.getElementById('scaleMap').value = s;
@@ -180,69 +222,113 @@ function updateCost() {
     cost = document.getElementById('cost').value;
 }
 
+function setCellStyle(layer, value) {
+    // grid lines only when the cells are big enough to see them
+    if (s >= 4) {
+        layer.stroke(240);
+    }
+    else {
+        layer.noStroke();
+    }
+
+    if(value == 'X') {
+        layer.fill(80);
+    }
+    else if(value == '1' || value == 'S' || value == 'G') {
+        layer.fill(255);
+    }
+    else {
+        let cellValue = parseInt(value);
+        let mapColor = map(cellValue, 2, 9, 100, 200);
+        layer.fill(mapColor, 20, 0, mapColor);
+    }
+}
+
+function redrawCell(x, y) {
+    // cells beyond mapColumnsDrawn are still waiting to be drawn with the rest of the map
+    if (x < mapColumnsDrawn) {
+        setCellStyle(mapLayer, world[x][y]);
+        mapLayer.rect(x*s, y*s, s, s);
+    }
+}
+
+function drawMapSlice() {
+    if (mapColumnsDrawn == 0) {
+        mapLayer.background(255);
+    }
+
+    let columns = Math.max(1, Math.floor(CELLS_PER_FRAME / world[0].length));
+    let last = Math.min(world.length, mapColumnsDrawn + columns);
+    for(let i = mapColumnsDrawn; i < last; i++) {
+        for(let j = 0; j < world[0].length; j++) {
+            setCellStyle(mapLayer, world[i][j]);
+            mapLayer.rect(i*s, j*s, s, s);
+        }
+    }
+    mapColumnsDrawn = last;
+}
+
+function drawResultSlice() {
+    if (s >= 4) {
+        resultLayer.stroke(240);
+    }
+    else {
+        resultLayer.noStroke();
+    }
+
+    // draw visited, a slice per frame in the order they were expanded
+    let last = Math.min(visited.length, visitedDrawn + 2*CELLS_PER_FRAME);
+    resultLayer.fill(196, 166, 60, 80);
+    for(let k = visitedDrawn; k < last; k += 2) {
+        resultLayer.rect(visited[k]*s, visited[k + 1]*s, s, s);
+    }
+    visitedDrawn = last;
+
+    // draw path, once every visited cell is on screen
+    if(!pathDrawn && visitedDrawn == visited.length && path.length > 0) {
+        resultLayer.fill(200);
+        for(let k = 0; k < path.length; k += 2) {
+            resultLayer.rect(path[k]*s, path[k + 1]*s, s, s);
+        }
+        pathDrawn = true;
+    }
+}
+
 function draw() {
     clear();
     
     background(255);
-    stroke(240);
 
     if(world[0] == null){
         return;
     }
 
-    for(let i = 0; i < world.length; i++) {
-        for(let j = 0; j < world[0].length; j++) {
-            if(world[i][j] == 'X') {
-                fill(80); 
-            }
-            else {
-                if(world[i][j] == '1') {
-                    fill(255);
-                }
-                else {
-                    let cellValue = parseInt(world[i][j]);
-                    let mapColor = map(cellValue, 2, 9, 100, 200);
-                    fill(mapColor, 20, 0, mapColor);
-                }
-            }
-
-            rect(i*s, j*s, s, s);
-        }
+    if(mapColumnsDrawn < world.length) {
+        drawMapSlice();
     }
+    drawResultSlice();
 
-    // draw visited
-    if(visited.length > 0) {
-        for(let n of visited) {
-            fill(196, 166, 60, 80);
-            rect(n[0]*s, n[1]*s, s, s);
-        }
-    }
+    image(mapLayer, 0, 0);
+    image(resultLayer, 0, 0);
 
-    // draw path
-    if(path.length > 0) {
-        for(let n of path) {
-            fill(200);
-            rect(n[0]*s, n[1]*s, s, s);
-        }
+    stroke(240);
+
+    // draw init
+    if(init != null) {
+        fill(130, 151, 199);
+        rect(init.x*s, init.y*s, s, s);
     }
 
-        // draw init
-        if(init != null) {
-            fill(130, 151, 199);
-            rect(init.x*s, init.y*s, s, s);
-        }
-    
-        // draw end
-        if(end != null) {
-            fill(100, 252, 80);
-            rect(end.x*s, end.y*s, s, s);
-        }
-    
+    // draw end
+    if(end != null) {
+        fill(100, 252, 80);
+        rect(end.x*s, end.y*s, s, s);
+    }
 }
 
 function worldToMap() {
-    let mapW = Math.floor(w/s);
-    let mapH = Math.floor(h/s);
+    let mapW = world.length;
+    let mapH = world[0].length;
 
     let map = '';
     for(let i = 0; i < mapH; i++) {
@@ -315,19 +401,19 @@ function mousePressed() {
             world[x][y] = 'S';
             if(init != null) {
                 world[init.x][init.y] = '1';
+                redrawCell(init.x, init.y);
             }
             init = createVector(x, y);
-            path = [];
-            visited = [];
+            clearResult();
         }
         else if (isGPressed) {
             world[x][y] = 'G';
             if(end != null) {
                 world[end.x][end.y] = '1';
+                redrawCell(end.x, end.y);
             }
             end = createVector(x, y);
-            path = [];
-            visited = [];
+            clearResult();
         }
         else {
             if(world[x][y] == 'X') {
@@ -341,10 +427,10 @@ function mousePressed() {
                     world[x][y] = 'X';
                 }
 
-                path = [];
-                visited = [];
+                clearResult();
             }
         }
+        redrawCell(x, y);
     }
 }
 
@@ -363,10 +449,10 @@ function mouseDragged() {
         else {
             if (world[x][y] != 'S' && world[x][y] != 'G') {
                 world[x][y] = 'X';
-                path = [];
-                visited = [];
+                clearResult();
             }
         }
+        redrawCell(x, y);
     }
 }
 
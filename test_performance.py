@@ -0,0 +1,171 @@
+import os
+import json
+import platform
+import statistics
+from datetime import datetime, timezone
+from heapq import heappush, heappop
+from time import perf_counter
+
+import pytest
+from benchmark import medir
+from gerador_mapas import gerar_mapa
+
+# Testes de desempenho: além do resultado, cada busca tem orçamentos de expansões, de pico de
+# memória (tracemalloc) e de tempo. O tempo é normalizado pelo de um laço de calibração com as
+# mesmas operações das buscas (heap e dicionário), então os orçamentos valem em máquinas mais
+# lentas ou mais rápidas. O tempo também é comparado com a mediana das últimas execuções do
+# histórico de referência em JSON, versionado junto com o código; uma execução só é acrescentada
+# a ele quando GRAVAR_HISTORICO_DESEMPENHO está definida. Os testes têm o marcador perf e só
+# rodam com pytest -m perf.
+
+pytestmark = pytest.mark.perf
+
+MAPS = "maps"
+
+HISTORICO = os.environ.get("HISTORICO_DESEMPENHO", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                  "performance_history.json"))
+GRAVAR_HISTORICO = bool(os.environ.get("GRAVAR_HISTORICO_DESEMPENHO"))
+TAMANHO_HISTORICO = 50      # execuções guardadas no arquivo
+JANELA_HISTORICO = 5        # execuções usadas na mediana de comparação
+TOLERANCIA_HISTORICO = 1.0  # tempo normalizado até (1 + tolerância) vezes a mediana
+
+# Orçamentos por caso: expansões (exatas, a busca é determinística), memória em KiB e tempo
+# normalizado (None nos mapas pequenos, em que a medida é dominada por ruído). Memória e tempo
+# têm folga de 1,5x e 3x sobre o valor medido quando foram definidos.
+CASOS_DESEMPENHO = {
+    "mapa3_barreira": {
+        "bfs": {"Expansões": 651, "Memória (KiB)": 13, "Tempo": None},
+        "ucs": {"Expansões": 653, "Memória (KiB)": 20, "Tempo": None},
+        "greedy": {"Expansões": 386, "Memória (KiB)": 10, "Tempo": None},
+        "astar": {"Expansões": 531, "Memória (KiB)": 25, "Tempo": None},
+    },
+    "mapa26_labirinto_complexo": {
+        "bfs": {"Expansões": 934, "Memória (KiB)": 17, "Tempo": None},
+        "ucs": {"Expansões": 933, "Memória (KiB)": 32, "Tempo": None},
+        "greedy": {"Expansões": 671, "Memória (KiB)": 16, "Tempo": None},
+        "astar": {"Expansões": 887, "Memória (KiB)": 32, "Tempo": None},
+    },
+    "aberto_150": {
+        "bfs": {"Expansões": 22200, "Memória (KiB)": 318, "Tempo": 2.4},
+        "ucs": {"Expansões": 22492, "Memória (KiB)": 583, "Tempo": 3.45},
+        "astar": {"Expansões": 147, "Memória (KiB)": 352, "Tempo": None},
+    },
+    "labirinto_151": {
+        "bfs": {"Expansões": 4106, "Memória (KiB)": 105, "Tempo": 0.23},
+        "ucs": {"Expansões": 4107, "Memória (KiB)": 352, "Tempo": 0.3},
+        "greedy": {"Expansões": 2898, "Memória (KiB)": 93, "Tempo": 0.33},
+        "astar": {"Expansões": 4072, "Memória (KiB)": 352, "Tempo": 0.36},
+    },
+    "obstaculos_150": {
+        "ucs": {"Expansões": 15752, "Memória (KiB)": 496, "Tempo": 1.85},
+        "astar": {"Expansões": 3570, "Memória (KiB)": 410, "Tempo": 0.61},
+    },
+}
+
+HEURISTICAS = {"bfs": None, "ucs": None, "greedy": "euclidian", "astar": "euclidian"}
+
+
+def calibrar(repeticoes=5):
+    """ Returns the best time, in seconds, of a fixed loop of heap and dictionary operations. """
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = perf_counter()
+        fila, vistos = [], {}
+        for i in range(50000):
+            heappush(fila, ((i * 7919) % 1000, i))
+            vistos[(i, i)] = i
+        while fila:
+            heappop(fila)
+        melhor = min(melhor, perf_counter() - t0)
+    return melhor
+
+
+def carregar_caso(nome):
+    """ Returns the map of a case: a file of maps/ or a generated map named tipo_lado. """
+    caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+    if os.path.exists(caminho_arquivo):
+        with open(caminho_arquivo, "r") as f:
+            return f.read()
+    tipo, _, lado = nome.rpartition("_")
+    if not lado.isdigit():
+        pytest.skip(f"Mapa {nome} não encontrado")
+    return gerar_mapa(tipo, int(lado), int(lado), seed=0)
+
+
+def carregar_historico(caminho):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, "r") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def execucao():
+    """ Calibrates once per module; the measurements of this run are appended to the history only
+    with GRAVAR_HISTORICO_DESEMPENHO set. """
+    historico = carregar_historico(HISTORICO)
+    atual = {
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "calibracao_ms": round(calibrar() * 1000, 3),
+        "resultados": {},
+    }
+    yield atual, historico
+
+    if GRAVAR_HISTORICO and atual["resultados"]:
+        historico = (historico + [atual])[-TAMANHO_HISTORICO:]
+        with open(HISTORICO, "w") as f:
+            json.dump(historico, f, indent=2, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("nome,algoritmo", [(nome, algoritmo) for nome, orcamentos in CASOS_DESEMPENHO.items()
+                                            for algoritmo in orcamentos])
+def test_orcamentos_desempenho(nome, algoritmo, execucao):
+    atual, historico = execucao
+    mapa_str = carregar_caso(nome)
+    orcamento = CASOS_DESEMPENHO[nome][algoritmo]
+
+    r = medir(mapa_str, algoritmo, HEURISTICAS[algoritmo], repeticoes=3, aquecimento=1)
+    tempo = r["Tempo (ms)"] / atual["calibracao_ms"]
+    chave = f"{nome}/{algoritmo}"
+    atual["resultados"][chave] = {"Expansões": r["Expansões"], "Memória (KiB)": r["Memória (KiB)"],
+                                  "Tempo": round(tempo, 4)}
+
+    print(f"\n{chave}: {r['Expansões']} expansões, {r['Memória (KiB)']} KiB, tempo normalizado {tempo:.4f}")
+
+    assert r["Expansões"] <= orcamento["Expansões"]
+    assert r["Memória (KiB)"] <= orcamento["Memória (KiB)"]
+    if orcamento["Tempo"] is not None:
+        assert tempo <= orcamento["Tempo"]
+
+        anteriores = [e["resultados"][chave]["Tempo"] for e in historico if chave in e["resultados"]]
+        if anteriores:
+            mediana = statistics.median(anteriores[-JANELA_HISTORICO:])
+            assert tempo <= mediana * (1 + TOLERANCIA_HISTORICO)
+
+
+def test_delta_stepping_mais_rapido_que_ucs():
+    """ With more than one core, parallel delta-stepping beats the sequential ucs end to end. """
+    import delta_stepping
+    from search import plan, load_level
+
+    workers = min(os.cpu_count() or 1, 4)
+    if workers < 2:
+        pytest.skip("delta-stepping só fica mais rápido que a ucs com mais de um núcleo")
+
+    mapa_str = gerar_mapa("aberto", 400, 400, seed=0)
+    level = load_level(mapa_str)
+    # a primeira chamada inicia o pool e copia a grade para a memória compartilhada
+    delta_stepping.delta_stepping(level, workers=workers)
+
+    t0 = perf_counter()
+    _, custo, _ = plan(mapa_str, "ucs")
+    tempo_ucs = perf_counter() - t0
+
+    t0 = perf_counter()
+    _, _, custo_delta = delta_stepping.delta_stepping(level, workers=workers)
+    tempo_delta = perf_counter() - t0
+
+    print(f"\nucs {tempo_ucs:.2f} s | delta-stepping com {workers} workers {tempo_delta:.2f} s")
+    assert custo_delta == custo
+    assert tempo_delta < tempo_ucs
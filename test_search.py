@@ -1,6 +1,6 @@
 import os
 import pytest
-from search import parse_level, cost_function, transition_model, bfs, path_cost, dfs, ucs, h_euclidian, h_manhattan, greedy_best_first, a_star
+from search import plan, parse_level, cost_function, transition_model, neighbors, bfs, path_cost, dfs, ucs, h_euclidian, h_manhattan, greedy_best_first, a_star, best_first_search, G_ORDER, F_ORDER, ParentMap, load_level, update_level
 
 MAPS_BASIC = "maps_basic"
 MAPS = "maps"
@@ -423,3 +423,694 @@ def test_a_star(nome, dados):
     assert tamanho_ok, f"Tamanho {resultados['Tamanho']} != {esperado['Tamanho']}"
     assert custo_ok, f"Custo {resultados['Custo']:.2f} != {esperado['Custo']:.2f}"
 
+
+
+@pytest.mark.parametrize("algoritmo, heuristica", [("bfs", None), ("dfs", None), ("ucs", None), ("greedy", "euclidian"), ("astar", "euclidian")])
+def test_plan_stats(algoritmo, heuristica):
+    caminho_arquivo = os.path.join(MAPS, "mapa7_custo.txt")
+    if not os.path.exists(caminho_arquivo):
+        pytest.skip("Mapa mapa7_custo não encontrado")
+
+    with open(caminho_arquivo, "r") as f:
+        mapa_str = f.read()
+
+    path, custo, visited = plan(mapa_str, algoritmo, heuristica)
+    path_s, custo_s, visited_s, stats = plan(mapa_str, algoritmo, heuristica, stats=True)
+
+    print(f"\n{algoritmo}: {stats}")
+
+    # As estatísticas não podem mudar o resultado da busca
+    assert path_s == path and custo_s == custo and len(visited_s) == len(visited)
+
+    assert set(stats["timings"]) == {"parse", "precompute", "search", "reconstruction", "path_cost", "total"}
+    assert 0 < stats["expansions"] <= stats["pops"] <= stats["pushes"]
+    assert stats["peak_frontier"] <= stats["pushes"]
+
+    # O pico de memória só é medido quando pedido, com o tracemalloc
+    assert "peak_memory" not in stats
+    path_m, _, _, stats_m = plan(mapa_str, algoritmo, heuristica, stats=True, memory=True)
+    assert path_m == path and stats_m["expansions"] == stats["expansions"]
+    assert stats_m["peak_memory"] > 0
+
+
+@pytest.mark.parametrize("nome", ["mapa1_aberto", "mapa3_barreira", "mapa7_custo"])
+def test_kernel_custo_rastreado(nome):
+    caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+    if not os.path.exists(caminho_arquivo):
+        pytest.skip(f"Mapa {nome} não encontrado")
+
+    with open(caminho_arquivo, "r") as f:
+        mapa_str = f.read()
+
+    level = parse_level(mapa_str)
+    start, goal = level['start'], level['goal']
+
+    # Os vizinhos sem custo devem ser os mesmos do transition_model, na mesma ordem
+    for estado in list(level['spaces'])[:50]:
+        assert neighbors(level, estado) == [v for v, _ in transition_model(level, estado)]
+
+    # O custo devolvido pelo kernel é o g do objetivo, igual ao recalculado por path_cost
+    for policy, h in [(G_ORDER, None), (F_ORDER, h_euclidian), (F_ORDER, h_manhattan)]:
+        path, visited, custo = best_first_search(start, goal, level, transition_model, policy, h)
+        print(f"\n{nome} {policy}: custo {custo:.2f}, path_cost {path_cost(path, level):.2f}")
+        assert custo == path_cost(path, level)
+
+
+@pytest.mark.parametrize("algoritmo, heuristica", [("bfs", None), ("dfs", None), ("ucs", None), ("greedy", "euclidian"), ("greedy", "manhattan"), ("astar", "euclidian"), ("astar", "manhattan")])
+def test_backend_numba(algoritmo, heuristica):
+    pytest.importorskip("numba")
+
+    for nome in ["mapa1_aberto", "mapa3_barreira", "mapa7_custo", "mapa26_labirinto_complexo"]:
+        caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+        if not os.path.exists(caminho_arquivo):
+            continue
+
+        with open(caminho_arquivo, "r") as f:
+            mapa_str = f.read()
+
+        path, custo, visited = plan(mapa_str, algoritmo, heuristica)
+        path_n, custo_n, visited_n = plan(mapa_str, algoritmo, heuristica, backend="numba")
+
+        print(f"\n{nome} {algoritmo}: visitados {len(visited)} | numba {len(visited_n)}")
+
+        # O backend compilado deve reproduzir exatamente a busca em Python
+        assert path_n == path
+        assert custo_n == custo
+        assert visited_n == visited
+        assert list(visited_n) == list(visited)
+
+        # Outra consulta no mesmo nível reaproveita a grade de custos guardada nele
+        grade = load_level(mapa_str)['cost_grid'][1]
+        start = list(visited)[-1]
+        assert plan(mapa_str, algoritmo, heuristica, backend="numba", start=start)[:2] == \
+            plan(mapa_str, algoritmo, heuristica, start=start)[:2]
+        assert load_level(mapa_str)['cost_grid'][1] is grade
+
+
+@pytest.mark.parametrize("nome, dados", TESTES_BFS.items())
+def test_bfs_wavefront(nome, dados):
+    pytest.importorskip("numpy")
+
+    caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+    if not os.path.exists(caminho_arquivo):
+        pytest.skip(f"Mapa {nome} não encontrado")
+
+    with open(caminho_arquivo, "r") as f:
+        mapa_str = f.read()
+
+    path, custo, visited = plan(mapa_str, "bfs", backend="numpy")
+
+    print(f"\nTeste {nome} (BFS wavefront):")
+    print("Tamanho caminho:", len(path), "| Esperado:", dados["esperado"]["Tamanho"])
+
+    # Mesmo número de passos da BFS, com um caminho contínuo entre S e G
+    assert len(path) == dados["esperado"]["Tamanho"]
+    for a, b in zip(path, path[1:]):
+        assert max(abs(a[0] - b[0]), abs(a[1] - b[1])) == 1
+        assert visited[b] == a
+
+
+@pytest.mark.parametrize("algoritmo, heuristica", [("ucs", None), ("astar", "euclidian"), ("astar", "manhattan")])
+def test_fronteira_baldes(algoritmo, heuristica):
+    for nome in ["mapa1_aberto", "mapa3_barreira", "mapa7_custo", "mapa23_custo_engana"]:
+        caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+        if not os.path.exists(caminho_arquivo):
+            continue
+
+        with open(caminho_arquivo, "r") as f:
+            mapa_str = f.read()
+
+        path, custo, visited = plan(mapa_str, algoritmo, heuristica)
+        path_b, custo_b, visited_b = plan(mapa_str, algoritmo, heuristica, frontier="buckets")
+
+        print(f"\n{nome} {algoritmo}: visitados {len(visited)} | baldes {len(visited_b)}")
+
+        # A fila em baldes deve retirar os nós na mesma ordem do heap
+        assert path_b == path
+        assert custo_b == custo
+        assert visited_b == visited
+
+
+@pytest.mark.parametrize("algoritmo, heuristica", [("ucs", None), ("astar", "euclidian")])
+def test_fronteira_baldes_sem_reordenar(algoritmo, heuristica):
+    from time import perf_counter
+    from gerador_mapas import gerar_mapa
+
+    mapa_str = gerar_mapa("obstaculos", 200, 200, seed=0)
+
+    def medir(frontier):
+        plan(mapa_str, algoritmo, heuristica, frontier=frontier)
+        tempos = []
+        for _ in range(3):
+            t0 = perf_counter()
+            resultado = plan(mapa_str, algoritmo, heuristica, stats=True, frontier=frontier)
+            tempos.append(perf_counter() - t0)
+        return min(tempos), resultado
+
+    tempo_heap, (path, custo, visited, stats) = medir("heap")
+    tempo_baldes, (path_b, custo_b, visited_b, stats_b) = medir("buckets")
+    print(f"\n{algoritmo}: heap {tempo_heap * 1000:.1f} ms | baldes {tempo_baldes * 1000:.1f} ms")
+
+    # As entradas são as do heap, então até os contadores da busca são os mesmos
+    assert (path_b, custo_b, visited_b) == (path, custo, visited)
+    for contador in ("expansions", "pushes", "pops", "peak_frontier"):
+        assert stats_b[contador] == stats[contador]
+
+    # As inserções no balde aberto não reordenam o balde: os baldes não ficam mais lentos que o
+    # heap (a folga só cobre o ruído da medição; reordenar o balde deixava o A* 15x mais lento)
+    assert tempo_baldes <= 1.5 * tempo_heap
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_delta_stepping(workers, monkeypatch):
+    import delta_stepping
+
+    # força a divisão entre os processos mesmo nos mapas pequenos
+    monkeypatch.setattr(delta_stepping, "LIMIAR_PARALELO", 1)
+
+    for nome in ["mapa1_aberto", "mapa7_custo", "mapa23_custo_engana"]:
+        caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+        if not os.path.exists(caminho_arquivo):
+            continue
+
+        with open(caminho_arquivo, "r") as f:
+            mapa_str = f.read()
+
+        level = parse_level(mapa_str)
+        path, custo, _ = plan(mapa_str, "ucs")
+        path_d, _, custo_d = delta_stepping.delta_stepping(level, workers=workers)
+
+        print(f"\n{nome} (workers={workers}): custo ucs {custo:.2f} | delta-stepping {custo_d:.2f}")
+
+        # Mesma distância da ucs, por um caminho de custo igual
+        assert custo_d == custo
+        assert path_d[0] == level["start"] and path_d[-1] == level["goal"]
+        assert path_cost(path_d, level) == custo
+
+        # O resultado não depende de quantos workers dividem as colunas
+        path_1, visited_1, _ = delta_stepping.delta_stepping(level, workers=1)
+        visited_d = delta_stepping.delta_stepping(level, workers=workers)[1]
+        assert path_d == path_1
+        assert list(visited_d.items()) == list(visited_1.items())
+
+
+@pytest.mark.parametrize("algoritmo, heuristica", [("bfs", None), ("ucs", None), ("astar", "manhattan")])
+def test_mapa_em_tiles(algoritmo, heuristica, tmp_path):
+    from tiles import converter_mapa, carregar_nivel, plan_tiles
+
+    for nome in ["mapa1_aberto", "mapa3_barreira", "mapa7_custo"]:
+        caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+        if not os.path.exists(caminho_arquivo):
+            continue
+
+        with open(caminho_arquivo, "r") as f:
+            mapa_str = f.read()
+
+        # tiles pequenos e um cache de um tile só, para forçar leituras do disco
+        pasta = tmp_path / nome
+        converter_mapa(caminho_arquivo, pasta, tamanho=4)
+        level = carregar_nivel(pasta, memoria=16)
+
+        assert dict(level["spaces"]) == parse_level(mapa_str)["spaces"]
+        assert plan_tiles(pasta, algoritmo, heuristica, memoria=16) == plan(mapa_str, algoritmo, heuristica)
+
+
+def test_parent_map():
+    visited = ParentMap(4, 3)
+    visited[(1, 1)] = None
+    visited[(2, 2)] = (1, 1)
+    visited[(0, 1)] = (1, 1)
+    visited[(2, 2)] = (1, 2)  # trocar o pai mantém a posição na ordem
+
+    # Mesma interface e ordem de um dicionário de pais
+    assert list(visited) == [(1, 1), (2, 2), (0, 1)]
+    assert dict(visited) == {(1, 1): None, (2, 2): (1, 2), (0, 1): (1, 1)}
+    assert visited == {(1, 1): None, (2, 2): (1, 2), (0, 1): (1, 1)}
+    assert (3, 2) not in visited and (-1, 0) not in visited and (9, 9) not in visited
+    with pytest.raises(KeyError):
+        visited[(3, 2)]
+
+    # Um byte por célula da grade
+    assert len(visited.codigos) == 12
+
+    # Grades grandes só guardam as células alcançadas
+    grande = ParentMap(20000, 20000)
+    grande[(15000, 2)] = None
+    grande[(15001, 3)] = (15000, 2)
+    assert not grande.denso and len(grande.codigos) == 2
+    assert grande == {(15000, 2): None, (15001, 3): (15000, 2)}
+    assert (0, 0) not in grande and len(grande.codigos) == 2
+
+
+def test_componentes_conexas():
+    mapa = "S1X11\n11X11\n11X1G\n"
+    level = load_level(mapa)
+
+    # A parede separa S de G: plan responde sem buscar
+    assert not level["components"].connected(level["start"], level["goal"])
+    path, custo, visited, stats = plan(mapa, "bfs", stats=True)
+    assert path == [] and len(visited) == 0 and stats["expansions"] == 0
+
+    # Abrir uma célula da parede junta as componentes; fechá-la de novo as separa
+    aberto = "S1X11\n11111\n11X1G\n"
+    update_level(mapa, aberto)
+    assert load_level(aberto)["components"].connected((0, 0), (4, 2))
+    assert len(plan(aberto, "bfs")[0]) == 5
+
+    update_level(aberto, mapa)
+    assert not load_level(mapa)["components"].connected((0, 0), (4, 2))
+
+
+def _mapas_em_cache():
+    import search
+    return list(search._niveis)
+
+
+def test_pool_atualiza_cache_dos_workers():
+    from worker_pool import PlanPool
+
+    mapa = "S1X11\n11X11\n11X1G\n"
+    aberto = "S1X11\n11111\n11X1G\n"
+    pool = PlanPool(max_workers=1)
+    try:
+        # O worker continua vivo entre as buscas e guarda o nível em cache
+        assert pool.plan(mapa, "bfs")[0] == []
+        assert pool._submeter(_mapas_em_cache, (), {}, None) == [mapa]
+
+        # O mapa editado chega ao cache do worker antes da próxima busca
+        pool.update_level(mapa, aberto)
+        assert len(pool.plan(aberto, "bfs")[0]) == 5
+        assert pool._submeter(_mapas_em_cache, (), {}, None) == [aberto]
+        assert pool._atualizacoes == []
+    finally:
+        pool.close()
+
+
+def test_contraction_hierarchy(tmp_path, monkeypatch):
+    import contraction
+    from contraction import ContractionHierarchy
+
+    monkeypatch.setattr(contraction, "PASTA", str(tmp_path))
+    import random
+
+    for nome in ["mapa3_barreira", "mapa9_labirinto"]:
+        caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+        if not os.path.exists(caminho_arquivo):
+            continue
+
+        with open(caminho_arquivo, "r") as f:
+            mapa_str = f.read()
+
+        level = parse_level(mapa_str)
+        ch = ContractionHierarchy(level)
+        celulas = list(level["spaces"])
+        rng = random.Random(0)
+
+        # Consultas entre pares aleatórios: caminho contínuo com o mesmo custo da ucs
+        for _ in range(20):
+            s, g = rng.choice(celulas), rng.choice(celulas)
+            path, _, custo = best_first_search(s, g, level, transition_model, G_ORDER)
+            path_ch, custo_ch, _ = ch.query(s, g)
+
+            assert path_ch[0] == s and path_ch[-1] == g
+            for a, b in zip(path_ch, path_ch[1:]):
+                assert max(abs(a[0] - b[0]), abs(a[1] - b[1])) == 1
+            assert path_cost(path_ch, level) == pytest.approx(custo, abs=1e-9)
+            assert custo_ch == pytest.approx(custo, abs=1e-9)
+
+        # plan só lê a hierarquia: sem ela, usa o backend em Python
+        load_level(mapa_str).pop("hierarchy", None)
+        with pytest.warns(RuntimeWarning, match="contraction.py"):
+            assert plan(mapa_str, "ucs", backend="ch") == plan(mapa_str, "ucs")
+        assert "hierarchy" not in load_level(mapa_str)
+
+        # Construída offline e gravada pelo conteúdo do mapa, outro processo a encontra no disco
+        assert contraction.main([caminho_arquivo, "--pasta", str(tmp_path)]) == 0
+        load_level(mapa_str).pop("hierarchy")
+        path_ch, custo_ch, visited_ch = plan(mapa_str, "ucs", backend="ch")
+        path, custo, visited = plan(mapa_str, "ucs")
+        assert custo_ch == pytest.approx(custo, abs=1e-9)
+        assert len(visited_ch) < len(visited)
+        assert isinstance(load_level(mapa_str)["hierarchy"], ContractionHierarchy)
+
+
+def test_compressed_path_database():
+    from cpd import CompressedPathDatabase
+    import random
+
+    caminho_arquivo = os.path.join(MAPS, "mapa9_labirinto.txt")
+    if not os.path.exists(caminho_arquivo):
+        pytest.skip("Mapa mapa9_labirinto não encontrado")
+
+    with open(caminho_arquivo, "r") as f:
+        level = parse_level(f.read())
+
+    cpd = CompressedPathDatabase(level, workers=1)
+    celulas = list(level["spaces"])
+    rng = random.Random(0)
+
+    # Seguir os primeiros movimentos dá um caminho de custo mínimo, como o da ucs
+    for _ in range(30):
+        s, g = rng.choice(celulas), rng.choice(celulas)
+        _, _, custo = best_first_search(s, g, level, transition_model, G_ORDER)
+        path = cpd.path(s, g)
+
+        assert path[0] == s and path[-1] == g
+        assert path_cost(path, level) == pytest.approx(custo, abs=1e-9)
+
+    # Os runs guardam bem menos entradas que a tabela completa
+    assert cpd.runs() < len(celulas) ** 2 / 4
+
+
+@pytest.mark.parametrize("nome", ["mapa4_labirinto", "mapa19_labirinto", "mapa26_labirinto_complexo"])
+def test_poda_labirintos(nome):
+    caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+    if not os.path.exists(caminho_arquivo):
+        pytest.skip(f"Mapa {nome} não encontrado")
+
+    with open(caminho_arquivo, "r") as f:
+        mapa_str = f.read()
+
+    for algoritmo, heuristica in [("bfs", None), ("ucs", None), ("astar", "euclidian")]:
+        path, custo, visited = plan(mapa_str, algoritmo, heuristica)
+        path_p, custo_p, visited_p, stats = plan(mapa_str, algoritmo, heuristica, stats=True, prune=True)
+
+        print(f"\n{nome} {algoritmo}: visitados {len(visited)} -> {len(visited_p)} ({stats['pruned']} podadas)")
+
+        # A poda não muda o tamanho do caminho da BFS nem o custo da UCS e do A*
+        assert stats["pruned"] > 0
+        assert len(path_p) == len(path)
+        if algoritmo != "bfs":
+            assert custo_p == pytest.approx(custo, abs=1e-9)
+        assert len(visited_p) < len(visited)
+
+
+def test_desempates():
+    caminho_arquivo = os.path.join(MAPS, "mapa1_aberto.txt")
+    if not os.path.exists(caminho_arquivo):
+        pytest.skip("Mapa mapa1_aberto não encontrado")
+
+    with open(caminho_arquivo, "r") as f:
+        mapa_str = f.read()
+
+    # O padrão é o maior g primeiro
+    path, custo, visited, stats = plan(mapa_str, "astar", "euclidian", stats=True)
+    assert plan(mapa_str, "astar", "euclidian", tie_break="g_max")[2] == visited
+
+    # Todos os desempates mantêm o custo ótimo do A*; preferir o maior g corta o platô e não
+    # expande mais que nenhum dos outros no mapa aberto
+    for desempate in ["coord", "h_min", "fifo", "lifo"]:
+        path_d, custo_d, _, stats_d = plan(mapa_str, "astar", "euclidian", stats=True, tie_break=desempate)
+        assert path_d[0] == path[0] and path_d[-1] == path[-1]
+        assert custo_d == pytest.approx(custo, abs=1e-9)
+        assert stats["expansions"] <= stats_d["expansions"]
+        if desempate == "coord":
+            assert stats["expansions"] < stats_d["expansions"]
+
+    for desempate in ["fifo", "lifo"]:
+        path_d, custo_d, _ = plan(mapa_str, "greedy", "euclidian", tie_break=desempate)
+        assert path_d[0] == path[0] and path_d[-1] == path[-1]
+
+    # A fila em baldes e o backend Numba reproduzem cada desempate do heap
+    import search_numba
+    for desempate in ["g_max", "coord", "h_min", "fifo", "lifo"]:
+        esperado = plan(mapa_str, "astar", "euclidian", tie_break=desempate)
+        assert plan(mapa_str, "astar", "euclidian", frontier="buckets", tie_break=desempate) == esperado
+        if search_numba.DISPONIVEL:
+            assert plan(mapa_str, "astar", "euclidian", backend="numba", tie_break=desempate) == esperado
+            assert plan(mapa_str, "greedy", "euclidian", backend="numba", tie_break=desempate) == \
+                plan(mapa_str, "greedy", "euclidian", tie_break=desempate)
+
+    with pytest.raises(ValueError):
+        plan(mapa_str, "astar", "euclidian", tie_break="aleatorio")
+
+
+def test_lote_com_consultas(tmp_path):
+    from batch import gerar_tarefas, executar_lote, ler_consultas
+
+    caminho_arquivo = os.path.join(MAPS, "mapa3_barreira.txt")
+    if not os.path.exists(caminho_arquivo):
+        pytest.skip("Mapa mapa3_barreira não encontrado")
+
+    with open(caminho_arquivo, "r") as f:
+        mapa_str = f.read()
+    path, custo, _ = plan(mapa_str, "ucs")
+    s, g = path[0], path[-1]
+
+    consultas = tmp_path / "consultas.txt"
+    consultas.write_text(f"# ida e volta\n{s[0]} {s[1]} {g[0]} {g[1]}\n{g[0]},{g[1]},{s[0]},{s[1]}\n")
+    pares = ler_consultas(str(consultas))
+    assert pares == [(s, g), (g, s)]
+
+    tarefas = list(gerar_tarefas([caminho_arquivo], ["bfs", "ucs", "astar"], ["euclidian", "manhattan"], pares))
+    assert len(tarefas) == 2 * (1 + 1 + 2)
+
+    registros = list(executar_lote(tarefas, stats=True))
+    assert all(r["result"] == "success" and "stats" in r for r in registros)
+
+    # A volta tem o mesmo custo mínimo da ida
+    for r in registros:
+        if r["algorithm"] == "ucs" or r["heuristic"] == "euclidian":
+            assert r["cost"] == pytest.approx(custo, abs=1e-9)
+        assert r["path"][0] == r["start"] and r["path"][-1] == r["goal"]
+
+    erro, = executar_lote([{"map": str(tmp_path / "nao_existe.txt"), "algorithm": "bfs", "heuristic": None,
+                            "start": None, "goal": None}])
+    assert erro["result"] == "error"
+
+
+def test_banco_de_resultados(tmp_path):
+    from results_store import ResultsStore
+
+    mapas = {}
+    for nome in ["mapa1_aberto", "mapa7_custo"]:
+        caminho_arquivo = os.path.join(MAPS, f"{nome}.txt")
+        if not os.path.exists(caminho_arquivo):
+            pytest.skip(f"Mapa {nome} não encontrado")
+        with open(caminho_arquivo, "r") as f:
+            mapas[nome] = f.read()
+    algoritmos = [("BFS", "bfs", None), ("A* Euclidiana", "astar", "euclidian")]
+    caminho_banco = str(tmp_path / "resultados.sqlite")
+
+    with ResultsStore(caminho_banco, versao="v1") as banco:
+        assert banco.resultados(mapas, algoritmos) == {}
+        assert banco.atualizar(mapas, algoritmos, repeticoes=1, aquecimento=0) == 4
+        assert banco.atualizar(mapas, algoritmos, repeticoes=1, aquecimento=0) == 0
+
+    # Os resultados ficam no arquivo e são lidos sem rodar as buscas
+    with ResultsStore(caminho_banco, versao="v1") as banco:
+        resultados = banco.resultados(mapas, algoritmos)
+    assert resultados["mapa7_custo"]["BFS"]["Visitados"] == len(plan(mapas["mapa7_custo"], "bfs")[2])
+    assert resultados["mapa1_aberto"]["A* Euclidiana"]["Custo"] == 35.38
+
+    # Com outro código, os resultados antigos não valem mais
+    with ResultsStore(caminho_banco, versao="v2") as banco:
+        assert banco.resultados(mapas, algoritmos) == {}
+        assert banco.atualizar({"mapa7_custo": mapas["mapa7_custo"]}, algoritmos, repeticoes=1, aquecimento=0) == 2
+        assert banco.remover_antigos() == 4
+
+
+def test_benchmark_vazao_sem_tracemalloc():
+    from benchmark import medir
+
+    caminho_arquivo = os.path.join(MAPS, "mapa3_barreira.txt")
+    if not os.path.exists(caminho_arquivo):
+        pytest.skip("Mapa mapa3_barreira não encontrado")
+
+    with open(caminho_arquivo, "r") as f:
+        mapa_str = f.read()
+
+    r = medir(mapa_str, "ucs", None, repeticoes=3, aquecimento=1)
+
+    # A vazão vem das execuções cronometradas: a fase de busca é parte do tempo total, então
+    # a vazão não pode ficar abaixo de expansões / tempo total (com folga para o ruído)
+    assert r["Memória (KiB)"] > 0
+    assert r["Expansões/s"] >= 0.5 * r["Expansões"] / (r["Tempo (ms)"] / 1000)
+
+
+def test_benchmark_linha_de_comando(tmp_path):
+    import json
+    import shutil
+    import subprocess
+    import sys
+    import performance_tests
+    from benchmark import coletar_resultados
+
+    caminho_arquivo = os.path.join(MAPS, "mapa1_aberto.txt")
+    if not os.path.exists(caminho_arquivo):
+        pytest.skip("Mapa mapa1_aberto não encontrado")
+    shutil.copy(caminho_arquivo, tmp_path)
+
+    # O script antigo de comparação usa o mesmo coletor do benchmark
+    assert performance_tests.coletar_resultados is coletar_resultados
+
+    # Caminho padrão do benchmark: mede os mapas da pasta e exporta o JSON
+    saida = tmp_path / "resultados.json"
+    processo = subprocess.run(
+        [sys.executable, "benchmark.py", "--mapas", str(tmp_path), "--mapa", "mapa1",
+         "--repeticoes", "1", "--aquecimento", "0", "--json", str(saida)],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=120)
+    assert processo.returncode == 0, processo.stderr
+    assert "mapa1_aberto" in processo.stdout
+
+    with open(saida) as f:
+        resultados = json.load(f)
+    assert set(resultados["mapa1_aberto.txt"]) == {nome for nome, _, _ in performance_tests.algoritmos}
+
+def test_servidor_pool_cheio_e_tempo_esgotado(monkeypatch):
+    pytest.importorskip("flask")
+    import server
+    from worker_pool import PlanPool
+    from gerador_mapas import gerar_mapa
+
+    with open(os.path.join(MAPS, "mapa26_labirinto_complexo.txt"), "r") as f:
+        mapa_str = f.read()
+    cliente = server.app.test_client()
+    consulta = {"map": mapa_str, "alg": "bfs"}
+
+    pool = PlanPool(max_workers=1, max_queue=0, timeout=30.0)
+    monkeypatch.setattr(server, "plan_pool", pool)
+    try:
+        # O mesmo worker responde às buscas seguidas
+        for _ in range(2):
+            resposta = cliente.get("/start_search", query_string=consulta)
+            assert resposta.status_code == 200
+            assert [tuple(c) for c in resposta.get_json()["path"]] == plan(mapa_str, "bfs")[0]
+        assert len(pool._livres) == 1 and pool._livres[0].tarefas == 2
+
+        # Sem worker livre nem vaga na fila: 429 na hora
+        pool._vagas.acquire()
+        try:
+            assert cliente.get("/start_search", query_string=consulta).status_code == 429
+        finally:
+            pool._vagas.release()
+
+        # Busca que passa do limite: 504, e o worker que a rodava é terminado
+        worker = pool._livres[0]
+        pool.timeout = 0.05
+        lenta = {"map": gerar_mapa("aberto", 300, 300, seed=0), "alg": "ucs"}
+        assert cliente.get("/start_search", query_string=lenta).status_code == 504
+        assert not worker.processo.is_alive() and pool._livres == []
+
+        # Um worker novo assume as buscas seguintes
+        pool.timeout = 30.0
+        assert cliente.get("/start_search", query_string=consulta).status_code == 200
+    finally:
+        pool.close()
+
+
+def test_servidor_metricas_rotulos(monkeypatch):
+    pytest.importorskip("flask")
+    import server
+    from metrics import SearchMetrics, _escapar
+
+    with open(os.path.join(MAPS, "mapa1_aberto.txt"), "r") as f:
+        mapa_str = f.read()
+    cliente = server.app.test_client()
+    monkeypatch.setattr(server, "search_metrics", SearchMetrics())
+
+    # Nomes vindos da query string com aspas, barras e quebras de linha
+    hostis = [("bfs", 'x"} 1\nfalsa{a="\\'), ('bfs"\n', None), ("astar", "euclidian"), ("astar", "qualquer")]
+    for alg, heuristica in hostis:
+        consulta = {"map": mapa_str, "alg": alg}
+        if heuristica is not None:
+            consulta["heuristic"] = heuristica
+        assert cliente.get("/start_search", query_string=consulta).status_code == 200
+
+    texto = cliente.get("/metrics").get_data(as_text=True)
+    series = [linha.rsplit(" ", 1)[0] for linha in texto.splitlines() if linha.startswith("search_expansions_total")]
+
+    # Só os nomes conhecidos viram rótulos; o resto é agrupado em "other"
+    assert series == [
+        'search_expansions_total{algorithm="astar",heuristic="euclidian"}',
+        'search_expansions_total{algorithm="astar",heuristic="other"}',
+        'search_expansions_total{algorithm="bfs",heuristic="other"}',
+        'search_expansions_total{algorithm="other",heuristic=""}',
+    ]
+    assert all(linha.startswith(("#", "search_")) for linha in texto.splitlines())
+
+    # Os valores dos rótulos são escapados como no formato de texto do Prometheus
+    assert _escapar('a\\b"c\nd') == 'a\\\\b\\"c\\nd'
+
+
+def test_servidor_producao_com_waitress():
+    pytest.importorskip("flask")
+    pytest.importorskip("waitress")
+    import json
+    import signal
+    import socket
+    import subprocess
+    import sys
+    import time
+    import urllib.parse
+    import urllib.request
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        porta = s.getsockname()[1]
+    with open(os.path.join(MAPS, "mapa1_aberto.txt"), "r") as f:
+        mapa_str = f.read()
+
+    processo = subprocess.Popen(
+        [sys.executable, "server.py", "--production", "--port", str(porta), "--workers", "1", "--queue", "2"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        base = f"http://127.0.0.1:{porta}"
+        for _ in range(100):
+            try:
+                resposta = urllib.request.urlopen(f"{base}/get_maps", timeout=5)
+                break
+            except OSError:
+                assert processo.poll() is None, processo.stderr.read().decode()
+                time.sleep(0.1)
+        else:
+            pytest.fail("o servidor não respondeu")
+
+        # --production não usa o servidor de desenvolvimento do Werkzeug
+        assert resposta.headers["Server"] == "waitress"
+
+        consulta = urllib.parse.urlencode({"map": mapa_str, "alg": "bfs"})
+        with urllib.request.urlopen(f"{base}/start_search?{consulta}", timeout=30) as resposta:
+            assert [tuple(c) for c in json.load(resposta)["path"]] == plan(mapa_str, "bfs")[0]
+    finally:
+        processo.send_signal(signal.SIGINT)
+        try:
+            processo.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+            processo.wait()
+
+
+def test_profiling():
+    import profiling
+    from worker_pool import PlanPool
+
+    with open(os.path.join(MAPS, "mapa3_barreira.txt"), "r") as f:
+        mapa_str = f.read()
+
+    registro = profiling.ProfileRegistry()
+    assert profiling.profile_plan(mapa_str, "astar", "euclidian", registry=registro) == plan(mapa_str, "astar", "euclidian")
+    assert registro.keys() == [("astar", "euclidian")]
+    assert registro.get("bfs") is None
+
+    # Os perfis da mesma busca se acumulam
+    profiling.profile_plan(mapa_str, "astar", "euclidian", registry=registro)
+    perfil = registro.get("astar", "euclidian")
+    chamadas = {nome: dados[1] for (_, _, nome), dados in perfil.stats.items()}
+    assert chamadas["plan"] == 2
+
+    # Pilhas colapsadas: "quadro;quadro;... microssegundos", com a busca abaixo de plan
+    linhas = profiling.collapsed_stacks(perfil)
+    assert linhas
+    for linha in linhas:
+        pilha, _, micros = linha.rpartition(" ")
+        assert micros.isdigit() and int(micros) >= 1
+        assert all(quadro for quadro in pilha.split(";"))
+    assert any(linha.startswith("plan (search.py:") and ";best_first_search (search.py:" in linha for linha in linhas)
+
+    # Busca perfilada num worker do pool: o perfil volta para o registro deste processo
+    pool = PlanPool(max_workers=1)
+    try:
+        assert pool.profile(mapa_str, "bfs", registry=registro) == plan(mapa_str, "bfs")
+    finally:
+        pool.close()
+    assert registro.get("bfs") is not None
@@ -0,0 +1,253 @@
+import os
+import json
+import argparse
+from collections import OrderedDict
+from collections.abc import Mapping, Container
+
+from search import POLICIES, HEURISTICS, best_first_search, transition_model, path_cost, WALL, START_STATE, GOAL_STATE
+
+# Armazenamento em tiles para mapas maiores que a memória. O mapa é convertido uma vez em
+# arquivos binários de tamanho x tamanho células (um byte por célula) e os tiles são lidos do
+# disco sob demanda, passando por um cache LRU com limite de memória. TiledSpaces tem a mesma
+# interface do dicionário level['spaces'], então transition_model e os algoritmos de busca leem
+# as células pelos tiles sem saber disso.
+
+# Códigos das células: 0 a 9 são custos, PAREDE é um 'X' e VAZIO qualquer outro caractere
+PAREDE = 0xFE
+VAZIO = 0xFF
+
+_TABELA = bytearray([VAZIO]) * 256
+for _i, _c in enumerate(b"0123456789"):
+    _TABELA[_c] = _i
+_TABELA[ord(WALL)] = PAREDE
+_TABELA[ord(START_STATE)] = 1
+_TABELA[ord(GOAL_STATE)] = 1
+_TABELA = bytes(_TABELA)
+
+# Custo de cada código, como parse_level guarda em level['spaces'] (None fora dos espaços)
+_CUSTOS = tuple(float(i) if i <= 9 else None for i in range(256))
+
+MEMORIA_PADRAO = 256 * 2 ** 20
+
+
+def _arquivo_tile(pasta, tx, ty):
+    return os.path.join(pasta, f"{tx}_{ty}.bin")
+
+
+def converter_mapa(caminho, pasta, tamanho=256):
+    """ Converts a map file into tiles on disk, reading one band of rows at a time.
+
+    Tiles without any cell (beyond the end of shorter rows) are not written.
+
+    Args:
+        caminho: The map file, in the format read by parse_level.
+        pasta: Output folder of the tiles and of meta.json.
+        tamanho: Side of each tile, in cells.
+
+    Returns:
+        The metadata of the tiled map.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    meta = {'largura': 0, 'altura': 0, 'tamanho': tamanho, 'start': None, 'goal': None, 'livres': 0}
+
+    def gravar_faixa(ty, faixa):
+        colunas = -(-max(map(len, faixa), default=0) // tamanho)
+        for tx in range(colunas):
+            tile = bytearray([VAZIO]) * (tamanho * tamanho)
+            for j, linha in enumerate(faixa):
+                pedaco = linha[tx * tamanho:(tx + 1) * tamanho]
+                tile[j * tamanho:j * tamanho + len(pedaco)] = pedaco
+            meta['livres'] += sum(tile.count(i) for i in range(10))
+            with open(_arquivo_tile(pasta, tx, ty), 'wb') as f:
+                f.write(tile)
+
+    faixa = []
+    with open(caminho, 'rb') as f:
+        for j, linha in enumerate(f):
+            linha = linha.rstrip(b'\n')
+            for simbolo, chave in ((START_STATE, 'start'), (GOAL_STATE, 'goal')):
+                i = linha.rfind(simbolo.encode())
+                if i >= 0:
+                    meta[chave] = [i, j]
+
+            faixa.append(linha.translate(_TABELA))
+            meta['largura'] = max(meta['largura'], len(linha))
+            meta['altura'] = j + 1
+
+            if len(faixa) == tamanho:
+                gravar_faixa(j // tamanho, faixa)
+                faixa = []
+
+    if faixa:
+        gravar_faixa((meta['altura'] - 1) // tamanho, faixa)
+
+    with open(os.path.join(pasta, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    return meta
+
+
+class TileCache:
+    """ LRU cache of the tiles of a map, holding at most `memoria` bytes of tiles. """
+
+    def __init__(self, pasta, tamanho, memoria=MEMORIA_PADRAO):
+        self.pasta = pasta
+        self.tamanho = tamanho
+        self.memoria = memoria
+        self.acertos = 0
+        self.faltas = 0
+        self._tiles = OrderedDict()
+        self._usado = 0
+        self._vazio = bytes([VAZIO]) * (tamanho * tamanho)
+
+    def tile(self, tx, ty):
+        chave = (tx, ty)
+        tile = self._tiles.get(chave)
+        if tile is not None:
+            self.acertos += 1
+            self._tiles.move_to_end(chave)
+            return tile
+
+        self.faltas += 1
+        try:
+            with open(_arquivo_tile(self.pasta, tx, ty), 'rb') as f:
+                tile = f.read()
+        except FileNotFoundError:
+            # tiles sem arquivo não têm células; todos compartilham o mesmo bloco
+            return self._vazio
+
+        self._tiles[chave] = tile
+        self._usado += len(tile)
+        while self._usado > self.memoria and len(self._tiles) > 1:
+            _, antigo = self._tiles.popitem(last=False)
+            self._usado -= len(antigo)
+        return tile
+
+    def __len__(self):
+        return len(self._tiles)
+
+
+class TiledSpaces(Mapping):
+    """ The free cells of a tiled map and their costs, with the interface of level['spaces'].
+
+    Consecutive reads usually fall in the same tile, so the last tile is kept aside and the LRU
+    cache is only consulted when the search crosses into another one.
+    """
+
+    def __init__(self, cache, largura, altura, livres):
+        self.cache = cache
+        self.largura = largura
+        self.altura = altura
+        self._livres = livres
+        self._chave = None
+        self._tile = None
+
+    def _codigo(self, x, y):
+        if x < 0 or y < 0 or x >= self.largura or y >= self.altura:
+            return VAZIO
+        t = self.cache.tamanho
+        chave = (x // t, y // t)
+        if chave != self._chave:
+            self._tile = self.cache.tile(*chave)
+            self._chave = chave
+        return self._tile[(y % t) * t + x % t]
+
+    def get(self, cell, default=None):
+        try:
+            x, y = cell
+        except (TypeError, ValueError):
+            return default
+        custo = _CUSTOS[self._codigo(x, y)]
+        return default if custo is None else custo
+
+    def __getitem__(self, cell):
+        custo = self.get(cell)
+        if custo is None:
+            raise KeyError(cell)
+        return custo
+
+    def __contains__(self, cell):
+        return self.get(cell) is not None
+
+    def __iter__(self):
+        t = self.cache.tamanho
+        for ty in range(-(-self.altura // t)):
+            for tx in range(-(-self.largura // t)):
+                tile = self.cache.tile(tx, ty)
+                for i, codigo in enumerate(tile):
+                    if codigo <= 9:
+                        yield (tx * t + i % t, ty * t + i // t)
+
+    def __len__(self):
+        return self._livres
+
+
+class TiledWalls(Container):
+    """ The 'X' cells of a tiled map, with the membership test of level['walls']. """
+
+    def __init__(self, spaces):
+        self._spaces = spaces
+
+    def __contains__(self, cell):
+        try:
+            x, y = cell
+        except (TypeError, ValueError):
+            return False
+        return self._spaces._codigo(x, y) == PAREDE
+
+
+def carregar_nivel(pasta, memoria=MEMORIA_PADRAO):
+    """ Loads a tiled map as a level whose cells are read from the tiles on demand.
+
+    Args:
+        pasta: Folder written by converter_mapa.
+        memoria: Memory budget of the tile cache, in bytes.
+
+    Returns:
+        A level with the same keys as parse_level, plus 'width' and 'height'.
+    """
+    with open(os.path.join(pasta, 'meta.json')) as f:
+        meta = json.load(f)
+
+    cache = TileCache(pasta, meta['tamanho'], memoria)
+    spaces = TiledSpaces(cache, meta['largura'], meta['altura'], meta['livres'])
+
+    return {
+        'walls': TiledWalls(spaces),
+        'spaces': spaces,
+        'start': tuple(meta['start']) if meta['start'] else None,
+        'goal': tuple(meta['goal']) if meta['goal'] else None,
+        'width': meta['largura'],
+        'height': meta['altura'],
+    }
+
+
+def plan_tiles(pasta, algorithm='bfs', heuristic=None, memoria=MEMORIA_PADRAO):
+    """ Same as search.plan for a tiled map on disk.
+
+    Only the map is kept out of core: the visited cells of the search stay in memory.
+
+    Returns:
+        The path, its cost and the visited cells.
+    """
+    level = carregar_nivel(pasta, memoria)
+    h = HEURISTICS.get(heuristic)
+
+    path, visited, cost = [], {}, None
+    policy, informada = POLICIES.get(algorithm, (None, False))
+    if policy is not None and (h is not None or not informada):
+        path, visited, cost = best_first_search(level['start'], level['goal'], level, transition_model, policy, h)
+
+    if cost is None:
+        cost = path_cost(path, level)
+    return path, cost, visited
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte um mapa em tiles no disco para buscas fora da memória.")
+    parser.add_argument("mapa", help="arquivo do mapa")
+    parser.add_argument("pasta", help="pasta de saída dos tiles")
+    parser.add_argument("--tamanho", type=int, default=256, help="lado de cada tile, em células")
+    args = parser.parse_args()
+
+    meta = converter_mapa(args.mapa, args.pasta, args.tamanho)
+    print(f"{meta['largura']}x{meta['altura']} células, {meta['livres']} livres")
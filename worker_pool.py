@@ -0,0 +1,215 @@
+import multiprocessing
+import threading
+import time
+
+from search import plan, update_level
+import profiling
+
+
+class PoolCheio(Exception):
+    """ Raised when every worker is busy and the waiting queue is full. """
+
+
+class TempoEsgotado(Exception):
+    """ Raised when a search does not finish within the request timeout. """
+
+
+def _servir(conexao):
+    """ Loop of a worker process: runs the calls (plan or profiling.profiled_plan) received
+    through the pipe and sends each result (or error) back, until the pipe is closed. """
+    while True:
+        try:
+            funcao, args, kwargs = conexao.recv()
+        except EOFError:
+            return
+        try:
+            resposta = ('ok', funcao(*args, **kwargs))
+        except Exception as e:
+            resposta = ('erro', str(e))
+        conexao.send(resposta)
+
+
+class _Worker:
+    """ A long-lived worker process and the pipe used to talk to it. """
+
+    def __init__(self, contexto):
+        self.conexao, filho = contexto.Pipe()
+        self.processo = contexto.Process(target=_servir, args=(filho,), daemon=True)
+        self.processo.start()
+        filho.close()
+        self.tarefas = 0
+        # Posição em PlanPool._atualizacoes até onde o cache deste worker está em dia
+        self.visto = 0
+
+    def fechar(self):
+        """ Closes the pipe, which ends the loop of the worker, and waits for it. """
+        self.conexao.close()
+        self.processo.join()
+
+    def terminar(self):
+        """ Kills the worker in the middle of a search. """
+        self.processo.terminate()
+        self.conexao.close()
+        self.processo.join()
+
+
+class PlanPool:
+    """ Bounded pool that runs plan in long-lived worker processes.
+
+    At most `max_workers` searches run at the same time and at most `max_queue` requests wait
+    for a free worker; anything beyond that is rejected right away with PoolCheio. The workers
+    are started on demand and answer many searches, so they keep the levels cached by
+    load_level; after `max_tasks` searches a worker is replaced, which bounds the memory it
+    accumulates. Edited maps reach those caches through update_level. When the timeout expires the worker running the search is terminated, so the
+    work is really cancelled, and a new one takes its place (terminating a process of a
+    ProcessPoolExecutor would break the whole executor and every search running in it).
+
+    Args:
+        max_workers: Number of searches that may run in parallel.
+        max_queue: Number of requests allowed to wait for a free worker.
+        timeout: Default time limit, in seconds, counting the time spent in the queue.
+        max_tasks: Number of searches a worker answers before being replaced.
+    """
+
+    def __init__(self, max_workers=None, max_queue=16, timeout=30.0, max_tasks=1000):
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_tasks = max_tasks
+
+        self._vagas = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._workers = threading.BoundedSemaphore(self.max_workers)
+        # Workers ociosos; quem segura _workers sempre acha um aqui ou cria um novo
+        self._livres = []
+        self._vivos = set()
+        self._trava = threading.Lock()
+
+        # Mapas editados (antigo, novo) que ainda faltam aplicar no cache de algum worker;
+        # _base é a posição global do primeiro item
+        self._atualizacoes = []
+        self._base = 0
+
+        # forkserver evita dar fork de um servidor com várias threads
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            self._contexto = multiprocessing.get_context('forkserver')
+            self._contexto.set_forkserver_preload(['search'])
+        else:
+            self._contexto = multiprocessing.get_context('spawn')
+
+    def plan(self, *args, timeout=None, **kwargs):
+        """ Runs plan(*args, **kwargs) in a worker process and returns its result.
+
+        Raises:
+            PoolCheio: If the pool and its queue are full.
+            TempoEsgotado: If the search did not finish in time (the worker is terminated).
+        """
+        return self._submeter(plan, args, kwargs, timeout)
+
+    def profile(self, map, algorithm='bfs', heuristic=None, registry=profiling.REGISTRY, timeout=None, **kwargs):
+        """ Runs plan under cProfile in a worker process, like profiling.profile_plan, and adds the
+        profile to the registry of this process.
+
+        Raises:
+            PoolCheio: If the pool and its queue are full.
+            TempoEsgotado: If the search did not finish in time (the worker is terminated).
+        """
+        resultado, perfil = self._submeter(profiling.profiled_plan, (map, algorithm, heuristic), kwargs, timeout)
+        registry.add(algorithm, heuristic, perfil)
+        return resultado
+
+    def _submeter(self, funcao, args, kwargs, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        limite = time.monotonic() + timeout
+
+        # Backpressure: recusa na hora se não há vaga nem na fila
+        if not self._vagas.acquire(blocking=False):
+            raise PoolCheio("Fila de buscas cheia")
+
+        try:
+            # Espera um worker livre, descontando esse tempo do timeout
+            if not self._workers.acquire(timeout=max(0.0, limite - time.monotonic())):
+                raise TempoEsgotado("Tempo esgotado esperando um worker livre")
+            try:
+                return self._rodar(funcao, args, kwargs, limite)
+            finally:
+                self._workers.release()
+        finally:
+            self._vagas.release()
+
+    def update_level(self, old_map, new_map):
+        """ Sends search.update_level(old_map, new_map) to every worker, so their cached levels
+        follow an edited map. Each worker applies the pending updates before its next search;
+        new workers start with an empty cache and skip them. """
+        with self._trava:
+            self._atualizacoes.append((old_map, new_map))
+
+    def close(self):
+        """ Stops the idle workers; the ones running a search stop when it finishes. """
+        with self._trava:
+            livres, self._livres = self._livres, []
+        for worker in livres:
+            worker.fechar()
+            self._remover(worker)
+
+    def _pegar(self):
+        with self._trava:
+            if self._livres:
+                worker = self._livres.pop()
+                pendentes = self._atualizacoes[worker.visto - self._base:]
+                worker.visto = self._base + len(self._atualizacoes)
+                self._descartar_aplicadas()
+                return worker, pendentes
+            fim = self._base + len(self._atualizacoes)
+        worker = _Worker(self._contexto)
+        worker.visto = fim
+        with self._trava:
+            self._vivos.add(worker)
+        return worker, []
+
+    def _descartar_aplicadas(self):
+        # Chamado com a trava: esquece as atualizações que todos os workers vivos já receberam
+        minimo = min((w.visto for w in self._vivos), default=self._base + len(self._atualizacoes))
+        del self._atualizacoes[:minimo - self._base]
+        self._base = minimo
+
+    def _remover(self, worker):
+        with self._trava:
+            self._vivos.discard(worker)
+            self._descartar_aplicadas()
+
+    def _devolver(self, worker):
+        worker.tarefas += 1
+        if worker.tarefas >= self.max_tasks:
+            worker.fechar()
+            self._remover(worker)
+            return
+        with self._trava:
+            self._livres.append(worker)
+
+    def _rodar(self, funcao, args, kwargs, limite):
+        worker, pendentes = self._pegar()
+        try:
+            # Os mapas editados desde a última busca deste worker vão antes, na mesma ordem
+            for antigo, novo in pendentes:
+                worker.conexao.send((update_level, (antigo, novo), {}))
+                worker.conexao.recv()
+            worker.conexao.send((funcao, args, kwargs))
+            # Espera a resposta só até o limite; depois disso o worker é morto no meio da busca
+            if not worker.conexao.poll(max(0.0, limite - time.monotonic())):
+                worker.terminar()
+                self._remover(worker)
+                worker = None
+                raise TempoEsgotado("Tempo esgotado durante a busca")
+            status, resultado = worker.conexao.recv()
+        except (EOFError, BrokenPipeError):
+            worker.terminar()
+            self._remover(worker)
+            worker = None
+            raise RuntimeError("O processo da busca terminou sem resposta")
+        finally:
+            if worker is not None:
+                self._devolver(worker)
+
+        if status == 'erro':
+            raise RuntimeError(resultado)
+        return resultado